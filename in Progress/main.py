@@ -8,35 +8,69 @@ to API for visualization inside a web dashboard.
 @Date: 03.10.2023
 """
 
-from machine import Pin, ADC
+# imported first, so that the import phase of the boot profile starts as early as possible
+import sensor.bootprofile as bootprofile
+import machine
 import network
 import utime as time
-import socket
-import os
-import urequests as requests
 import json
-import time
-
-sta_if = network.WLAN(network.STA_IF)
-ap_if = network.WLAN(network.AP_IF)
-sta_if.active(True)
-ap_if.active(False)
+import uasyncio as asyncio
 
 from sensor.reader import SensorReader, SensorController
-import sensor.access_point as AP
+import sensor.http_client as http
+import sensor.batch as batch
+from sensor.config import load_config, ConfigPoller
+from sensor.local_api import LocalApi, Snapshot
+from sensor.events import EventBus
+from sensor.timesync import TimeSync
+from sensor import resolver
+from sensor.commands import CommandHandler, CommandPoller
+import sensor.wifi as wifi
+from sensor.credentials import CredentialStore
+# sensor.access_point and sensor.mqtt are only imported on the paths that need them
+
+bootprofile.mark("imports")
+
+# Maximum number of readings waiting for upload, the oldest ones are dropped first
+UPLOAD_QUEUE_SIZE = 10
 
 class WebServer:
     def __init__(self):
         self.model_type = "Toms Pico"
-        with open("/wifi_config.json") as file:
-            credentials = json.load(file)
-        self.ssid = credentials["ssid"]
-        self.pw = credentials["password"]
+        self.config = load_config()
+        self.wifi_result = {"path": "portal", "duration": None}
+        # known networks, ssid and pw are set to the one connected to
+        self.credentials = CredentialStore()
+        self.ssid = ""
+        self.pw = ""
+        bootprofile.mark("config")
+        # the DHT22 warms up while the station associates
+        self.reader = SensorReader()
+        bootprofile.mark("sensors")
         self.wlan = network.WLAN(network.STA_IF)
         self.ip = self.__connect_to_wlan()
-        self.reader = SensorReader()
-        self.controller = SensorController(self.reader)
+        bootprofile.mark("wifi", wifi_path=self.wifi_result["path"])
+        # the pump pins are only driven once the board left the provisioning portal
+        self.events = EventBus()
+        self.controller = SensorController(self.reader, self.events)
+        self.controller.configure(self.config["moisture_threshold"], self.config["pump_pulse"])
         self.unique_id = self.__get_board_id()
+        self.clock = TimeSync(self.config["ntp_host"], self.config["ntp_interval"])
+        self.commands = CommandHandler(self.controller, self.clock)
+        # entries are (ticks at measurement, reading)
+        self._upload_queue = []
+        self._upload_event = asyncio.Event()
+        self.snapshot = Snapshot()
+        self.wifi = wifi.WifiSupervisor(self.wlan, self.credentials, self.config["static_ip"],
+                                        self.config["portal_after_outage"], self.__restart_into_portal)
+        self.last_upload = None
+        self.mqtt = None
+        if self.config["transport"] == "mqtt":
+            from sensor.mqtt import MQTTClient
+            self.mqtt = MQTTClient(self.unique_id, self.config["mqtt_host"], self.config["mqtt_port"],
+                                   self.config["mqtt_user"], self.config["mqtt_password"],
+                                   self.config["mqtt_keepalive"],
+                                   will=(self.__mqtt_topic("status"), "offline", True))
         print(f"RaspberryPi Board-ID: {self.unique_id}")
         print(f"Modelltyp: {self.model_type}")
         network.country("DE")
@@ -53,23 +87,29 @@ class WebServer:
             data = json.load(f)
         self.model_type = data["model_type"]"""
 
+    def __start_portal(self):
+        # the provisioning code is only needed without working credentials, so it is imported here
+        import sensor.access_point as AP
+        netconfig, wap = AP.create_access_point(password="12345678")
+        AP.start_webserver(netconfig[0], self.wlan, wap)
+        # the portal leaves the station connected with the credentials it just saved
+        self.credentials = CredentialStore()
+        self.ssid = self.credentials.last["ssid"]
+        self.pw = self.credentials.last["password"]
+
     def __check_wlan_connection(self):
         # create access point if no credentials are provided
-        if self.ssid == "" or self.pw == "":
-            netconfig, wap = AP.create_access_point(password="12345678")
-            AP.start_webserver(netconfig[0], self.wlan, wap)
+        if not len(self.credentials):
+            self.__start_portal()
         else:
-            # try if connection is possible
-            self.wlan.active(True)
-            self.wlan.connect(self.ssid, self.pw)
-            for _ in range(5):
-                # return from method if connection is established
-                if self.wlan.isconnected():
-                    return 
-                time.sleep(1)
+            # try the known networks, the cached access point first, then the best one in reach
+            self.wifi_result = asyncio.run(wifi.connect_known(self.wlan, self.credentials, self.config["static_ip"]))
+            if self.wifi_result["connected"]:
+                self.ssid = self.wifi_result["ssid"]
+                self.pw = self.wifi_result["password"]
+                return
             # otherwise create access point
-            netconfig, wap = AP.create_access_point(password="12345678")
-            AP.start_webserver(netconfig[0], self.wlan, wap)
+            self.__start_portal()
 
     def __connect_to_wlan(self) -> str:
         """
@@ -83,16 +123,112 @@ class WebServer:
         print(self.wlan.status())
         return self.wlan.ifconfig()[0]
     
-    def __post_data(self, data_dict):
+    async def __post_data(self, readings):
+        # a batch size of 1 keeps the single object body the dashboard always received
+        payload = readings if self.config["batch_size"] > 1 else readings[0]
         try:
-            res = requests.post(f"https://greenhouse-web.vercel.app/api/data", headers={"apiKey": f"{self.unique_id}"}, json=data_dict)
-            res.close()
-        except:
-            return
-        
-    def start_measuring(self):
+            body, headers = batch.encode_body(payload, self.config["compress"])
+            headers["apiKey"] = f"{self.unique_id}"
+            res = await http.post(self.config["api_url"], body, headers=headers)
+            print(f"Upload: {res.status} {res.timings}, {http.handshake_summary()}")
+            if self.config["compress"]:
+                print(f"Kompression: {batch.stats['raw_bytes']} -> {batch.stats['sent_bytes']} Bytes, "
+                      f"{batch.stats['compress_ms']} ms")
+            if self.last_upload is None:
+                self.__log_first_upload()
+            self.last_upload = res.status
+        except Exception as e:
+            print(f"Upload fehlgeschlagen: {e}")
+            self.last_upload = str(e)
+
+    def __restart_into_portal(self):
+        # after the restart the connection fails again and the access point is created
+        print("Neustart in den Einrichtungsmodus")
+        machine.reset()
+
+    def __log_first_upload(self):
+        # ticks_ms starts at power up, so it is the time from boot to the first upload
+        print(f"Boot bis erster Upload: {time.ticks_ms()} ms "
+              f"(WLAN {self.wifi_result['path']}, {self.wifi_result['duration']} ms)")
+        bootprofile.mark("first_upload")
+        bootprofile.save()
+
+    def __mqtt_topic(self, suffix: str) -> str:
+        return f"{self.config['mqtt_topic']}/{self.unique_id}/{suffix}"
+
+    async def __publish_data(self, data_dict):
+        """Publishes a reading and the retained last state of every zone via MQTT."""
+        try:
+            if not self.mqtt.connected:
+                await self.mqtt.connect()
+                await self.mqtt.publish(self.__mqtt_topic("status"), "online", retain=True)
+            await self.mqtt.publish(self.__mqtt_topic("readings"), json.dumps(data_dict))
+            for zone in (1, 2, 3):
+                state = {"soil_humidity": data_dict[f"soil_humidity_{zone}"],
+                         "emg_stop_pump": data_dict[f"emg_stop_pump{zone}"]}
+                await self.mqtt.publish(self.__mqtt_topic(f"zone/{zone}"), json.dumps(state), retain=True)
+            stats = self.mqtt.stats
+            if stats["acked"]:
+                print(f"MQTT: {stats['acked']}/{stats['published']} bestätigt, "
+                      f"Latenz {stats['ack_ms'] // stats['acked']} ms, Wiederholungen {stats['retries']}")
+            if self.last_upload is None:
+                self.__log_first_upload()
+            self.last_upload = "ok"
+        except Exception as e:
+            print(f"MQTT-Upload fehlgeschlagen: {e}")
+            self.last_upload = str(e)
+
+    async def __send_data(self, readings):
+        # uploads pause while the supervisor reconnects
+        await self.wifi.online.wait()
+        if self.mqtt:
+            for data_dict in readings:
+                await self.__publish_data(data_dict)
+        else:
+            await self.__post_data(readings)
+
+    async def _upload_loop(self):
+        """Sends queued readings one after another, independent of the measuring cycle."""
+        while True:
+            await self._upload_event.wait()
+            self._upload_event.clear()
+            hold = self.config["ntp_hold_uploads"] - time.ticks_ms() // 1000
+            if hold > 0 and not self.clock.synced.is_set():
+                # readings measured before the first synchronisation are stamped afterwards
+                try:
+                    await asyncio.wait_for(self.clock.synced.wait(), hold)
+                except asyncio.TimeoutError:
+                    pass
+            batch_size = 1 if self.mqtt else self.config["batch_size"]
+            # wait for the next reading until a batch is complete
+            while len(self._upload_queue) >= batch_size:
+                entries = self._upload_queue[:batch_size]
+                self._upload_queue = self._upload_queue[batch_size:]
+                readings = []
+                for ticks, data_dict in entries:
+                    if data_dict["timestamp"] is None:
+                        data_dict["timestamp"] = self.clock.now_ms(ticks)
+                    readings.append(data_dict)
+                await self.__send_data(readings)
+
+    def _enqueue_upload(self, ticks, data_dict):
+        if len(self._upload_queue) >= max(UPLOAD_QUEUE_SIZE, 2 * self.config["batch_size"]):
+            self._upload_queue.pop(0)
+        self._upload_queue.append((ticks, data_dict))
+        self._upload_event.set()
+
+    async def _measure_loop(self):
+        await self.reader.wait_until_ready()
+        last_cycle = None
         while True:
+            cycle_start = time.ticks_ms()
+            if last_cycle is not None:
+                print(f"Zyklusdauer: {time.ticks_diff(cycle_start, last_cycle)} ms")
+            last_cycle = cycle_start
             data_dict = self.reader.measure()
+            measured = time.ticks_ms()
+            # Unix time in ms, None until the first NTP synchronisation
+            data_dict['timestamp'] = self.clock.now_ms(measured)
             data_dict['ip_address'] = self.wlan.ifconfig()[0]
             print("="*24)
             print(f"Temperatur: {self.reader.data.temperature}")
@@ -106,10 +242,53 @@ class WebServer:
             print(f"EMG_P2: : {self.reader.data.emg_stop_pump2}")
             print(f"EMG_P3: : {self.reader.data.emg_stop_pump3}")
             print(data_dict)
-            self.controller.activate_needed_pumps()
-            self.__post_data(data_dict)
+            self.snapshot.update(data_dict, self._health())
+            self.events.emit("sample", data_dict)
+            if "first_sample" not in bootprofile.phases:
+                bootprofile.mark("first_sample")
+            self._enqueue_upload(measured, data_dict)
+            await self.controller.activate_needed_pumps()
             print("="*24)
-            time.sleep(30)
+            await asyncio.sleep(self.config["sample_interval"])
+
+    def _apply_config(self, config: dict) -> None:
+        """Applies a new server configuration, the loops read all other settings from
+        self.config on every iteration."""
+        self.controller.configure(config["moisture_threshold"], config["pump_pulse"])
+        self.clock.interval = config["ntp_interval"]
+
+    def _health(self) -> dict:
+        return {"uptime_s": time.ticks_ms() // 1000,
+                "samples": self.snapshot.version + 1,
+                "wlan_status": self.wlan.status(),
+                "rssi": self.wlan.status("rssi"),
+                "last_upload": self.last_upload,
+                "queued_uploads": len(self._upload_queue),
+                "api_requests": self.local_api.requests,
+                "stream_subscribers": self.local_api.subscribers,
+                "stream": self.local_api.stream_stats,
+                "dns": resolver.stats,
+                "tls": http.tls_stats,
+                "compression": batch.stats,
+                "commands": self.commands.stats,
+                "wifi": self.wifi.metrics}
+
+    async def _run(self):
+        self.local_api = LocalApi(self.snapshot, self.events, self.commands, api_key=self.unique_id)
+        await self.local_api.start()
+        asyncio.create_task(self.wifi.run())
+        asyncio.create_task(self.clock.run())
+        if self.config["config_url"]:
+            poller = ConfigPoller(self.config, self.unique_id)
+            poller.on_change(self._apply_config)
+            asyncio.create_task(poller.run())
+        if self.config["command_url"]:
+            asyncio.create_task(CommandPoller(self.commands, self.config["command_url"], self.unique_id).run())
+        asyncio.create_task(self._upload_loop())
+        await self._measure_loop()
+
+    def start_measuring(self):
+        asyncio.run(self._run())
 
 
 webserver = WebServer()
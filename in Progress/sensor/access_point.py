@@ -1,9 +1,14 @@
 import network
-import socket
-import ure
 import utime
-import ussl
-import json
+import uasyncio as asyncio
+
+from sensor import pages, portal_assets
+import sensor.wifi as wifi
+from sensor.credentials import CredentialStore
+from sensor.captive_dns import DnsResponder
+from sensor.http_request import Request, RequestError, RequestParser
+from sensor.response import ResponseWriter, STATUS_LINES, JSON_HEAD, JSON_CHUNKED_HEAD, EMPTY_HEAD
+from sensor.template import Template
 
 def create_access_point(password: str, essid: str = "Smart-GH") -> tuple[str, str]:
     """
@@ -40,6 +45,26 @@ def create_access_point(password: str, essid: str = "Smart-GH") -> tuple[str, st
     return (net_config[0], net_config[1]), wap
 
 
+# Seconds a scan result is served before the networks are scanned again
+SCAN_TTL = 60
+# Seconds between two checks of the age of the scan
+SCAN_CHECK_INTERVAL = 2
+# Maximum number of clients served at the same time, further connections are closed at once
+MAX_CONNECTIONS = 4
+# Seconds a client may take to send its request
+CLIENT_TIMEOUT = 10
+# Seconds a credential check waits for the connection
+CHECK_TIMEOUT = 10
+# Seconds the portal stays up after a successful check, so that the page can show the result
+RESULT_GRACE = 30
+# Seconds without requests after the result page before the portal ends, so that the browser
+# can still load the stylesheet and background of that page
+RESULT_IDLE = 3
+# URLs requested by Android, iOS/macOS and Windows to detect a captive portal
+CONNECTIVITY_CHECKS = ("/generate_204", "/gen_204", "/hotspot-detect.html", "/library/test/success.html",
+                       "/connecttest.txt", "/ncsi.txt", "/redirect")
+
+
 def get_all_available_networks() -> list[str]:
     """
     Scans for available Wi-Fi networks and returns a list of SSIDs.
@@ -47,150 +72,108 @@ def get_all_available_networks() -> list[str]:
     Returns
     -------
     list of str
-        A list of SSIDs of visible local networks.
+        A list of SSIDs of visible local networks, each listed once and sorted by signal
+        strength, strongest first. Hidden networks and names that are no valid UTF-8 are
+        left out.
     """
     wlan = network.WLAN(network.STA_IF)
     wlan.active(True)
-    networks = wlan.scan()
-    return [net[0].decode("utf-8") for net in networks]
+    strongest = {}
+    for net in wlan.scan():
+        try:
+            ssid = net[0].decode("utf-8")
+        except UnicodeError:
+            # could neither be shown nor saved, the portal works with UTF-8 names
+            continue
+        # several access points of one network show up as separate results
+        if ssid and (ssid not in strongest or net[3] > strongest[ssid]):
+            strongest[ssid] = net[3]
+    return sorted(strongest, key=lambda ssid: strongest[ssid], reverse=True)
+
+
+class NetworkScanner:
+    """
+    Cache of the visible networks, so that page loads never wait for a scan.
+
+    The portal refreshes the cache while no client is connected once it is older than
+    ttl seconds, or when the user asks for it on /refresh.
+    """
+    def __init__(self, ttl: int = SCAN_TTL):
+        self.ttl = ttl
+        self.networks = []
+        self.scanned_at = None
+
+    def expired(self) -> bool:
+        return self.scanned_at is None or utime.ticks_diff(utime.ticks_ms(), self.scanned_at) > self.ttl * 1000
+
+    def refresh(self) -> list[str]:
+        start = utime.ticks_ms()
+        self.networks = get_all_available_networks()
+        self.scanned_at = utime.ticks_ms()
+        print(f"WLAN-Scan: {len(self.networks)} Netzwerke in {utime.ticks_diff(self.scanned_at, start)} ms")
+        return self.networks
+
+
+# Fragments generated on the board, compiled on first use
+OPTION = Template("<option value='{{name}}'>{{name}}</option>\n")
+SUCCESS_MESSAGE = Template("Die Anmeldeinformationen für das Netzwerk {{ssid}} wurden erfolgreich gespeichert!")
+ERROR_MESSAGE = Template("Die Verbindung zum Netzwerk {{ssid}} konnte nicht hergestellt werden. "
+                         "Bitte versuche es nochmal.")
+BACK_BUTTON = "<button class='return-button' onclick='redirectToRoot()'>Zurück</button>".encode("utf-8")
+STATUS_JSON = Template('{"job": {{job}}, "state": "{{state}}", "duration_ms": {{duration}}}')
+
 
+def _decode(data: bytes) -> str:
+    """data as str, None if it is no valid UTF-8. MicroPython ignores the errors argument of
+    decode, so invalid bytes cannot be replaced while decoding."""
+    try:
+        return data.decode("utf-8")
+    except UnicodeError:
+        return None
 
-def build_index_html() -> str:
+
+def _display_name(ssid: bytes) -> str:
+    """SSID for pages and log output, a name that is no valid UTF-8 shows its escaped bytes."""
+    name = _decode(ssid)
+    return repr(ssid)[2:-1] if name is None else name
+
+
+def _escape(text: str) -> str:
+    """Escapes text for use inside HTML and attribute values."""
+    return text.replace("&", "&amp;").replace("<", "&lt;").replace(">", "&gt;") \
+        .replace("'", "&#39;").replace('"', "&quot;")
+
+
+def build_index_html(networks: list[str]) -> tuple:
     """
-    Builds HTML content for the root endpoint '/' of the webserver.
+    Builds the page for the root endpoint '/' of the webserver.
+
+    Parameters
+    ----------
+    networks : list of str
+        SSIDs offered for selection.
 
     Returns
     -------
-    str
-        HTML content for the root endpoint.
+    tuple
+        Pre-rendered page and the values of its slots, see sensor.pages.send.
 
     Notes
     -----
-    This function generates HTML content for displaying a form to connect to available networks.
-    The form includes input fields for network selection and password entry.
-    Upon submission, it triggers a JavaScript function to show a loader animation and submit the form asynchronously.
-    """
-    available_networks = get_all_available_networks()
-    response = """<!DOCTYPE html>
-        <html>
-          <head>
-          <script>
-              function showLoader(event) {
-                console.log("showLoader");
-                event.preventDefault();
-                document.getElementById("input-container").style.display = "none";
-                document.getElementById("loader").style.display = "grid";
-                setTimeout(function() {
-                  document.getElementById("wifi-form").submit();
-                }, 4000);
-              }
-            </script>
-            <style>
-              body {
-                  background-image: url("data:image/svg+xml,%3csvg xmlns='http://www.w3.org/2000/svg' version='1.1' xmlns:xlink='http://www.w3.org/1999/xlink' xmlns:svgjs='http://svgjs.dev/svgjs' width='1920' height='1080' preserveAspectRatio='none' viewBox='0 0 1920 1080'%3e%3cg mask='url(%26quot%3b%23SvgjsMask1001%26quot%3b)' fill='none'%3e%3crect width='1920' height='1080' x='0' y='0' fill='rgba(25%2c 201%2c 100%2c 1)'%3e%3c/rect%3e%3cpath d='M0%2c676.259C132.55%2c693.391%2c278.878%2c680.385%2c385.264%2c599.483C489.644%2c520.106%2c523.862%2c380.97%2c555.612%2c253.739C583.085%2c143.649%2c581.337%2c30.548%2c554.767%2c-79.763C529.994%2c-182.617%2c483.831%2c-279.599%2c409.112%2c-354.497C337.485%2c-426.296%2c238.302%2c-453.324%2c144.249%2c-491.266C39.463%2c-533.537%2c-64.101%2c-619.308%2c-173.047%2c-589.345C-282.004%2c-559.379%2c-311.076%2c-417.791%2c-395.604%2c-342.793C-498.282%2c-251.69%2c-684.088%2c-235.941%2c-720.516%2c-103.595C-756.051%2c25.504%2c-633.003%2c143.417%2c-560.403%2c255.927C-496.99%2c354.199%2c-419.732%2c437.355%2c-326.17%2c507.531C-226.22%2c582.498%2c-123.909%2c660.244%2c0%2c676.259' fill='%23139b4d'%3e%3c/path%3e%3cpath d='M1920 1945.85C2078.942 1919.162 2137.41 1716.35 2274.563 1631.71 2415.74 1544.587 2629.131 1582.676 2726.339 1448.243 2824.098 1313.049 2824.257 1113.443 2760.93 959.093 2700.826 812.5989999999999 2518.01 770.39 2403.402 661.13 2303.367 565.764 2264.934 395.756 2131.652 359.18100000000004 1998.375 322.60699999999997 1878.174 447.558 1743.865 480.14 1600.258 514.977 1414.324 446.30999999999995 1316.375 556.956 1218.616 667.3879999999999 1298.9299999999998 842.452 1292.688 989.806 1287.191 1119.577 1251.426 1245.154 1281.874 1371.422 1317.017 1517.163 1368.2359999999999 1664.882 1479.659 1765.183 1600.013 1873.5230000000001 1760.302 1972.665 1920 1945.85' fill='%2331e57e'%3e%3c/path%3e%3c/g%3e%3cdefs%3e%3cmask id='SvgjsMask1001'%3e%3crect width='1920' height='1080' fill='white'%3e%3c/rect%3e%3c/mask%3e%3c/defs%3e%3c/svg%3e");
-                  background-size: cover;
-                  background-repeat: no-repeat;
-                  height: 100vh;
-                  width: 100%;
-                  font-family: Arial, Helvetica, sans-serif;
-              }
-              h1 {
-                  font-size: 2.5rem;
-                  text-align: center;
-                  margin-bottom: 30px;
-              }
-              form {
-                  text-align: left;
-              }
-              label {
-                  font-size: 2.5rem;
-                  display: block;
-                  margin-top: 40px;
-                  margin-bottom: -20px;
-              }
-              input[type="text"], input[type="password"], select {
-                  width: 99%;
-                  font-size: 3.5rem;
-                  -webkit-appearance: none;
-                  border: 1px solid #ccc;
-                  padding: 0;
-                  border-radius: 15px;
-              }
-              .input-container {
-                  width: 80%;
-                  margin: 0 auto;
-                  margin-top: 50%;
-                  padding: 40px;
-                  border-radius: 20px;
-                  background-color: white;
-              }
-              input[type="submit"] {
-                  font-size: 2.5rem;
-                  width: 100%;
-                  margin-top: 30px;
-                  padding: 20px;
-                  background-color: #4caf50;
-                  color: #fff;
-                  border: none;
-                  border-radius: 15px;
-                  cursor: pointer;
-              }
-              .loader {
-                    margin: 0 auto;
-                    margin-top: 50%;
-                    width: 150px;
-                    aspect-ratio: 1; 
-                    display: none;
-              }
-              .loader:before,
-              .loader:after {
-                    content: "";
-                    grid-area: 1/1;
-                    width: 70px;
-                    aspect-ratio: 1;
-                    box-shadow: 0 0 0 3px #fff inset;
-                    filter: drop-shadow(80px 80px 0 #fff);
-                    animation: l8 2s infinite alternate;
-              }
-              .loader:after {
-                    margin: 0 0 0 auto; 
-                    filter: drop-shadow(-80px 80px 0 #fff);
-                    animation-delay: -1s;
-              }
-              @keyframes l8 {
-                    0%,10%   {border-radius:0}
-                    30%,40%  {border-radius:50% 0}
-                    60%,70%  {border-radius:50%}
-                    90%,100% {border-radius:0 50%}
-              }
-            </style>
-          </head>
-          <body>
-            <div class="input-container" id="input-container">
-              <h1>Verbindung herstellen</h1>
-              <form id="wifi-form" method="get" action="/connect">
-                <label for="network">Netzwerk</label><br>
-                <select id="network" name="network">
+    The page displays a form to connect to available networks. The form includes input fields
+    for network selection and password entry. Upon submission, it triggers a JavaScript function
+    to show a loader animation and submit the form asynchronously. Only the list of networks is
+    generated here, the rest of the page is pre-rendered by tools/build_portal.py.
     """
-    for network_name in available_networks:
-        response += f"        		<option value='{network_name}'>{network_name}</option>\n"
-    response += """
-        </select><br>
-                <label for="password">Passwort</label><br>
-                <input type="password" id="password" name="password"><br>
-                <input type="submit" value="Verbinden" onclick="showLoader(event)">
-              </form>
-            </div>
-            <div class="loader" id="loader"/>
-          </body>
-        </html>
-    """
-    return response
+    options = []
+    for network_name in networks:
+        OPTION.pieces({"name": _escape(network_name).encode("utf-8")}, options)
+    return portal_assets.INDEX, {"networks": options}
 
 
-def build_status_html(status: str, ssid: bytes) -> str:
+def build_status_html(status: str, ssid: bytes) -> tuple:
     """
-    Build HTML content for displaying connection status.
+    Build the page displaying the connection status.
 
     Parameters
     ----------
@@ -201,155 +184,29 @@ def build_status_html(status: str, ssid: bytes) -> str:
 
     Returns
     -------
-    str
-        HTML content to display the connection status.
+    tuple
+        Pre-rendered page and the values of its slots, see sensor.pages.send.
 
     Raises
     ------
     ValueError
         If the provided status is neither 'success' nor 'error'.
     """
-    response = """<!DOCTYPE html>
-      <html>
-      <head>
-        <meta charset="UTF-8">
-        <style>
-          body {
-              background-image: url("data:image/svg+xml,%3csvg xmlns='http://www.w3.org/2000/svg' version='1.1' xmlns:xlink='http://www.w3.org/1999/xlink' xmlns:svgjs='http://svgjs.dev/svgjs' width='1920' height='1080' preserveAspectRatio='none' viewBox='0 0 1920 1080'%3e%3cg mask='url(%26quot%3b%23SvgjsMask1001%26quot%3b)' fill='none'%3e%3crect width='1920' height='1080' x='0' y='0' fill='rgba(25%2c 201%2c 100%2c 1)'%3e%3c/rect%3e%3cpath d='M0%2c676.259C132.55%2c693.391%2c278.878%2c680.385%2c385.264%2c599.483C489.644%2c520.106%2c523.862%2c380.97%2c555.612%2c253.739C583.085%2c143.649%2c581.337%2c30.548%2c554.767%2c-79.763C529.994%2c-182.617%2c483.831%2c-279.599%2c409.112%2c-354.497C337.485%2c-426.296%2c238.302%2c-453.324%2c144.249%2c-491.266C39.463%2c-533.537%2c-64.101%2c-619.308%2c-173.047%2c-589.345C-282.004%2c-559.379%2c-311.076%2c-417.791%2c-395.604%2c-342.793C-498.282%2c-251.69%2c-684.088%2c-235.941%2c-720.516%2c-103.595C-756.051%2c25.504%2c-633.003%2c143.417%2c-560.403%2c255.927C-496.99%2c354.199%2c-419.732%2c437.355%2c-326.17%2c507.531C-226.22%2c582.498%2c-123.909%2c660.244%2c0%2c676.259' fill='%23139b4d'%3e%3c/path%3e%3cpath d='M1920 1945.85C2078.942 1919.162 2137.41 1716.35 2274.563 1631.71 2415.74 1544.587 2629.131 1582.676 2726.339 1448.243 2824.098 1313.049 2824.257 1113.443 2760.93 959.093 2700.826 812.5989999999999 2518.01 770.39 2403.402 661.13 2303.367 565.764 2264.934 395.756 2131.652 359.18100000000004 1998.375 322.60699999999997 1878.174 447.558 1743.865 480.14 1600.258 514.977 1414.324 446.30999999999995 1316.375 556.956 1218.616 667.3879999999999 1298.9299999999998 842.452 1292.688 989.806 1287.191 1119.577 1251.426 1245.154 1281.874 1371.422 1317.017 1517.163 1368.2359999999999 1664.882 1479.659 1765.183 1600.013 1873.5230000000001 1760.302 1972.665 1920 1945.85' fill='%2331e57e'%3e%3c/path%3e%3c/g%3e%3cdefs%3e%3cmask id='SvgjsMask1001'%3e%3crect width='1920' height='1080' fill='white'%3e%3c/rect%3e%3c/mask%3e%3c/defs%3e%3c/svg%3e");
-              background-size: cover;
-              background-repeat: no-repeat;
-              height: 100vh;
-              width: 100%;
-              font-family: Arial, Helvetica, sans-serif;
-          }
-          h1 {
-              font-size: 2.5rem;
-              text-align: center;
-              margin-bottom: 30px;
-              margin-top: 50px;
-          }
-          p {
-              font-size: 1.5rem;
-              text-align: center;
-              margin-bottom: 30px;
-          }
-          .input-container {
-              width: 80%;
-              margin: 0 auto;
-              margin-top: 50%;
-              padding: 40px;
-              padding-top: 10px;
-              border-radius: 20px;
-              background-color: white;
-          }
-          i {
-            margin: 0 auto;
-            margin-top: 40px;
-          }
-          .gg-check {
-              box-sizing: border-box;
-              color: #4caf50;
-              position: relative;
-              display: block;
-              transform: scale(var(--ggs,8));
-              width: 22px;
-              height: 22px;
-              border: 2px solid transparent;
-              border-radius: 100px
-          }
-          .gg-check::after {
-              content: "";
-              display: block;
-              box-sizing: border-box;
-              position: absolute;
-              left: 3px;
-              top: -1px;
-              width: 6px;
-              height: 10px;
-              border-width: 0 2px 2px 0;
-              border-style: solid;
-              transform-origin: bottom left;
-              transform: rotate(45deg)
-          }
-          .gg-close {
-              box-sizing: border-box;
-              color: red;
-              position: relative;
-              display: block;
-              transform: scale(var(--ggs,6));
-              width: 22px;
-              height: 22px;
-              border: 2px solid transparent;
-              border-radius: 40px
-          }
-          .gg-close::after,
-          .gg-close::before {
-              content: "";
-              display: block;
-              box-sizing: border-box;
-              position: absolute;
-              width: 16px;
-              height: 2px;
-              background: currentColor;
-              transform: rotate(45deg);
-              border-radius: 5px;
-              top: 8px;
-              left: 1px
-          }
-          .gg-close::after {
-              transform: rotate(-45deg)
-          }
-          .return-button {
-              font-size: 2.5rem;
-              width: 100%;
-              margin-top: 40px;
-              padding: 20px;
-              background-color: #4caf50;
-              color: #fff;
-              border: none;
-              border-radius: 15px;
-              cursor: pointer;
-              transition: background-color 0.3s ease-in-out;
-          }
-          .return-button:hover {
-              background-color: #45a049; /* Darker shade of green on hover */
-          }
-        </style>
-      </head>
-      <body>
-        <div class="input-container">
-    """
     if status != "success" and status != "error":
         raise ValueError(f"Status 'success' or 'error' expected, {status} provided")
+    name = {"ssid": _escape(_display_name(ssid)).encode("utf-8")}
     if status == "success":
-        response +="""
-          <i class="gg-check"></i>
-          <h1>Verbindung hergestellt</h1>
-        """
-        response += f"      <p>Die Anmeldeinformationen für das Netzwerk {ssid.decode('utf-8')} wurden erfolgreich gespeichert!</p>"
+        values = {"icon": b"check", "title": "Verbindung hergestellt".encode("utf-8"), "button": b"",
+                  "message": SUCCESS_MESSAGE.pieces(name)}
     else:
-        response +="""
-          <i class="gg-close"></i>
-          <h1>Verbindung fehlgeschlagen</h1>
-        """
-        response += f"      <p>Die Verbindung zum Netzwerk {ssid.decode('utf-8')} konnte nicht hergestellt werden. Bitte versuche es nochmal."
-        response += "       <button class='return-button' onclick='redirectToRoot()'>Zurück</button>"
-    response += """
-        </div>
-        <script>
-          function redirectToRoot() {
-              window.location.href = "/";
-          }
-        </script>
-      </body>
-      </html>
-    """
-    return response
+        values = {"icon": b"close", "title": "Verbindung fehlgeschlagen".encode("utf-8"),
+                  "message": ERROR_MESSAGE.pieces(name), "button": BACK_BUTTON}
+    return portal_assets.STATUS, values
 
 
-def save_wifi_credentials(ssid: bytes, password: bytes):
+def save_wifi_credentials(ssid: bytes, password: bytes, duration: int = None):
     """
-    Save Wi-Fi credentials to a JSON file.
+    Adds Wi-Fi credentials to the store of known networks.
 
     Parameters
     ----------
@@ -357,27 +214,43 @@ def save_wifi_credentials(ssid: bytes, password: bytes):
         The SSID (network name) of the Wi-Fi network.
     password : bytes
         The password of the Wi-Fi network.
+    duration : int, optional
+        Milliseconds the successful check took to connect.
+
+    Raises
+    ------
+    ValueError
+        If SSID or password are no valid UTF-8, the store only holds text.
 
     Notes
     -----
-    This function takes the SSID and password as bytes objects and converts them to
-    UTF-8 encoded strings before saving them to the JSON file.
+    The networks saved before are kept, a known network gets the new password. The network
+    is recorded as connected, so it becomes the network the board uses after the portal.
     """
-    credentials = {"ssid": ssid.decode("utf-8"), "password": password.decode("utf-8")}
-    with open("/wifi_config.json", "w") as file:
-        json.dump(credentials, file)
+    name = _decode(ssid)
+    text = _decode(password)
+    if name is None or text is None:
+        raise ValueError("SSID und Passwort müssen UTF-8 sein")
+    store = CredentialStore()
+    store.add(name, text)
+    store.record(name, True, duration)
+    store.save()
 
 
-def check_wifi_credentials(ssid: bytes, password: bytes) -> bool:
+async def check_wifi_credentials(wlan, ssid: bytes, password: bytes, timeout: int = CHECK_TIMEOUT) -> bool:
     """
-    Check the validity of Wi-Fi credentials by attempting to connect to a temporary WLAN.
+    Check the validity of Wi-Fi credentials by connecting the station interface.
 
     Parameters
     ----------
-    ssid : str
+    wlan : network.WLAN
+        Station interface.
+    ssid : bytes
         The SSID (network name) of the Wi-Fi network.
-    password : str
+    password : bytes
         The password of the Wi-Fi network.
+    timeout : int, optional
+        Seconds to wait for the connection (Default: CHECK_TIMEOUT).
 
     Returns
     -------
@@ -386,163 +259,309 @@ def check_wifi_credentials(ssid: bytes, password: bytes) -> bool:
 
     Notes
     -----
-    It checks for connection success within 5 seconds and returns True if successful, False otherwise.
+    A successful connection is kept, so the board does not associate a second time after the
+    check. The result is known as soon as the driver reports an IP address or a failure, other
+    tasks of the event loop keep running while it waits.
     """
-    temp_wlan = network.WLAN(network.STA_IF)
-    temp_wlan.active(True)
-    temp_wlan.connect(ssid, password)
-    # Check if the WLAN is connected
-    for _ in range(10): # try for 10 seconds
-        if temp_wlan.isconnected():
-            temp_wlan.disconnect()
+    wlan.active(True)
+    wlan.connect(ssid, password)
+    start = utime.ticks_ms()
+    while utime.ticks_diff(utime.ticks_ms(), start) < timeout * 1000:
+        status = wlan.status()
+        if status == wifi.STAT_GOT_IP:
             print("valid")
             return True
-        utime.sleep(1)  
-    temp_wlan.disconnect
+        if status in wifi.FAILED_STATES:
+            break
+        await asyncio.sleep_ms(100)
+    wlan.disconnect()
     print("not valid")
     return False
 
 
-def unquote(string) -> bytes:
+class CredentialCheck:
     """
-    Decodes a percent-encoded string.
+    Credential check running in the background, polled by the portal page on /status.
 
     Parameters
     ----------
-    string : str or bytes
-        The percent-encoded string to decode.
-
-    Returns
-    -------
-    bytes
-        The decoded byte string.
-
-    Notes
-    -----
-    This function decodes a percent-encoded string, replacing percent-encoded
-    characters with their corresponding byte representation. If the input is
-    already a byte string, it is assumed to be percent-encoded, otherwise it
-    is encoded as UTF-8 before decoding. Non-ASCII characters are assumed to
-    be percent-encoded.
-
-    Examples
-    --------
-    >>> unquote('abc%20def')
-    b'abc def'
-    >>> unquote(b'abc%20def')
-    b'abc def'
+    job_id : int
+        Number of the check, reported to the page.
+    wlan : network.WLAN
+        Station interface used for the check.
+    ssid, password : bytes
+        Credentials entered by the user.
     """
-    if not string:
-        return b''
-    if isinstance(string, str):
-        string = string.encode('utf-8')
-    bits = string.split(b'%')
-    if len(bits) == 1:
-        return string
-    res = bytearray(bits[0])
-    append = res.append
-    extend = res.extend
-    for item in bits[1:]:
+    def __init__(self, job_id: int, wlan, ssid: bytes, password: bytes):
+        self.id = job_id
+        self.ssid = ssid
+        self.state = "running"
+        self.started = utime.ticks_ms()
+        self.duration = None
+        self.task = asyncio.create_task(self._run(wlan, password))
+
+    async def _run(self, wlan, password: bytes) -> bool:
+        # the job always ends in 'success' or 'error', the page polling it and a plain form
+        # submit waiting for it always get their answer
+        valid = False
         try:
-            append(int(item[:2], 16))
-            extend(item[2:])
-        except KeyError:
-            append(b'%')
-            extend(item)
-    return res
-
-
-def handle_request(request: str, wlan) -> str:
+            if _decode(self.ssid) is None or _decode(password) is None:
+                # could not be saved, the store and the station work with UTF-8 names
+                print(f"Zugangsdaten für {_display_name(self.ssid)} sind kein UTF-8")
+            else:
+                valid = await check_wifi_credentials(wlan, self.ssid, password)
+                self.duration = utime.ticks_diff(utime.ticks_ms(), self.started)
+                if valid:
+                    save_wifi_credentials(self.ssid, password, self.duration)
+        except Exception as e:
+            print(f"Prüfung der Zugangsdaten fehlgeschlagen: {e!r}")
+            wlan.disconnect()
+            valid = False
+        if self.duration is None:
+            self.duration = utime.ticks_diff(utime.ticks_ms(), self.started)
+        self.state = "success" if valid else "error"
+        print(f"Zugangsdaten für {_display_name(self.ssid)} geprüft: {self.state} nach {self.duration} ms")
+        return valid
+
+    def json_values(self) -> dict:
+        """Values for STATUS_JSON, the state is one of 'running', 'success' and 'error'."""
+        return {"job": b"%d" % self.id, "state": self.state.encode(),
+                "duration": b"null" if self.duration is None else b"%d" % self.duration}
+
+
+class Portal:
     """
-    Handle HTTP request and generate appropriate HTTP response.
+    Asynchronous webserver of the provisioning portal.
 
     Parameters
     ----------
-    request : str
-        The HTTP request string.
-
-    Returns
-    -------
-    str
-        The HTTP response string.
+    wlan : network.WLAN
+        Station interface, connected once valid credentials were entered.
+    wap : network.WLAN
+        Access point interface, switched off when the portal is done.
 
     Notes
     -----
-    This function parses the HTTP request and generates an appropriate HTTP
-    response based on the request type and parameters.
-
-    If the request is a GET request to the '/connect' endpoint with valid
-    network credentials, it attempts to connect to the specified network,
-    saves the credentials if successful, and returns a success response.
-
-    If the request is a GET request to the '/connect' endpoint with invalid
-    network credentials or incorrect format, it returns an error response.
-
-    For any other request, it returns the HTML form page.
+    Every client gets CLIENT_TIMEOUT seconds to send its request and WRITE_TIMEOUT seconds of
+    sensor.response to accept every slice of the response, at most MAX_CONNECTIONS clients
+    are served at the same time. The credential check runs as background job: the page
+    submits the form with fetch, gets the job id and polls /status until the check is done,
+    then loads /result. After a successful result page, the portal ends once no request came
+    in for RESULT_IDLE seconds, when the browser has fetched its assets. Submits while a check
+    is running get the running job instead of starting another one. Without JavaScript,
+    /connect waits for the check and answers with the result page directly.
+
+    Together with the DNS responder, every request for a foreign host and every connectivity
+    check of the operating systems is redirected to the form page, so the portal opens by
+    itself after joining the access point.
     """
-    if request.startswith("GET /connect?"):
-        print("POST REQUEST")
-        params = ure.match("GET /connect\?network=(.+?)&password=(.+?) HTTP", request)
-        if params:
-            ssid = unquote(params.group(1))
-            password = unquote(params.group(2))
-            if check_wifi_credentials(ssid, password):
-                save_wifi_credentials(ssid, password)
-                wlan.active(True)
-                wlan.connect(ssid, password)
-                for _ in range(5):
-                    if wlan.isconnected():
-                        print("Verbindung hergestellt!")
-                        break
-                return build_status_html("success", ssid)
-        return build_status_html("error", ssid)
-    else:
-        print("DEFAULT REQUEST")
+    def __init__(self, wlan, wap):
+        self.wlan = wlan
+        self.wap = wap
+        self.scanner = NetworkScanner()
+        self.connections = 0
+        # one request buffer per connection slot
+        self._parsers = [RequestParser() for _ in range(MAX_CONNECTIONS)]
+        self.requests = 0
+        self.rejected = 0
+        self.redirects = 0
+        self.ap_ipv4 = None
+        self.done = asyncio.Event()
+        # headers sending clients to the portal, built once the address is known
+        self._redirect = None
+        # running or last credential check
+        self._job = None
+        self._job_count = 0
+        # set once the result page of a successful check was requested
+        self._finished = False
+        self._idle_since = utime.ticks_ms()
+        self._ending = None
+
+    def _start_check(self, ssid: bytes, password: bytes) -> CredentialCheck:
+        if not self._checking():
+            self._job_count += 1
+            self._job = CredentialCheck(self._job_count, self.wlan, ssid, password)
+            asyncio.create_task(self._finish_after_success(self._job))
+        return self._job
+
+    async def _finish_after_success(self, job: CredentialCheck) -> None:
+        """Ends the portal RESULT_GRACE seconds after a successful check, in case the page
+        never fetches the result."""
+        if await job.task:
+            await asyncio.sleep(RESULT_GRACE)
+            self.done.set()
+
+    async def _finish_when_idle(self) -> None:
+        """Ends the portal once no client was served for RESULT_IDLE seconds."""
+        while self.connections or utime.ticks_diff(utime.ticks_ms(), self._idle_since) < RESULT_IDLE * 1000:
+            await asyncio.sleep_ms(100)
+        self.done.set()
+
+    def _checking(self) -> bool:
+        return self._job is not None and self._job.state == "running"
+
+    def _find_job(self, request: Request) -> CredentialCheck:
+        job_id = bytes(request.params.get("job", b""))
+        if self._job and job_id.isdigit() and int(job_id) == self._job.id:
+            return self._job
+        return None
+
+    async def handle_request(self, request: Request, response: ResponseWriter) -> None:
+        """
+        Writes the response to a request.
+
+        Parameters
+        ----------
+        request : Request
+            The parsed request.
+        response : ResponseWriter
+            Response of the client.
+
+        Notes
+        -----
+        A request to the '/connect' endpoint, with the parameters 'network' and 'password'
+        in the query string or a form body, starts a check of the network credentials.
+        A page asking for JSON gets the id of the check, which it polls on
+        '/status?job=<id>' and whose result page it loads from '/result?job=<id>'.
+        A plain form submit waits for the check and gets the result page directly.
+        If the credentials are valid, they are saved and the connection is kept.
+
+        Paths below '/static/' serve the stylesheets and the background image of the pages.
+        A GET request to '/refresh' scans for networks again before returning the form page,
+        unless a credential check is running: the blocking scan would disturb the station while
+        it associates, so the cached networks are returned then.
+        For any other request, it returns the form page with the cached networks.
+        """
+        path = request.path
+        job = None
+        if path.startswith("/static/"):
+            asset = portal_assets.ASSETS.get(path)
+            if asset is None:
+                return await response.send(404, EMPTY_HEAD)
+            gzip = "gzip" in request.headers.get("accept-encoding", "")
+            return await pages.send_asset(response, asset, gzip, request.headers.get("if-none-match", ""))
+        if path == "/connect":
+            ssid = bytes(request.params.get("network", b""))
+            password = bytes(request.params.get("password", b""))
+            if not ssid or not password:
+                return await self._send_page(response, request, build_status_html("error", ssid))
+            job = self._start_check(ssid, password)
+            if "application/json" in request.headers.get("accept", ""):
+                return await self._send_json(response, job)
+            await job.task
+        elif path == "/status":
+            job = self._find_job(request)
+            if job is None:
+                return await response.send(200, JSON_HEAD, b'{"state": "unknown"}')
+            return await self._send_json(response, job)
+        elif path == "/result":
+            job = self._find_job(request)
+        elif path == "/refresh":
+            networks = self.scanner.networks if self._checking() else self.scanner.refresh()
+            return await self._send_page(response, request, build_index_html(networks))
+        if job:
+            # the page has shown the result of a successful check, the portal is done
+            self._finished = await job.task
+            return await self._send_page(response, request, build_status_html(job.state, job.ssid))
         # Respond with the HTML form page
-        return build_index_html()
+        return await self._send_page(response, request, build_index_html(self.scanner.networks))
+
+    async def _send_json(self, response: ResponseWriter, job: CredentialCheck) -> None:
+        await response.start(200, JSON_CHUNKED_HEAD)
+        await STATUS_JSON.render(response, job.json_values())
+        await response.end()
+
+    async def _send_page(self, response: ResponseWriter, request: Request, page: tuple) -> None:
+        await pages.send(response, page[0], page[1], "gzip" in request.headers.get("accept-encoding", ""))
+
+    async def _handle(self, reader, writer) -> None:
+        if self.connections >= MAX_CONNECTIONS:
+            self.rejected += 1
+            writer.close()
+            await writer.wait_closed()
+            return
+        self.connections += 1
+        # the connection limit guarantees a free parser, it is kept while the parameters are in use
+        parser = self._parsers.pop()
+        response = ResponseWriter(writer)
+        start = utime.ticks_ms()
+        try:
+            request = await asyncio.wait_for(parser.read(reader), CLIENT_TIMEOUT)
+            self.requests += 1
+            host = request.headers.get("host", self.ap_ipv4).split(":")[0]
+            if host != self.ap_ipv4 or request.path in CONNECTIVITY_CHECKS:
+                self.redirects += 1
+                await response.send(302, self._redirect)
+                return
+            await self.handle_request(request, response)
+            print(f"{request.method} {request.path}: {response.sent} Bytes in "
+                  f"{utime.ticks_diff(utime.ticks_ms(), start)} ms")
+        except RequestError as e:
+            print(f"Ungültige Portal-Anfrage: {e}")
+            await response.send(e.status if e.status in STATUS_LINES else 400, EMPTY_HEAD)
+        except (OSError, ValueError, asyncio.TimeoutError) as e:
+            print(f"Portal-Anfrage abgebrochen: {e!r}")
+        finally:
+            self._parsers.append(parser)
+            self.connections -= 1
+            writer.close()
+            await writer.wait_closed()
+            self._idle_since = utime.ticks_ms()
+        if self._finished and self._ending is None:
+            self._ending = asyncio.create_task(self._finish_when_idle())
+
+    async def _scan_loop(self) -> None:
+        """Refreshes the network list while no client is being served and no credential check
+        is associating the station, as the scan blocks and would disturb it."""
+        while True:
+            if self.scanner.expired() and not self.connections and not self._checking():
+                self.scanner.refresh()
+            await asyncio.sleep(SCAN_CHECK_INTERVAL)
+
+    async def run(self, ap_ipv4: str) -> None:
+        """Serves the portal and answers DNS queries until the station is connected."""
+        self.ap_ipv4 = ap_ipv4
+        self._redirect = f"Location: http://{ap_ipv4}/\r\nConnection: close\r\n".encode()
+        self.scanner.refresh()
+        dns = DnsResponder(ap_ipv4)
+        dns_task = asyncio.create_task(dns.run())
+        server = await asyncio.start_server(self._handle, ap_ipv4, 80, backlog=MAX_CONNECTIONS)
+        scan_task = asyncio.create_task(self._scan_loop())
+        print("Web server started. Listening for connections...")
+        await self.done.wait()
+        scan_task.cancel()
+        dns_task.cancel()
+        server.close()
+        await server.wait_closed()
+        self.wap.active(False)
+        print(f"Portal beendet nach {self.requests} Anfragen ({self.redirects} umgeleitet), "
+              f"{self.rejected} Verbindungen abgewiesen, {dns.stats['answered']} DNS-Antworten")
 
 
 def start_webserver(ap_ipv4: str, wlan, wap):
     """
-    Starts a simple web server on the specified IPv4 address.
+    Starts the webserver of the provisioning portal on the specified IPv4 address.
 
     Parameters
     ----------
     ap_ipv4 : str
         The IPv4 address on which the web server will listen.
+    wlan : network.WLAN
+        Station interface, connected once valid credentials were entered.
+    wap : network.WLAN
+        Access point interface, switched off when the portal is done.
 
     Notes
     -----
-    This function creates a TCP/IP socket, binds it to the specified IPv4 address
-    and port 80, and listens for incoming connections. Upon receiving a connection,
-    it receives the HTTP request from the client, processes it using the handle_request
-    function, generates an appropriate HTTP response, and sends it back to the client.
-    Finally, it closes the connection.
+    Blocks until valid credentials were entered and the station is connected. The portal
+    runs in its own event loop, which is reset afterwards, so that the measuring loop
+    starts with an empty task queue.
     """
-    server_socket = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
-    server_socket.bind((ap_ipv4, 80)) 
-    server_socket.listen(5)
-    print("Web server started. Listening for connections...")
-    while True:
-        # Wait for a connection
-        client_socket, client_address = server_socket.accept()
-        print("Client connected:", client_address)
-        # Receive the HTTP request from the client
-        request_data = client_socket.recv(1024)
-        print("Request received:")
-        print(request_data.decode("utf-8"))
-        # Send HTTP response
-        response = handle_request(request_data.decode("utf-8"),wlan)
-        client_socket.send("HTTP/1.1 200 OK\r\nContent-Type: text/html\r\n\r\n")
-        client_socket.send(response.encode())
-        # Close the connection
-        client_socket.close()
-        if wlan.isconnected():
-            wap.active(False)
-            break
+    asyncio.run(Portal(wlan, wap).run(ap_ipv4))
+    asyncio.new_event_loop()
 
 
 if __name__ == "__main__":
-    ipv4, subnetmask = create_access_point(essid="Test", password="password")
-    start_webserver(ipv4)
+    (ipv4, subnetmask), wap = create_access_point(essid="Test", password="password")
+    start_webserver(ipv4, network.WLAN(network.STA_IF), wap)
 
@@ -0,0 +1,71 @@
+"""Encoding of upload bodies.
+
+Several readings can be sent as one JSON array, optionally compressed with zlib
+('Content-Encoding: deflate'). The JSON is written directly into the compressor, so the
+uncompressed document never exists as a whole in RAM.
+"""
+
+import io
+import json
+import utime as time
+
+try:
+    import deflate
+except ImportError:
+    # firmware without deflate module, bodies are sent uncompressed
+    deflate = None
+
+# Window size of the compressor as power of two, 9 uses a window of 512 bytes
+COMPRESS_WBITS = 9
+
+# summed sizes before and after compression and the time spent compressing
+stats = {"raw_bytes": 0, "sent_bytes": 0, "compress_ms": 0}
+
+
+class _CountingWriter(io.IOBase):
+    """Passes writes through to stream and counts the written bytes. Derives from IOBase,
+    since json.dump only writes to stream objects."""
+    def __init__(self, stream):
+        self._stream = stream
+        self.count = 0
+
+    def write(self, data):
+        self.count += len(data)
+        return self._stream.write(data)
+
+
+def encode_body(payload, compress: bool = False) -> tuple:
+    """
+    Serialises payload as JSON request body.
+
+    Parameters
+    ----------
+    payload : dict or list
+        Single reading or list of readings.
+    compress : bool, optional
+        Whether the body should be compressed with zlib (Default: False). Ignored if the
+        firmware has no deflate module.
+
+    Returns
+    -------
+    tuple
+        Body as bytes and the headers describing it.
+    """
+    start = time.ticks_ms()
+    buffer = io.BytesIO()
+    headers = {"Content-Type": "application/json"}
+    if compress and deflate:
+        compressor = deflate.DeflateIO(buffer, deflate.ZLIB, COMPRESS_WBITS)
+        counter = _CountingWriter(compressor)
+        json.dump(payload, counter)
+        compressor.close()
+        headers["Content-Encoding"] = "deflate"
+    else:
+        counter = _CountingWriter(buffer)
+        json.dump(payload, counter)
+    body = buffer.getvalue()
+    stats["raw_bytes"] += counter.count
+    stats["sent_bytes"] += len(body)
+    if compress:
+        stats["compress_ms"] += time.ticks_diff(time.ticks_ms(), start)
+    return body, headers
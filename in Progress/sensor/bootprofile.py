@@ -0,0 +1,35 @@
+"""Timing of the boot phases.
+
+main.py marks the end of every boot phase. The profile of the last boots is stored in
+/boot_profile.json once the first reading was uploaded, so slow phases can be compared
+across restarts without a serial console attached.
+"""
+
+import json
+import utime as time
+
+PROFILE_PATH = "/boot_profile.json"
+# Number of boots kept in the profile file
+HISTORY_SIZE = 5
+
+# phase -> ms since power up at the end of the phase
+phases = {}
+
+
+def mark(phase: str, **info) -> None:
+    """Records the end of a boot phase, additional keyword arguments are stored alongside."""
+    phases[phase] = time.ticks_ms()
+    phases.update(info)
+
+
+def save(path: str = PROFILE_PATH) -> None:
+    """Appends the current boot to the profile file."""
+    try:
+        with open(path) as file:
+            history = json.load(file)
+    except (OSError, ValueError):
+        history = []
+    history = (history + [phases])[-HISTORY_SIZE:]
+    with open(path, "w") as file:
+        json.dump(history, file)
+    print(f"Bootprofil: {phases}")
@@ -0,0 +1,94 @@
+"""DNS responder of the provisioning portal.
+
+While the access point is up, every A query of a client is answered with the address of
+the board. Phones and laptops check for internet access right after joining a network by
+fetching a known URL; since that name now resolves to the portal, the check lands on the
+webserver, which redirects it, and the operating system pops up the portal page on its own.
+Queries for other record types are answered without records, so that clients fall back to A.
+"""
+
+import uasyncio as asyncio
+import usocket as socket
+
+# Seconds clients may cache the answer, short so that nothing sticks after provisioning
+ANSWER_TTL = 10
+# Milliseconds between two checks of the socket while no query is waiting
+POLL_INTERVAL = 20
+
+TYPE_A = 1
+TYPE_ANY = 255
+
+
+def _question_end(packet: bytes) -> int:
+    """Offset behind the first question (name, type and class) of a query."""
+    offset = 12
+    while packet[offset]:
+        offset += packet[offset] + 1
+    return offset + 5
+
+
+class DnsResponder:
+    """
+    Answers all DNS queries with one address.
+
+    Parameters
+    ----------
+    address : str
+        IPv4 address returned for every name, the address of the access point.
+    """
+    def __init__(self, address: str):
+        self.address = address
+        # name as pointer to the question, type A, class IN, TTL, length, address
+        self._answer = (b"\xc0\x0c\x00\x01\x00\x01" + ANSWER_TTL.to_bytes(4, "big") + b"\x00\x04"
+                        + bytes(int(part) for part in address.split(".")))
+        self.stats = {"answered": 0, "ignored": 0}
+
+    def answer(self, packet: bytes) -> bytes:
+        """
+        Builds the response to a query.
+
+        Returns
+        -------
+        bytes
+            The response, None if the packet is no standard query.
+        """
+        # QR bit clear and opcode 0, exactly one question
+        if len(packet) < 17 or packet[2] & 0xF8 or packet[4:6] != b"\x00\x01":
+            return None
+        end = _question_end(packet)
+        if end > len(packet):
+            return None
+        qtype = int.from_bytes(packet[end - 4:end - 2], "big")
+        answers = qtype in (TYPE_A, TYPE_ANY)
+        # response with recursion desired copied and recursion available, additional records dropped
+        return (packet[:2] + bytes((0x80 | (packet[2] & 0x01), 0x80)) + b"\x00\x01"
+                + (b"\x00\x01" if answers else b"\x00\x00") + b"\x00\x00\x00\x00"
+                + packet[12:end] + (self._answer if answers else b""))
+
+    async def run(self) -> None:
+        """Serves queries on port 53 of address until the task is cancelled."""
+        sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+        sock.bind((self.address, 53))
+        sock.setblocking(False)
+        print(f"DNS-Responder gestartet auf {self.address}")
+        try:
+            while True:
+                try:
+                    packet, client = sock.recvfrom(512)
+                except OSError as e:
+                    if e.args and e.args[0] != 11:  # anything but EAGAIN
+                        raise
+                    await asyncio.sleep_ms(POLL_INTERVAL)
+                    continue
+                try:
+                    response = self.answer(packet)
+                except IndexError:
+                    response = None
+                if response is None:
+                    self.stats["ignored"] += 1
+                    continue
+                sock.sendto(response, client)
+                self.stats["answered"] += 1
+        finally:
+            sock.close()
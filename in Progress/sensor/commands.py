@@ -0,0 +1,139 @@
+"""Remote commands for manual overrides.
+
+Commands arrive either as POST on the local API (/api/commands) or by long polling the
+backend at command_url. Each command is a JSON object with an unique 'id':
+
+    {"id": "c1", "action": "water", "zone": 2, "seconds": 10}
+    {"id": "c2", "action": "clear_emergency_stop", "zone": 1}
+    {"id": "c3", "action": "lamp", "state": "on"}
+    {"id": "c4", "action": "fan", "state": "off"}
+
+A command id is executed only once, repeated deliveries get the stored result. The safety
+checks of SensorController apply to every command.
+"""
+
+import json
+import uasyncio as asyncio
+import utime as time
+
+import sensor.http_client as http
+
+# Number of remembered command ids
+MAX_REMEMBERED = 32
+# Seconds the backend may hold a long poll open
+LONG_POLL_TIMEOUT = 35
+# Seconds to wait after a failed poll
+RETRY_INTERVAL = 5
+
+
+class CommandHandler:
+    """
+    Executes commands on the controller.
+
+    Parameters
+    ----------
+    controller : SensorController
+        Controller the commands are applied to.
+    clock : TimeSync, optional
+        Used to measure the latency of commands carrying a 'sent_ms' Unix timestamp.
+    """
+    def __init__(self, controller, clock=None):
+        self.controller = controller
+        self.clock = clock
+        # list of (command id, result), oldest first
+        self._results = []
+        self.stats = {"executed": 0, "rejected": 0, "duplicates": 0, "last_latency_ms": None}
+
+    def _remember(self, command_id, result: dict) -> dict:
+        self._results.append((command_id, result))
+        if len(self._results) > MAX_REMEMBERED:
+            self._results.pop(0)
+        return result
+
+    def execute(self, command: dict) -> dict:
+        """
+        Executes a command once.
+
+        Parameters
+        ----------
+        command : dict
+            Decoded command, see module documentation.
+
+        Returns
+        -------
+        dict
+            Result with 'id', 'status' ('accepted' or 'rejected') and an optional 'error'.
+        """
+        command_id = command.get("id")
+        if command_id is None:
+            self.stats["rejected"] += 1
+            return {"id": None, "status": "rejected", "error": "Command without id"}
+        for known_id, result in self._results:
+            if known_id == command_id:
+                self.stats["duplicates"] += 1
+                return result
+        if self.clock and "sent_ms" in command:
+            now = self.clock.now_ms()
+            try:
+                if now is not None:
+                    self.stats["last_latency_ms"] = now - int(command["sent_ms"])
+            except (TypeError, ValueError):
+                # the timestamp is only informational, the command is executed anyway
+                pass
+        try:
+            self._apply(command)
+        except (ValueError, TypeError, KeyError) as e:
+            self.stats["rejected"] += 1
+            return self._remember(command_id, {"id": command_id, "status": "rejected", "error": str(e)})
+        self.stats["executed"] += 1
+        print(f"Befehl ausgeführt: {command}")
+        return self._remember(command_id, {"id": command_id, "status": "accepted"})
+
+    def _apply(self, command: dict) -> None:
+        action = command["action"]
+        if action == "water":
+            zone, seconds = int(command["zone"]), int(command["seconds"])
+            # started synchronously, so that a rejection is part of the answer
+            self.controller.start_watering(zone, seconds)
+        elif action == "clear_emergency_stop":
+            self.controller.clear_emergency_stop(int(command["zone"]))
+        elif action in ("lamp", "fan"):
+            if command["state"] not in ("on", "off"):
+                raise ValueError("State must be 'on' or 'off'")
+            switch = self.controller.set_lamp if action == "lamp" else self.controller.set_fan
+            switch(command["state"] == "on")
+        else:
+            raise ValueError(f"Unknown action '{action}'")
+
+
+class CommandPoller:
+    """
+    Long polls the backend for commands and reports their results.
+
+    The backend is expected to answer GET command_url with a JSON list of commands as soon
+    as one is pending, or with an empty list after at most LONG_POLL_TIMEOUT seconds.
+    Results are posted back to the same URL.
+    """
+    def __init__(self, handler: CommandHandler, url: str, api_key: str):
+        self.handler = handler
+        self.url = url
+        self.api_key = api_key
+
+    async def run(self) -> None:
+        headers = {"apiKey": self.api_key}
+        while True:
+            try:
+                res = await http.request("GET", self.url, headers=headers, read_body=True,
+                                         timeouts={"response": LONG_POLL_TIMEOUT})
+                if res.status == 200 and res.body:
+                    received = time.ticks_ms()
+                    results = [self.handler.execute(command) for command in json.loads(res.body)]
+                    print(f"{len(results)} Befehle in {time.ticks_diff(time.ticks_ms(), received)} ms verarbeitet")
+                    if results:
+                        await http.post(self.url, json.dumps(results).encode(),
+                                        headers={"apiKey": self.api_key, "Content-Type": "application/json"})
+                elif res.status != 204:
+                    await asyncio.sleep(RETRY_INTERVAL)
+            except Exception as e:
+                print(f"Befehlsabfrage fehlgeschlagen: {e}")
+                await asyncio.sleep(RETRY_INTERVAL)
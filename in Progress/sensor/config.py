@@ -0,0 +1,185 @@
+"""Device configuration stored on the flash.
+
+Settings missing in /config.json fall back to the values in DEFAULT_CONFIG, so a board
+without configuration file keeps uploading to the Vercel dashboard as before.
+
+If config_url is set, ConfigPoller fetches the settings listed in REMOTE_SCHEMA from the
+server. Polls use If-None-Match, so an unchanged configuration costs a '304 Not Modified'
+without body. Valid new settings are applied without reboot and stored as last-good
+configuration on the flash.
+"""
+
+import json
+import os
+import uasyncio as asyncio
+
+import sensor.http_client as http
+
+CONFIG_PATH = "/config.json"
+
+DEFAULT_CONFIG = {
+    # 'http' posts every reading to api_url, 'mqtt' publishes to mqtt_host
+    "transport": "http",
+    # reuse the last IP lease instead of DHCP when reconnecting to the cached access point
+    "static_ip": False,
+    # seconds without Wi-Fi after which the board restarts into the provisioning access point
+    "portal_after_outage": 1800,
+    "api_url": "https://greenhouse-web.vercel.app/api/data",
+    # readings per HTTP request, with more than one the body is a JSON array
+    "batch_size": 1,
+    # compress HTTP bodies with 'Content-Encoding: deflate'
+    "compress": False,
+    "mqtt_host": "",
+    "mqtt_port": 1883,
+    "mqtt_user": "",
+    "mqtt_password": "",
+    "mqtt_topic": "greenhouse",
+    "mqtt_keepalive": 60,
+    "ntp_host": "pool.ntp.org",
+    # seconds between two NTP synchronisations
+    "ntp_interval": 3600,
+    # seconds uploads wait for the first synchronisation, so that early readings get a timestamp
+    "ntp_hold_uploads": 60,
+    # soil humidity in % below which a zone is watered
+    "moisture_threshold": 50,
+    # seconds a pump runs per watering
+    "pump_pulse": 30,
+    # seconds between two measurements
+    "sample_interval": 30,
+    # endpoint of the server pushed configuration, empty disables polling
+    "config_url": "",
+    "config_poll_interval": 300,
+    # backend endpoint long polled for remote commands, empty disables polling
+    "command_url": "",
+    # ETag of the last applied server configuration
+    "config_etag": "",
+}
+
+# settings the server may change at runtime: name -> (type, minimum, maximum)
+REMOTE_SCHEMA = {
+    "moisture_threshold": (int, 0, 100),
+    "pump_pulse": (int, 1, 120),
+    "sample_interval": (int, 5, 3600),
+    "batch_size": (int, 1, 20),
+    "compress": (bool, None, None),
+    "ntp_interval": (int, 60, 86400),
+    "config_poll_interval": (int, 30, 86400),
+}
+
+
+def load_config(path: str = CONFIG_PATH) -> dict:
+    """
+    Loads the configuration from the flash.
+
+    Parameters
+    ----------
+    path : str, optional
+        Path of the JSON configuration file (Default: '/config.json').
+
+    Returns
+    -------
+    dict
+        DEFAULT_CONFIG updated with the values of the configuration file.
+    """
+    config = dict(DEFAULT_CONFIG)
+    try:
+        with open(path) as file:
+            config.update(json.load(file))
+    except (OSError, ValueError):
+        print("Keine gültige Konfiguration gefunden, Standardwerte werden verwendet")
+    return config
+
+
+def save_config(config: dict, path: str = CONFIG_PATH) -> None:
+    """Stores the configuration on the flash, written to a temporary file first so that
+    a reset while writing keeps the previous file intact."""
+    with open(path + ".tmp", "w") as file:
+        json.dump(config, file)
+    os.rename(path + ".tmp", path)
+
+
+def validate_config(candidate: dict) -> dict:
+    """
+    Checks settings received from the server.
+
+    Parameters
+    ----------
+    candidate : dict
+        Decoded JSON document of the server.
+
+    Returns
+    -------
+    dict
+        The settings of candidate known in REMOTE_SCHEMA, unknown keys are dropped.
+
+    Raises
+    ------
+    ValueError
+        If a setting has the wrong type or is out of range.
+    """
+    if not isinstance(candidate, dict):
+        raise ValueError("Configuration must be a JSON object")
+    valid = {}
+    for name, value in candidate.items():
+        if name not in REMOTE_SCHEMA:
+            print(f"Unbekannte Einstellung '{name}' ignoriert")
+            continue
+        kind, minimum, maximum = REMOTE_SCHEMA[name]
+        if kind is bool:
+            if not isinstance(value, bool):
+                raise ValueError(f"'{name}' must be true or false")
+        # bool is a subclass of int, so it is excluded explicitly
+        elif isinstance(value, bool) or not isinstance(value, int) or not minimum <= value <= maximum:
+            raise ValueError(f"'{name}' must be an integer between {minimum} and {maximum}")
+        valid[name] = value
+    return valid
+
+
+class ConfigPoller:
+    """
+    Polls the server configuration and applies changes at runtime.
+
+    Parameters
+    ----------
+    config : dict
+        Active configuration, updated in place.
+    api_key : str
+        Board identifier sent as 'apiKey' header.
+    """
+    def __init__(self, config: dict, api_key: str):
+        self.config = config
+        self.api_key = api_key
+        self._listeners = []
+
+    def on_change(self, listener) -> None:
+        """Registers listener(config), called after a new configuration was applied."""
+        self._listeners.append(listener)
+
+    async def poll(self) -> bool:
+        """Fetches the configuration once, returns True if it changed."""
+        headers = {"apiKey": self.api_key}
+        if self.config["config_etag"]:
+            headers["If-None-Match"] = self.config["config_etag"]
+        res = await http.request("GET", self.config["config_url"], headers=headers,
+                                 keep_headers=("etag",), read_body=True)
+        if res.status == 304:
+            return False
+        if res.status != 200:
+            raise OSError(f"Config server answered {res.status}")
+        # raises ValueError for an invalid document, the active configuration stays untouched
+        update = validate_config(json.loads(res.body))
+        self.config.update(update)
+        self.config["config_etag"] = res.headers.get("etag", "")
+        save_config(self.config)
+        for listener in self._listeners:
+            listener(self.config)
+        print(f"Neue Konfiguration übernommen: {update}")
+        return True
+
+    async def run(self) -> None:
+        while True:
+            try:
+                await self.poll()
+            except Exception as e:
+                print(f"Konfiguration konnte nicht geladen werden: {e}")
+            await asyncio.sleep(self.config["config_poll_interval"])
@@ -0,0 +1,149 @@
+"""Store of the Wi-Fi networks the board knows.
+
+/wifi_config.json holds every network entered in the provisioning portal, with connection
+statistics. The top level 'ssid' and 'password' always name the network of
+the last successful connection, so the file keeps the format of a single network for older
+firmware. A file with only these two keys is taken over as store with one network.
+
+At boot, the networks found by one scan are ranked by signal strength, then by their last
+successful connection. Networks not seen by the scan, e.g. hidden ones, are tried after all
+visible ones. The 'priority' of networks saved by older firmware is ignored.
+
+The file is only written when something changed: a new network, a failed attempt or a
+connection to another network than last time. A boot that connects to the same network as
+before leaves the flash alone; its counters are only written with the next change.
+"""
+
+import json
+import os
+
+CREDENTIALS_PATH = "/wifi_config.json"
+# Networks kept at most, the one unused the longest is dropped first
+MAX_NETWORKS = 8
+
+
+class CredentialStore:
+    """
+    Known networks with connection statistics.
+
+    Parameters
+    ----------
+    path : str, optional
+        File of the store (Default: CREDENTIALS_PATH).
+
+    Attributes
+    ----------
+    networks : list of dict
+        Networks with 'ssid', 'password', 'successes', 'failures', 'last_success' (number
+        of the connection, 0 for never) and 'duration' of the last successful connection
+        in ms.
+    """
+    def __init__(self, path: str = CREDENTIALS_PATH):
+        self.path = path
+        self.networks = []
+        # counts successful connections, orders them without a synchronised clock
+        self.sequence = 0
+        self._changed = False
+        try:
+            with open(path) as file:
+                data = json.load(file)
+        except (OSError, ValueError):
+            data = {}
+        if "networks" in data:
+            self.networks = data["networks"]
+            self.sequence = data.get("sequence", 0)
+        elif data.get("ssid") and data.get("password"):
+            self.add(data["ssid"], data["password"])
+            self._changed = True
+
+    def __len__(self) -> int:
+        return len(self.networks)
+
+    def get(self, ssid: str) -> dict:
+        """Returns the network named ssid, None if it is unknown."""
+        for network in self.networks:
+            if network["ssid"] == ssid:
+                return network
+        return None
+
+    @property
+    def last(self) -> dict:
+        """Network of the last successful connection, None if the store is empty."""
+        if not self.networks:
+            return None
+        return max(self.networks, key=lambda network: network["last_success"])
+
+    def add(self, ssid: str, password: str) -> dict:
+        """Adds a network or updates the password of a known one, the store is not saved."""
+        network = self.get(ssid)
+        self._changed = True
+        if network is None:
+            if len(self.networks) >= MAX_NETWORKS:
+                self.networks.remove(min(self.networks, key=lambda known: known["last_success"]))
+            network = {"ssid": ssid, "successes": 0, "failures": 0, "last_success": 0, "duration": None}
+            self.networks.append(network)
+        network["password"] = password
+        return network
+
+    def record(self, ssid: str, connected: bool, duration: int = None) -> None:
+        """Counts a connection attempt to a known network, the store is not saved."""
+        network = self.get(ssid)
+        if network is None:
+            return
+        if connected:
+            # the same network as last time changes nothing worth a write
+            if network is not self.last or not network["last_success"]:
+                self._changed = True
+            self.sequence += 1
+            network["successes"] += 1
+            network["last_success"] = self.sequence
+            network["duration"] = duration
+        else:
+            network["failures"] += 1
+            self._changed = True
+
+    def rank(self, scan: list) -> list:
+        """
+        Orders the known networks for connecting.
+
+        Parameters
+        ----------
+        scan : list of tuple
+            Result of WLAN.scan().
+
+        Returns
+        -------
+        list of tuple
+            (network, access point) with access point as (bssid, channel) of the strongest
+            access point found, None for networks missing in the scan.
+        """
+        # keyed by the raw SSID, names of neighbouring networks need not be valid UTF-8
+        strongest = {}
+        for net in scan:
+            if net[0] in strongest and strongest[net[0]][3] >= net[3]:
+                continue
+            strongest[net[0]] = net
+        visible = []
+        missing = []
+        for network in self.networks:
+            net = strongest.get(network["ssid"].encode("utf-8"))
+            if net:
+                visible.append((net[3], network["last_success"], network, (net[1], net[2])))
+            else:
+                missing.append((network["last_success"], network))
+        visible.sort(key=lambda entry: entry[:2], reverse=True)
+        missing.sort(key=lambda entry: entry[0], reverse=True)
+        return [(entry[2], entry[3]) for entry in visible] + [(entry[1], None) for entry in missing]
+
+    def save(self) -> None:
+        """Writes the store if it changed, to a temporary file first so that a reset while
+        writing keeps the previous file intact."""
+        if not self._changed:
+            return
+        last = self.last
+        data = {"ssid": last["ssid"] if last else "", "password": last["password"] if last else "",
+                "sequence": self.sequence, "networks": self.networks}
+        with open(self.path + ".tmp", "w") as file:
+            json.dump(data, file)
+        os.rename(self.path + ".tmp", self.path)
+        self._changed = False
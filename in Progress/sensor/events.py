@@ -0,0 +1,36 @@
+"""Publish/subscribe of sensor and actuator events.
+
+Producers (measuring loop, SensorController) call emit(), consumers like the event stream of
+the local API register a callback. Callbacks are called synchronously and must not block.
+"""
+
+import utime as time
+
+
+class EventBus:
+    """Distributes events to all registered listeners."""
+    def __init__(self):
+        self._listeners = []
+
+    def subscribe(self, listener) -> None:
+        """Registers listener(kind, data, ticks) for all following events."""
+        self._listeners.append(listener)
+
+    def unsubscribe(self, listener) -> None:
+        if listener in self._listeners:
+            self._listeners.remove(listener)
+
+    def emit(self, kind: str, data: dict) -> None:
+        """
+        Sends an event to every listener.
+
+        Parameters
+        ----------
+        kind : str
+            Type of the event, e.g. 'sample', 'pump', 'emergency_stop' or 'tank_empty'.
+        data : dict
+            JSON serialisable content of the event.
+        """
+        ticks = time.ticks_ms()
+        for listener in tuple(self._listeners):
+            listener(kind, data, ticks)
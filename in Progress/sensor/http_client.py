@@ -0,0 +1,260 @@
+"""Non-blocking HTTP/1.1 client for uploading sensor data.
+
+This module replaces the blocking urequests calls inside the event loop. Every request is
+split into phases (dns, connect, handshake, response) which each have their own timeout, so
+a stalled TLS handshake only delays the upload task and never the sampling or pump control.
+
+Every TLS handshake is a full one: the ssl module of MicroPython neither hands out the
+session of a connection nor accepts one for the next, so sessions cannot be resumed on this
+firmware. The number and duration of the handshakes are recorded for logging.
+"""
+
+import uasyncio as asyncio
+import uerrno as errno
+import uselect as select
+import usocket as socket
+import ussl as ssl
+import utime as time
+
+from sensor import resolver
+
+# Timeouts in seconds per request phase
+DEFAULT_TIMEOUTS = {"dns": 5, "connect": 5, "handshake": 10, "response": 10}
+# Size of the slices the request body is written in
+WRITE_CHUNK = 512
+# Milliseconds between two polls of a connecting socket
+CONNECT_POLL = 5
+
+# number and summed duration in ms of TLS handshakes
+tls_stats = {"handshakes": 0, "handshake_ms": 0}
+
+
+class PhaseTimeout(Exception):
+    """Raised if one phase of a request exceeds its timeout."""
+    def __init__(self, phase: str):
+        super().__init__(f"Timeout in phase '{phase}'")
+        self.phase = phase
+
+
+class Response:
+    """Status, selected headers and optional body of an HTTP response."""
+    def __init__(self, status: int, headers: dict, body: bytes, timings: dict):
+        self.status = status
+        self.headers = headers
+        self.body = body
+        self.timings = timings
+
+
+def split_url(url: str) -> tuple:
+    """
+    Splits an URL into its components.
+
+    Parameters
+    ----------
+    url : str
+        URL in the form 'http[s]://host[:port]/path'.
+
+    Returns
+    -------
+    tuple
+        Scheme, host, port and path of the URL.
+    """
+    scheme, _, rest = url.partition("://")
+    if scheme not in ("http", "https"):
+        raise ValueError(f"Unsupported scheme '{scheme}'")
+    host, slash, path = rest.partition("/")
+    path = slash + path if slash else "/"
+    port = 443 if scheme == "https" else 80
+    if ":" in host:
+        host, port = host.split(":")
+        port = int(port)
+    return scheme, host, port, path
+
+
+def _ssl_context():
+    context = ssl.SSLContext(ssl.PROTOCOL_TLS_CLIENT)
+    # urequests did not verify certificates either, the board has no CA store
+    context.verify_mode = ssl.CERT_NONE
+    return context
+
+
+def handshake_summary() -> str:
+    """Returns number and mean duration of the TLS handshakes for logging."""
+    if not tls_stats["handshakes"]:
+        return "keine TLS-Verbindungen"
+    return (f"TLS-Handshakes {tls_stats['handshakes']}, "
+            f"im Mittel {tls_stats['handshake_ms'] // tls_stats['handshakes']} ms")
+
+
+async def _open_connection(address: str, port: int, context, host: str):
+    """Connects like asyncio.open_connection, but closes the socket if the connect fails or is
+    cancelled by the phase timeout. The TLS handshake is left to the first write."""
+    sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+    try:
+        sock.setblocking(False)
+        try:
+            sock.connect(socket.getaddrinfo(address, port)[0][-1])
+        except OSError as e:
+            if e.errno != errno.EINPROGRESS:
+                raise
+        poller = select.poll()
+        poller.register(sock, select.POLLOUT)
+        while True:
+            events = poller.poll(0)
+            if events:
+                if events[0][1] & (select.POLLERR | select.POLLHUP):
+                    raise OSError("Connection refused")
+                break
+            await asyncio.sleep_ms(CONNECT_POLL)
+        if context:
+            sock = context.wrap_socket(sock, server_hostname=host, do_handshake_on_connect=False)
+            sock.setblocking(False)
+        stream = asyncio.StreamWriter(sock, {})
+        return stream, stream
+    except BaseException:
+        # timeouts cancel this coroutine, the socket must not outlive it
+        sock.close()
+        raise
+
+
+async def _phase(name: str, coro, timeouts: dict, timings: dict):
+    start = time.ticks_ms()
+    try:
+        result = await asyncio.wait_for(coro, timeouts[name])
+    except asyncio.TimeoutError:
+        raise PhaseTimeout(name)
+    timings[name] = time.ticks_diff(time.ticks_ms(), start)
+    return result
+
+
+def _header_block(method: str, host: str, path: str, headers: dict, length: int) -> bytes:
+    lines = [f"{method} {path} HTTP/1.1", f"Host: {host}", "Connection: close"]
+    for name, value in headers.items():
+        lines.append(f"{name}: {value}")
+    if length or method in ("POST", "PUT"):
+        lines.append(f"Content-Length: {length}")
+    return ("\r\n".join(lines) + "\r\n\r\n").encode()
+
+
+async def _send_body(writer, body) -> None:
+    view = memoryview(body)
+    for offset in range(0, len(view), WRITE_CHUNK):
+        writer.write(view[offset:offset + WRITE_CHUNK])
+        await writer.drain()
+
+
+async def _read_head(reader, keep: tuple) -> tuple:
+    status_line = await reader.readline()
+    if not status_line:
+        raise OSError("Connection closed without response")
+    status = int(status_line.split(None, 2)[1])
+    headers = {}
+    while True:
+        line = await reader.readline()
+        if not line or line == b"\r\n":
+            break
+        name, _, value = line.partition(b":")
+        name = name.strip().lower().decode()
+        # only keep headers the caller asked for, everything else is dropped right away
+        if name in keep:
+            headers[name] = value.strip().decode()
+    return status, headers
+
+
+async def _read_chunked(reader) -> bytes:
+    """Reads a body sent with 'Transfer-Encoding: chunked' and returns it without framing."""
+    chunks = []
+    while True:
+        line = await reader.readline()
+        if not line:
+            raise OSError("Connection closed in chunked body")
+        # chunk extensions behind ';' are ignored
+        size = int(line.split(b";")[0].strip(), 16)
+        if not size:
+            break
+        chunks.append(await reader.readexactly(size))
+        await reader.readexactly(2)
+    # trailer headers up to the empty line
+    while True:
+        line = await reader.readline()
+        if not line or line == b"\r\n":
+            break
+    return b"".join(chunks)
+
+
+async def request(method: str, url: str, body=b"", headers: dict = None,
+                  timeouts: dict = None, keep_headers: tuple = (), read_body: bool = False) -> Response:
+    """
+    Sends an HTTP/1.1 request without blocking the event loop.
+
+    Parameters
+    ----------
+    method : str
+        HTTP method, e.g. 'GET' or 'POST'.
+    url : str
+        Target URL, 'http' and 'https' are supported.
+    body : bytes, bytearray or memoryview, optional
+        Request body, written to the socket in slices without copying it.
+    headers : dict, optional
+        Additional request headers.
+    timeouts : dict, optional
+        Timeouts in seconds for the phases 'dns', 'connect', 'handshake' and 'response',
+        missing phases fall back to DEFAULT_TIMEOUTS.
+    keep_headers : tuple of str, optional
+        Lowercase names of response headers that should be parsed, all others are skipped.
+    read_body : bool, optional
+        Whether the response body should be read (Default: False). Chunked bodies are
+        returned without their framing.
+
+    Returns
+    -------
+    Response
+        Status code, requested headers, body and the duration of every phase in ms.
+
+    Raises
+    ------
+    PhaseTimeout
+        If a phase exceeds its timeout.
+    OSError
+        If the connection fails or is closed before a response arrives.
+    """
+    phase_timeouts = dict(DEFAULT_TIMEOUTS)
+    if timeouts:
+        phase_timeouts.update(timeouts)
+    scheme, host, port, path = split_url(url)
+    timings = {}
+
+    address = await _phase("dns", resolver.resolve(host), phase_timeouts, timings)
+    context = _ssl_context() if scheme == "https" else None
+    reader, writer = await _phase("connect", _open_connection(address, port, context, host),
+                                  phase_timeouts, timings)
+    try:
+        # TLS handshakes lazily, it completes while the header block is written
+        writer.write(_header_block(method, host, path, headers or {}, len(body)))
+        await _phase("handshake", writer.drain(), phase_timeouts, timings)
+        if context:
+            tls_stats["handshakes"] += 1
+            tls_stats["handshake_ms"] += timings["handshake"]
+
+        async def exchange():
+            await _send_body(writer, body)
+            keep = keep_headers + ("content-length", "transfer-encoding")
+            status, response_headers = await _read_head(reader, keep)
+            content = b""
+            if read_body and "chunked" in response_headers.get("transfer-encoding", ""):
+                content = await _read_chunked(reader)
+            elif read_body:
+                length = int(response_headers.get("content-length", 0))
+                content = await reader.readexactly(length) if length else await reader.read(-1)
+            return status, response_headers, content
+
+        status, response_headers, content = await _phase("response", exchange(), phase_timeouts, timings)
+    finally:
+        writer.close()
+        await writer.wait_closed()
+    return Response(status, response_headers, content, timings)
+
+
+async def post(url: str, body, headers: dict = None, timeouts: dict = None) -> Response:
+    """Shortcut for a POST request, see request()."""
+    return await request("POST", url, body=body, headers=headers, timeouts=timeouts)
@@ -0,0 +1,217 @@
+"""Incremental parser for the HTTP requests of the provisioning portal.
+
+A request is read with readinto into a buffer that is allocated once per parser, whatever
+way the client segments it. The end of the head is searched only in the newly received
+bytes, and the head is split into lines once it is complete. Parameters come from the
+query string and, for POST requests, from an 'application/x-www-form-urlencoded' body.
+They are percent-decoded in place in one pass over the buffer, with a lookup table for the
+hex digits, and handed out as memoryviews of it. Head and body are limited in size;
+oversized or malformed requests raise RequestError with the status code to answer with.
+"""
+
+# Maximum length of request line and headers in bytes
+MAX_HEAD_SIZE = 2048
+# Maximum size of a form body in bytes
+MAX_BODY_SIZE = 512
+FORM_TYPE = "application/x-www-form-urlencoded"
+_HEAD_END = b"\r\n\r\n"
+
+# Value of every hex digit by character code, 0xFF for all other characters
+_HEX = bytearray(b"\xff" * 256)
+for _value, _digit in enumerate(b"0123456789abcdef"):
+    _HEX[_digit] = _value
+for _value, _digit in enumerate(b"ABCDEF"):
+    _HEX[_digit] = _value + 10
+
+
+class RequestError(ValueError):
+    """Request that cannot be served, status is the HTTP status code for the answer."""
+    def __init__(self, status: int, message: str):
+        super().__init__(message)
+        self.status = status
+
+
+class Request:
+    """
+    Parsed HTTP request.
+
+    Attributes
+    ----------
+    method : str
+        Request method, e.g. 'GET'.
+    path : str
+        Path without query string.
+    headers : dict
+        Lowercase header names to values.
+    params : dict
+        Parameter names to their decoded values as memoryview, from the query string and
+        the form body. The values point into the buffer of the parser and are valid until
+        it reads the next request.
+    """
+    def __init__(self, method: str, path: str, headers: dict, params: dict):
+        self.method = method
+        self.path = path
+        self.headers = headers
+        self.params = params
+
+
+def parse_form(buffer: bytearray, start: int, end: int, params: dict = None) -> dict:
+    """
+    Parses 'a=1&b=2' in buffer[start:end] and decodes it in place.
+
+    Escapes like '%20' and '+' are decoded, a '%' without two hex digits is kept as it is.
+    A decoded value is never longer than its source, so every byte is written at or before
+    the position it is read from, in a single pass.
+
+    Parameters
+    ----------
+    buffer : bytearray
+        Buffer holding the encoded form, overwritten with the decoded form.
+    start, end : int
+        Range of the form in buffer.
+    params : dict, optional
+        Dict the parameters are added to, a new dict by default.
+
+    Returns
+    -------
+    dict
+        Decoded names as str to decoded values as memoryview into buffer.
+
+    Raises
+    ------
+    ValueError
+        If a name is no valid UTF-8.
+    """
+    params = {} if params is None else params
+    view = memoryview(buffer)
+    hex_value = _HEX
+    read = start
+    write = start
+    field = start
+    name = None
+    while read <= end:
+        # an '&' behind the form ends the last parameter
+        byte = buffer[read] if read < end else 38
+        read += 1
+        if byte == 38:  # '&'
+            if name is not None:
+                params[name] = view[field:write]
+            elif write > field:
+                params[bytes(view[field:write]).decode()] = view[write:write]
+            name = None
+            field = write
+            continue
+        if byte == 61 and name is None:  # first '=' of a parameter
+            name = bytes(view[field:write]).decode()
+            field = write
+            continue
+        if byte == 43:  # '+'
+            byte = 32
+        elif byte == 37 and read + 2 <= end:  # '%'
+            high = hex_value[buffer[read]]
+            low = hex_value[buffer[read + 1]]
+            if high | low < 16:
+                byte = high << 4 | low
+                read += 2
+        buffer[write] = byte
+        write += 1
+    return params
+
+
+class RequestParser:
+    """
+    Reads requests from asyncio streams into one reusable buffer.
+
+    A parser serves one connection at a time. The parameters of the returned Request are
+    views of the buffer, the parser must not read the next request while they are in use.
+    """
+    def __init__(self, max_head: int = MAX_HEAD_SIZE, max_body: int = MAX_BODY_SIZE):
+        self.max_head = max_head
+        self.max_body = max_body
+        self._buffer = bytearray(max_head + max_body)
+        self._view = memoryview(self._buffer)
+
+    async def _fill(self, reader, filled: int, limit: int) -> int:
+        count = await reader.readinto(self._view[filled:limit])
+        if not count:
+            raise RequestError(400, "Connection closed during request")
+        return filled + count
+
+    async def _read_head(self, reader) -> tuple:
+        """Reads until the empty line, returns (end of head, bytes received so far)."""
+        buffer = self._buffer
+        filled = 0
+        scanned = 0
+        matched = 0
+        while True:
+            if filled >= self.max_head:
+                raise RequestError(431, "Request head too large")
+            filled = await self._fill(reader, filled, self.max_head)
+            while scanned < filled:
+                byte = buffer[scanned]
+                scanned += 1
+                if byte == _HEAD_END[matched]:
+                    matched += 1
+                    if matched == 4:
+                        return scanned, filled
+                else:
+                    matched = 1 if byte == 13 else 0
+
+    async def read(self, reader) -> Request:
+        """
+        Reads one request.
+
+        Parameters
+        ----------
+        reader : asyncio.StreamReader
+            Stream of the client.
+
+        Returns
+        -------
+        Request
+            The parsed request.
+
+        Raises
+        ------
+        RequestError
+            If the request is malformed, no valid UTF-8 outside the parameters, too large or
+            the client closed the connection.
+        """
+        head_end, filled = await self._read_head(reader)
+        lines = bytes(self._view[:head_end - 4]).split(b"\r\n")
+        parts = lines[0].split(b" ")
+        if len(parts) != 3 or not parts[1].startswith(b"/"):
+            raise RequestError(400, "Malformed request line")
+        path, _, query = parts[1].partition(b"?")
+        headers = {}
+        try:
+            for line in lines[1:]:
+                name, _, value = line.partition(b":")
+                headers[name.strip().lower().decode()] = value.strip().decode()
+            method = parts[0].decode()
+            path = path.decode()
+        except UnicodeError:
+            raise RequestError(400, "Request head is no valid UTF-8")
+        # the request line starts the buffer, the query ends the target
+        target_end = len(parts[0]) + 1 + len(parts[1])
+        try:
+            params = parse_form(self._buffer, target_end - len(query), target_end)
+        except ValueError:
+            raise RequestError(400, "Malformed query string")
+
+        if method == "POST":
+            try:
+                length = int(headers.get("content-length", 0))
+            except ValueError:
+                raise RequestError(400, "Invalid Content-Length")
+            if not 0 <= length <= self.max_body:
+                raise RequestError(413, "Request body too large")
+            end = head_end + length
+            while filled < end:
+                filled = await self._fill(reader, filled, end)
+            if headers.get("content-type", "").startswith(FORM_TYPE):
+                try:
+                    parse_form(self._buffer, head_end, end, params)
+                except ValueError:
+                    raise RequestError(400, "Malformed form body")
+        return Request(method, path, headers, params)
@@ -0,0 +1,249 @@
+"""Read-only HTTP API for the local network.
+
+While the board is connected as station, clients in the same network can read the latest
+reading without going through the cloud dashboard:
+
+    GET /api/current    complete last reading
+    GET /api/zones/<n>  soil humidity and emergency stop of zone n (1-3)
+    GET /api/health     uptime, sample count and upload state
+    GET /api/stream     Server-Sent Events of every sample and actuator event
+    POST /api/commands  manual override, see sensor.commands, needs the 'apiKey' header
+
+All responses are serialised once per sample. Every snapshot carries an ETag, a request with
+a matching If-None-Match header is answered with '304 Not Modified' and no body.
+"""
+
+import json
+import uasyncio as asyncio
+import urandom as random
+import utime as time
+
+ZONES = (1, 2, 3)
+# Seconds a client may take to send its request head
+REQUEST_TIMEOUT = 5
+# Maximum length of request line and headers in bytes
+MAX_HEADER_SIZE = 2048
+# Maximum size of a command body in bytes
+MAX_BODY_SIZE = 512
+# Maximum number of simultaneously connected stream clients
+MAX_SUBSCRIBERS = 4
+# Events buffered per stream client, a client falling further behind is disconnected
+MAX_BUFFERED_EVENTS = 8
+# Seconds a stream client may take to accept one batch of events
+STREAM_WRITE_TIMEOUT = 5
+# Seconds between keep alive comments on an idle stream
+STREAM_KEEPALIVE = 15
+
+STATUS_LINES = {
+    200: b"HTTP/1.1 200 OK\r\n",
+    304: b"HTTP/1.1 304 Not Modified\r\n",
+    400: b"HTTP/1.1 400 Bad Request\r\n",
+    401: b"HTTP/1.1 401 Unauthorized\r\n",
+    404: b"HTTP/1.1 404 Not Found\r\n",
+    405: b"HTTP/1.1 405 Method Not Allowed\r\n",
+    503: b"HTTP/1.1 503 Service Unavailable\r\n",
+}
+STREAM_HEAD = (b"HTTP/1.1 200 OK\r\nContent-Type: text/event-stream\r\n"
+               b"Cache-Control: no-cache\r\nConnection: keep-alive\r\n\r\n")
+
+
+class Snapshot:
+    """Preserialised JSON documents of the latest reading."""
+    def __init__(self):
+        self.version = 0
+        # the version restarts with every boot, the ETag also carries random bits of this boot
+        self._boot = "%08x" % random.getrandbits(32)
+        self.etag = f'"{self._boot}-0"'.encode()
+        self.documents = {"/api/current": b"{}", "/api/health": b"{}"}
+
+    def update(self, data_dict: dict, health: dict) -> None:
+        """Serialises a new reading, called once per sample."""
+        self.version += 1
+        self.etag = f'"{self._boot}-{self.version}"'.encode()
+        documents = {
+            "/api/current": json.dumps(data_dict).encode(),
+            "/api/health": json.dumps(health).encode(),
+        }
+        for zone in ZONES:
+            documents[f"/api/zones/{zone}"] = json.dumps({
+                "zone": zone,
+                "soil_humidity": data_dict.get(f"soil_humidity_{zone}"),
+                "emg_stop_pump": data_dict.get(f"emg_stop_pump{zone}"),
+            }).encode()
+        # swap in one step, so requests never see a half-updated snapshot
+        self.documents = documents
+
+
+async def read_request_head(reader) -> tuple:
+    """
+    Reads request line and headers of an HTTP request.
+
+    Returns
+    -------
+    tuple
+        Method, path and a dict of lowercase header names to values.
+
+    Raises
+    ------
+    ValueError
+        If the request head is malformed or exceeds MAX_HEADER_SIZE.
+    """
+    request_line = await reader.readline()
+    size = len(request_line)
+    parts = request_line.split()
+    if len(parts) != 3:
+        raise ValueError("Malformed request line")
+    headers = {}
+    while True:
+        line = await reader.readline()
+        size += len(line)
+        if size > MAX_HEADER_SIZE:
+            raise ValueError("Request head too large")
+        if not line or line == b"\r\n":
+            break
+        name, _, value = line.partition(b":")
+        headers[name.strip().lower().decode()] = value.strip().decode()
+    return parts[0].decode(), parts[1].decode(), headers
+
+
+class StreamSubscriber:
+    """Bounded send buffer of one event stream client."""
+    def __init__(self):
+        self.buffer = []
+        self.overflow = False
+        self.ready = asyncio.Event()
+
+    def __call__(self, kind: str, data: dict, ticks: int) -> None:
+        if len(self.buffer) >= MAX_BUFFERED_EVENTS:
+            # slow consumer, the writer task closes the connection
+            self.overflow = True
+        else:
+            self.buffer.append((f"event: {kind}\ndata: {json.dumps(data)}\n\n".encode(), ticks))
+        self.ready.set()
+
+
+class LocalApi:
+    """
+    Serves the snapshot on the station interface.
+
+    Parameters
+    ----------
+    snapshot : Snapshot
+        Snapshot which is updated by the measuring loop.
+    events : EventBus, optional
+        Source of the event stream, without it /api/stream answers 404.
+    commands : CommandHandler, optional
+        Executes posted commands, without it /api/commands answers 405.
+    port : int, optional
+        TCP port of the server (Default: 80).
+    api_key : str, optional
+        Value of the 'apiKey' header a command must carry, commands are refused without it.
+    """
+    def __init__(self, snapshot: Snapshot, events=None, commands=None, port: int = 80, api_key: str = None):
+        self.snapshot = snapshot
+        self.events = events
+        self.commands = commands
+        self.api_key = api_key
+        self.port = port
+        self.requests = 0
+        self.subscribers = 0
+        self.stream_stats = {"dropped": 0, "max_latency_ms": 0}
+
+    async def start(self) -> None:
+        await asyncio.start_server(self._handle, "0.0.0.0", self.port)
+        print(f"Lokale API gestartet auf Port {self.port}")
+
+    async def _respond(self, writer, status: int, body: bytes = b"", etag: bytes = None) -> None:
+        head = STATUS_LINES[status] + b"Content-Type: application/json\r\nCache-Control: no-cache\r\n"
+        if etag:
+            head += b"ETag: " + etag + b"\r\n"
+        head += b"Content-Length: " + str(len(body)).encode() + b"\r\nConnection: close\r\n\r\n"
+        writer.write(head)
+        if body:
+            writer.write(body)
+        await writer.drain()
+
+    async def _handle(self, reader, writer) -> None:
+        try:
+            method, path, headers = await asyncio.wait_for(read_request_head(reader), REQUEST_TIMEOUT)
+            self.requests += 1
+            if method == "POST" and path == "/api/commands" and self.commands:
+                await self._command(reader, writer, headers)
+                return
+            if method != "GET":
+                await self._respond(writer, 405)
+                return
+            if path == "/api/stream" and self.events:
+                await self._stream(writer)
+                return
+            # read both from the same snapshot, an update might happen while we are writing
+            documents = self.snapshot.documents
+            etag = self.snapshot.etag
+            body = documents.get(path.split("?")[0])
+            if body is None:
+                await self._respond(writer, 404)
+            elif headers.get("if-none-match") == etag.decode():
+                await self._respond(writer, 304, etag=etag)
+            else:
+                await self._respond(writer, 200, body, etag)
+        except (OSError, ValueError, asyncio.TimeoutError):
+            pass
+        finally:
+            writer.close()
+            await writer.wait_closed()
+
+    async def _command(self, reader, writer, headers: dict) -> None:
+        # the actuators are only worked by clients knowing the key of the board
+        if not self.api_key or headers.get("apikey") != self.api_key:
+            await self._respond(writer, 401)
+            return
+        try:
+            length = int(headers.get("content-length", 0))
+        except ValueError:
+            length = 0
+        if not 0 < length <= MAX_BODY_SIZE:
+            await self._respond(writer, 400)
+            return
+        body = await asyncio.wait_for(reader.readexactly(length), REQUEST_TIMEOUT)
+        try:
+            result = self.commands.execute(json.loads(body))
+        except (ValueError, AttributeError):
+            await self._respond(writer, 400)
+            return
+        status = 200 if result["status"] == "accepted" else 400
+        await self._respond(writer, status, json.dumps(result).encode())
+
+    async def _stream(self, writer) -> None:
+        """Pushes events to one client until it disconnects or falls behind."""
+        if self.subscribers >= MAX_SUBSCRIBERS:
+            await self._respond(writer, 503)
+            return
+        subscriber = StreamSubscriber()
+        self.subscribers += 1
+        self.events.subscribe(subscriber)
+        try:
+            writer.write(STREAM_HEAD)
+            await writer.drain()
+            while True:
+                try:
+                    await asyncio.wait_for(subscriber.ready.wait(), STREAM_KEEPALIVE)
+                except asyncio.TimeoutError:
+                    writer.write(b": keepalive\n\n")
+                subscriber.ready.clear()
+                if subscriber.overflow:
+                    self.stream_stats["dropped"] += 1
+                    return
+                pending, subscriber.buffer = subscriber.buffer, []
+                for message, _ in pending:
+                    writer.write(message)
+                await asyncio.wait_for(writer.drain(), STREAM_WRITE_TIMEOUT)
+                now = time.ticks_ms()
+                for _, ticks in pending:
+                    latency = time.ticks_diff(now, ticks)
+                    if latency > self.stream_stats["max_latency_ms"]:
+                        self.stream_stats["max_latency_ms"] = latency
+        except asyncio.TimeoutError:
+            self.stream_stats["dropped"] += 1
+        finally:
+            self.events.unsubscribe(subscriber)
+            self.subscribers -= 1
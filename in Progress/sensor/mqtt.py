@@ -0,0 +1,255 @@
+"""Minimal asynchronous MQTT 3.1.1 client.
+
+The client keeps one long-lived connection to the broker and publishes with QoS 1.
+Unacknowledged messages are tracked per packet id and sent again with the DUP flag after
+a timeout or a reconnect, a last-will message lets the broker announce an offline board.
+"""
+
+import uasyncio as asyncio
+import utime as time
+
+from sensor import resolver
+
+# Seconds until an unacknowledged QoS 1 message is sent again
+RETRY_TIMEOUT = 10
+# Maximum number of messages waiting for PUBACK
+MAX_INFLIGHT = 8
+# Return codes of CONNACK
+CONNACK_ERRORS = {1: "protocol version", 2: "client id", 3: "server unavailable",
+                  4: "user or password", 5: "not authorized"}
+
+CONNECT = 0x10
+CONNACK = 0x20
+PUBLISH = 0x30
+PUBACK = 0x40
+PINGREQ = 0xC0
+PINGRESP = 0xD0
+DISCONNECT = 0xE0
+
+
+def _encode_length(length: int) -> bytes:
+    encoded = bytearray()
+    while True:
+        byte = length & 0x7F
+        length >>= 7
+        encoded.append(byte | 0x80 if length else byte)
+        if not length:
+            return bytes(encoded)
+
+
+def _encode_string(value) -> bytes:
+    if isinstance(value, str):
+        value = value.encode()
+    return len(value).to_bytes(2, "big") + value
+
+
+def _packet(header: int, body: bytes) -> bytes:
+    return bytes((header,)) + _encode_length(len(body)) + body
+
+
+class MQTTClient:
+    """
+    Publishing MQTT client running inside the uasyncio event loop.
+
+    Parameters
+    ----------
+    client_id : str
+        Client identifier presented to the broker.
+    host : str
+        Hostname or IPv4 address of the broker.
+    port : int, optional
+        TCP port of the broker (Default: 1883).
+    user, password : str, optional
+        Credentials, empty strings disable authentification.
+    keepalive : int, optional
+        Keep alive interval in seconds (Default: 60).
+    will : tuple, optional
+        Last will as (topic, message, retain), published by the broker if the board vanishes.
+    """
+    def __init__(self, client_id: str, host: str, port: int = 1883, user: str = "",
+                 password: str = "", keepalive: int = 60, will: tuple = None):
+        self.client_id = client_id
+        self.host = host
+        self.port = port
+        self.user = user
+        self.password = password
+        self.keepalive = keepalive
+        self.will = will
+        self.connected = False
+        self.stats = {"published": 0, "acked": 0, "retries": 0, "ack_ms": 0}
+        self._reader = None
+        self._writer = None
+        self._next_pid = 0
+        # packet id -> [packet, ticks of last send, ticks of first send]
+        self._inflight = {}
+        self._slot_free = asyncio.Event()
+        self._lock = asyncio.Lock()
+        self._tasks = []
+        # False from a PINGREQ until its PINGRESP arrives
+        self._pong = True
+
+    def _connect_packet(self) -> bytes:
+        flags = 0x02  # clean session
+        payload = _encode_string(self.client_id)
+        if self.will:
+            topic, message, retain = self.will
+            flags |= 0x04 | 0x08 | (0x20 if retain else 0)  # will flag, will QoS 1, will retain
+            payload += _encode_string(topic) + _encode_string(message)
+        if self.user:
+            flags |= 0x80
+            payload += _encode_string(self.user)
+            if self.password:
+                flags |= 0x40
+                payload += _encode_string(self.password)
+        body = _encode_string("MQTT") + bytes((4, flags)) + self.keepalive.to_bytes(2, "big")
+        return _packet(CONNECT, body + payload)
+
+    async def _read_packet(self) -> tuple:
+        header = (await self._reader.readexactly(1))[0]
+        length = 0
+        shift = 0
+        while True:
+            byte = (await self._reader.readexactly(1))[0]
+            length |= (byte & 0x7F) << shift
+            shift += 7
+            if not byte & 0x80:
+                break
+        body = await self._reader.readexactly(length) if length else b""
+        return header, body
+
+    async def connect(self, timeout: int = 10) -> None:
+        """Opens the connection, waits for CONNACK and sends all unacknowledged messages again."""
+        self._reader, self._writer = await asyncio.wait_for(
+            asyncio.open_connection(await resolver.resolve(self.host), self.port), timeout)
+        try:
+            self._writer.write(self._connect_packet())
+            await self._writer.drain()
+            # CONNACK is always 4 bytes: type, remaining length 2, flags, return code
+            connack = await asyncio.wait_for(self._reader.readexactly(4), timeout)
+        except (OSError, EOFError, asyncio.TimeoutError) as e:
+            self._writer.close()
+            raise OSError(f"MQTT connection failed ({e!r})")
+        if connack[0] != CONNACK or connack[1] != 2:
+            self._writer.close()
+            raise OSError("MQTT broker did not answer with CONNACK")
+        if connack[3]:
+            self._writer.close()
+            raise OSError(f"MQTT connection refused: {CONNACK_ERRORS.get(connack[3], connack[3])}")
+        self.connected = True
+        self._pong = True
+        for pid in self._inflight:
+            await self._send_inflight(pid, dup=True)
+        self._tasks = [asyncio.create_task(self._read_loop()),
+                       asyncio.create_task(self._keepalive_loop())]
+        print(f"MQTT verbunden mit {self.host}:{self.port}")
+
+    async def _send(self, data: bytes) -> None:
+        async with self._lock:
+            self._writer.write(data)
+            await self._writer.drain()
+
+    async def _send_inflight(self, pid: int, dup: bool = False) -> None:
+        entry = self._inflight[pid]
+        packet = entry[0]
+        if dup:
+            packet = bytes((packet[0] | 0x08,)) + packet[1:]
+            self.stats["retries"] += 1
+        await self._send(packet)
+        entry[1] = time.ticks_ms()
+
+    def _connection_lost(self, expected: bool = False) -> None:
+        if self.connected and not expected:
+            print("MQTT Verbindung verloren")
+        self.connected = False
+        for task in self._tasks:
+            if task is not asyncio.current_task():
+                task.cancel()
+        self._tasks = []
+        try:
+            self._writer.close()
+        except Exception:
+            pass
+
+    async def _read_loop(self) -> None:
+        try:
+            while True:
+                header, body = await self._read_packet()
+                if header & 0xF0 == PUBACK:
+                    entry = self._inflight.pop(int.from_bytes(body[:2], "big"), None)
+                    if entry:
+                        self.stats["acked"] += 1
+                        self.stats["ack_ms"] += time.ticks_diff(time.ticks_ms(), entry[2])
+                        self._slot_free.set()
+                elif header & 0xF0 == PINGRESP:
+                    self._pong = True
+        except (OSError, EOFError):
+            pass
+        self._connection_lost()
+
+    async def _keepalive_loop(self) -> None:
+        try:
+            while True:
+                await asyncio.sleep(min(self.keepalive // 2, RETRY_TIMEOUT))
+                now = time.ticks_ms()
+                for pid in list(self._inflight):
+                    if pid in self._inflight and time.ticks_diff(now, self._inflight[pid][1]) > RETRY_TIMEOUT * 1000:
+                        await self._send_inflight(pid, dup=True)
+                if not self._pong:
+                    # no PINGRESP within one interval, the broker or the path to it is gone
+                    print("MQTT-Broker antwortet nicht auf PINGREQ")
+                    self._connection_lost()
+                    return
+                self._pong = False
+                await self._send(bytes((PINGREQ, 0)))
+        except OSError:
+            self._connection_lost()
+
+    async def publish(self, topic: str, payload, retain: bool = False, qos: int = 1) -> None:
+        """
+        Publishes payload on topic.
+
+        Parameters
+        ----------
+        topic : str
+            Topic the message is published to.
+        payload : str or bytes
+            Message content.
+        retain : bool, optional
+            Whether the broker keeps the message as last state of the topic (Default: False).
+        qos : int, optional
+            0 or 1 (Default: 1). With QoS 1 the call waits for a free in-flight slot.
+        """
+        if isinstance(payload, str):
+            payload = payload.encode()
+        if not self.connected:
+            await self.connect()
+        header = PUBLISH | (qos << 1) | (1 if retain else 0)
+        if qos == 0:
+            await self._send(_packet(header, _encode_string(topic) + payload))
+            self.stats["published"] += 1
+            return
+        while len(self._inflight) >= MAX_INFLIGHT:
+            if not self.connected:
+                await self.connect()
+            self._slot_free.clear()
+            try:
+                await asyncio.wait_for(self._slot_free.wait(), RETRY_TIMEOUT)
+            except asyncio.TimeoutError:
+                pass
+        self._next_pid = self._next_pid % 0xFFFF + 1
+        pid = self._next_pid
+        packet = _packet(header, _encode_string(topic) + pid.to_bytes(2, "big") + payload)
+        now = time.ticks_ms()
+        self._inflight[pid] = [packet, now, now]
+        self.stats["published"] += 1
+        try:
+            await self._send_inflight(pid)
+        except OSError:
+            # message stays in flight and is sent again after reconnecting
+            self._connection_lost()
+
+    async def disconnect(self) -> None:
+        """Closes the connection gracefully, the last will is not published."""
+        if self.connected:
+            await self._send(bytes((DISCONNECT, 0)))
+        self._connection_lost(expected=True)
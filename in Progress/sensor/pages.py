@@ -0,0 +1,202 @@
+"""Sending of the pre-rendered portal pages.
+
+The static parts of a page come minified and compressed from sensor.portal_assets, built
+by tools/build_portal.py. The values of the slots are inserted between them as stored
+deflate blocks, so a page goes out as one gzip stream that is never assembled in RAM.
+Clients without gzip support get the parts decompressed piece by piece, read straight from
+the flash. The length of the response is not computed in advance, pages are sent with
+chunked framing. Firmware without binascii.crc32 computes the CRC of the slot values in
+Python; without the deflate module everything is sent compressed.
+
+Static assets, the stylesheets and the background image, are complete gzip files sent with
+Content-Length. Their names change with their content, so they are cached by the browser
+for good and revalidated with their ETag at most.
+"""
+
+import binascii
+import io
+import struct
+
+try:
+    import deflate
+except ImportError:
+    # firmware without deflate module, pages can only be sent compressed
+    deflate = None
+
+from sensor.portal_assets import WBITS
+from sensor.response import HTML_HEAD, HTML_GZIP_HEAD, GZIP_ENCODING, CHUNKED_END
+
+GZIP_HEADER = b"\x1f\x8b\x08\x00\x00\x00\x00\x00\x02\xff"
+# Empty stored block with the final bit, ends a part for decompression on the board
+FINAL_BLOCK = b"\x01\x00\x00\xff\xff"
+# Largest payload of a stored deflate block
+MAX_STORED = 0xFFFF
+
+
+
+def _crc32_python(data, crc: int = 0) -> int:
+    """binascii.crc32 for firmware built without it, bit by bit. It only runs over the slot
+    values, the CRCs of the static parts are precomputed."""
+    crc ^= 0xFFFFFFFF
+    for byte in data:
+        crc ^= byte
+        for _ in range(8):
+            crc = (crc >> 1) ^ (0xEDB88320 if crc & 1 else 0)
+    return crc ^ 0xFFFFFFFF
+
+
+_crc32 = getattr(binascii, "crc32", None) or _crc32_python
+
+
+class _PieceReader(io.IOBase):
+    """Stream reading the given buffers one after the other. Unlike io.BytesIO it does not
+    copy them, so a part in flash is decompressed without being loaded into RAM."""
+    def __init__(self, *pieces):
+        self._pieces = pieces
+        self._index = 0
+        self._offset = 0
+
+    def readinto(self, buffer) -> int:
+        while self._index < len(self._pieces):
+            piece = self._pieces[self._index]
+            count = min(len(buffer), len(piece) - self._offset)
+            if count > 0:
+                buffer[:count] = memoryview(piece)[self._offset:self._offset + count]
+                self._offset += count
+                return count
+            self._index += 1
+            self._offset = 0
+        return 0
+
+
+def _continue_crc(part: tuple, crc: int) -> int:
+    """CRC-32 after the static part, given the CRC-32 of everything before it."""
+    result = part[2]
+    columns = part[3]
+    bit = 0
+    while crc:
+        if crc & 1:
+            result ^= columns[bit]
+        crc >>= 1
+        bit += 1
+    return result
+
+
+async def _write_block(response, block: list, length: int) -> None:
+    block.insert(0, struct.pack("<BHH", 0, length, length ^ 0xFFFF))
+    await response.write_pieces(block)
+
+
+async def _write_stored(response, pieces: list, crc: int) -> tuple:
+    """Writes the pieces of a slot as few stored blocks as possible, each block as one chunk
+    of the response. Returns the CRC-32 continued over the pieces and their length."""
+    block = []
+    length = 0
+    size = 0
+    for piece in pieces:
+        start = 0
+        while start < len(piece):
+            # only a piece crossing a block boundary is sliced, a memoryview per piece
+            # would cost more heap than the small pieces of a slot themselves
+            if not start and len(piece) <= MAX_STORED - length:
+                data = piece
+            else:
+                data = memoryview(piece)[start:start + MAX_STORED - length]
+            block.append(data)
+            crc = _crc32(data, crc)
+            start += len(data)
+            length += len(data)
+            if length == MAX_STORED:
+                await _write_block(response, block, length)
+                size += length
+                block = []
+                length = 0
+    if length:
+        await _write_block(response, block, length)
+    return crc, size + length
+
+
+async def _send_gzip(response, parts: tuple, values: list) -> None:
+    await response.start(200, HTML_GZIP_HEAD)
+    await response.write(GZIP_HEADER)
+    crc = 0
+    size = 0
+    for i, part in enumerate(parts):
+        await response.write(part[0])
+        crc = _continue_crc(part, crc)
+        size += part[1]
+        if i < len(values):
+            crc, length = await _write_stored(response, values[i], crc)
+            size += length
+    await response.write(struct.pack("<II", crc, size & 0xFFFFFFFF))
+
+
+async def _send_plain(response, parts: tuple, values: list) -> None:
+    await response.start(200, HTML_HEAD)
+    buffer = response.buffer
+    for i, part in enumerate(parts):
+        stream = deflate.DeflateIO(_PieceReader(part[0], FINAL_BLOCK), deflate.RAW, WBITS)
+        while True:
+            count = stream.readinto(buffer)
+            if not count:
+                break
+            await response.write(memoryview(buffer)[:count])
+        if i < len(values):
+            await response.write_pieces(values[i])
+
+
+async def send(response, page: tuple, values: dict, gzip: bool = True) -> None:
+    """
+    Sends a pre-rendered page as complete response.
+
+    Parameters
+    ----------
+    response : ResponseWriter
+        Response of the client, the page is sent with chunked framing.
+    page : tuple
+        Page from sensor.portal_assets.
+    values : dict
+        Values of all slots of the page as bytes or as list of pieces, e.g. from
+        Template.pieces, already HTML escaped.
+    gzip : bool, optional
+        Whether the client accepts 'Content-Encoding: gzip' (Default: True).
+    """
+    parts, slots = page
+    values = [values[name] if isinstance(values[name], list) else [values[name]] for name in slots]
+    if gzip or deflate is None:
+        await _send_gzip(response, parts, values)
+    else:
+        await _send_plain(response, parts, values)
+    await response.end()
+
+
+async def send_asset(response, asset: tuple, gzip: bool = True, if_none_match: str = "") -> None:
+    """
+    Sends a static asset as complete response.
+
+    Parameters
+    ----------
+    response : ResponseWriter
+        Response of the client.
+    asset : tuple
+        Asset from sensor.portal_assets.ASSETS.
+    gzip : bool, optional
+        Whether the client accepts 'Content-Encoding: gzip' (Default: True).
+    if_none_match : str, optional
+        'If-None-Match' header of the request, answered with 304 if it holds the ETag.
+    """
+    etag, head, data = asset
+    if etag in if_none_match:
+        await response.start(304, head + b"\r\n")
+    elif gzip or deflate is None:
+        return await response.send(200, head + GZIP_ENCODING, data)
+    else:
+        await response.start(200, head + CHUNKED_END)
+        buffer = response.buffer
+        stream = deflate.DeflateIO(_PieceReader(data), deflate.GZIP, WBITS)
+        while True:
+            count = stream.readinto(buffer)
+            if not count:
+                break
+            await response.write(memoryview(buffer)[:count])
+    await response.end()
@@ -0,0 +1,57 @@
+"""Pre-rendered pages of the provisioning portal.
+
+Generated by tools/build_portal.py from tools/portal/, do not edit.
+Every page is (parts, slots), the static parts are (raw deflate data,
+uncompressed size, CRC-32, CRC columns), a slot lies between two parts.
+ASSETS maps the paths of static assets to (ETag, head, gzip data).
+"""
+
+WBITS = 10
+
+INDEX = (
+    (
+        (b'\xacR]O\xdb0\x14}\xcf\xaf\xf0\xfc\x94j4i\x91@Si:m\x03\xa4Ih\xa0Q&\xed\xd1un\x1a\x83cG\xf6\rY\x87\xf8\xef\xbb7\xa5\x1b\x8c1i\xd2\x9e\xae}|\xcf\xfd8>\xf3W\xc7\xe7\x1f\x96_/ND\x8d\x8d]$\xf3]\x00URh\x00\x95\xd0\xb5\n\x11\xb0\x90W\xcb\xd3\xf1\x1bIp\xd4\xc1\xb4\xb8H\xaa\xcei4\xde\x89X\xfb\xfe\xcc\xab\x12B\n\xb7\xe0p$\xee\x92\xe1\x90\xb5a\x88\xc7P\xa9\xceb::JnU\x10\x95\x0f\x8d(D\xe9u\xd7p\xd6\x1a\xf0\xc4\x02\x1f\xdfo>\x96\xa9\xecMe\xc6\x9c$\x89\xf0b\x96qm\x87c\xed\x1d*\xe3 \xc8Q\x16qc!+Ml\xad\xdaP\x03\xe9\xbc\x03\xf9\x97\x12v\x18\xfaO\xccu0%1+@]\xa72\xa7.\x0e4\xca=qG\xa2\xd4\xbe\x9c\tyq~\xb9$`\xe5\xcb\xcdL8\xe8\xc5\xd5\xe7\xb3KPA\xd7\x17*\xa8&\xa6\x8c\x9d\xd2\x16\xc7\nU\xca\xeb\x8cF{\tK\x0b!\xce\xc4\x9d|\xa75\xb4(\xa9\x94j[k\xb4b1\xf3\xeb\xe8\x9d\xbc\xbf\x1f%\x19\xd6\xe0\xd2\x9d\xc8i\x80\xd8z\x17\x81\xc4\x15\x01\xb0\x0bN\xec\xa0\x8c9$\xaex\xce\xba\xf6+&\xb4\xde\xdaKT\xd8EF2F\xb7\xd9\xd4\x94\x16\xfc\x99\xce\xb9<i\x16\xbbUcp[\xf3(\xb9\xff\xf5\xd7O+\xf1O\xef4\x8a\x03\xfa\x96\xd0B\x8a\xd7\x82_\xff\xcf\x0e\xdb\xc2\xdc\xcaT\xe2\xe1\x96q\x00Q\xd0W\x85\xce9\xe3\xd6\x92\x13\xc8\xa8K\xd3\x80\xef\xf0\xe9N\xbfMM]\xf6\xc4\xc1d\xc2\xab\t\xb0\x11\x88\xda\x1bW\xfa>\xb3~\xfb\x0fY\x1d\xa0b\'\xe44!y\xf7\xf1^,\xc8\x0b\xe2\xfd\xcb\x00\xd3\tO\xf0 \xf0<\x8f:\x98\x16\x17\xc9\xdc\x1awC\xba\xd8B\x0e\xb6\x8c5\x00J\xc1\xf3\x14[\x95\x8d\xceiX\xf86>\xdc\x9f\xee\x1f(8\xcct\x8c\x92\x989\xbb\x8b"{\x92Bin\x85\xb6*\xc6B\x1a\xd7v8&\x1b\xa32\x8e,/L\xf9\x1c$J=]|\x81\xb0\xa2\xf2\x9d[\x8b\x9a\x9c\x8a`-8*=\xa5g\xf6\xc6@\xedMe\xc6|\x93\xa2\x01\xac=A\xad\x8f4\xa6\x1av\xa6A\xa9\xac\x03\x8d\\\xd4\xaa\x15X\xf6U!\x1d`\xef\xc3\x8d\\|\x02\xfc\xdeC\xb8\x99\xe7\xc3\xebb\xbe\n\x94\x19\xc1\x12g\xe8\xb0\xcb\x14N5\xf0\x88\x98\xfc\x00\x00\x00\xff\xff',
+         1205, 0x4fc0b1da,
+         (0xab5eca91, 0x8dcc9363, 0xc0e82087, 0x5aa1474f, 0xb5428e9e, 0xb1f41b7d, 0xb89930bb, 0xaa436737, 0x8ff7c82f, 0xc49e961f, 0x524c2a7f, 0xa49854fe, 0x9241afbd, 0xfff2593b, 0x2495b437, 0x492b686e, 0x9256d0dc, 0xffdca7f9, 0x24c849b3, 0x49909366, 0x932126cc, 0xfd334bd9, 0x211791f3, 0x422f23e6, 0x845e47cc, 0xd3cd89d9, 0x7cea15f3, 0xf9d42be6, 0x28d9518d, 0x51b2a31a, 0xa3654634, 0x9dbb8a29)),
+        (b'm\x8f9\x0e\xc30\x0c\x04{\xbf\x82P\x95T\xfa\x80\xac\x17\x04A\xaa\xf4:\x18H\xb0\x0eC\x87\r\xe7\xf5\xa1s\x00.\xd2pw\xc1!A\x0e\x82W\x0ch\x9a\x1c\x84\x02\x13T\xad#+\xf8(X\x1d\x03Gnd\xfc\x97\xe5\x15\xdbs\xc52!$\xecP\xbbq\x98\x04W4\x1b\x94\xc6\x00\x8f\\F6\xd3\x8e5\x17\xcb\xe4\xed\xe3\x9a\xe0\xef\xb6\x14\xba\x10\xea\xd3\xdc\x1b\xb4m\xc6\x03\x0b\xde\x1eSR\xf1\xd8\xfd3Y\xbb\x8e\xbe1XT\xe8\x14\xefX\xb4O\x16\x13\x83\x9cL\xf0f"\xc4\xe5\xf5\x92\x95\xc5r\xc2\x05S;3\xda\xc1\xe9\xc6\xb8\xab\xf5\x0b\t\xd5\xdf\xd7\xe1\x8d~.\xf9z\xbe\x83:\xdbmW\xd7b\x90/',
+         304, 0x8d3863bd,
+         (0x32b0733c, 0x6560e678, 0xcac1ccf0, 0x4ef29fa1, 0x9de53f42, 0xe0bb78c5, 0x1a07f7cb, 0x340fef96, 0x681fdf2c, 0xd03fbe58, 0x7b0e7af1, 0xf61cf5e2, 0x3748ed85, 0x6e91db0a, 0xdd23b614, 0x61366a69, 0xc26cd4d2, 0x5fa8afe5, 0xbf515fca, 0xa5d3b9d5, 0x90d675eb, 0xfadded97, 0x2ecadd6f, 0x5d95bade, 0xbb2b75bc, 0xad27ed39, 0x813edc33, 0xd90cbe27, 0x69687a0f, 0xd2d0f41e, 0x7ed0ee7d, 0xfda1dcfa)),
+    ),
+    ('networks',),
+)
+
+STATUS = (
+    (
+        (b'4\xcc1\x0b\xc20\x10\x05\xe0\xdd_\x11\xb3\xc7"\x14Th\\\xaa\xae:\xd4\xc1\xf1L\xaeM0M%w\x15\xfa\xefM\xc5N\x1f\xbc{\xef\xaa\xf5\xe9Z7\x8f\xdbY8\xee\xc3qU- \xd8L\x8f\x0c\xc28H\x84\xac\xe5\xbd\xb9\xa8\xbd\xccq\xf0\xf1%\x12\x06-\x89\xa7\x80\xe4\x10Y\n\x97\xb0\xd5\xb2 \x06\xf6\xe6\xc7H\nJh\xb7\xbbC\xb91D\xf3\xb4\xf8\x7f~\x0ev\xcaX\xff\x11&\x00\x91\x96>\xbeGVf\x88\x0c>b\x9a\xcb~\xb9u\x9d\xfa\x02\x00\x00\xff\xff',
+         170, 0x683bb1ba,
+         (0x78a212c8, 0xf1442590, 0x39f94d61, 0x73f29ac2, 0xe7e53584, 0x14bb6d49, 0x2976da92, 0x52edb524, 0xa5db6a48, 0x90c7d2d1, 0xfafea3e3, 0x2e8c4187, 0x5d18830e, 0xba31061c, 0xaf130a79, 0x855712b3, 0xd1df2327, 0x78cf400f, 0xf19e801e, 0x384c067d, 0x70980cfa, 0xe13019f4, 0x191135a9, 0x32226b52, 0x6444d6a4, 0xc889ad48, 0x4a625cd1, 0x94c4b9a2, 0xf2f87505, 0x3e81ec4b, 0x7d03d896, 0xfa07b12c)),
+        (b'R\xb2\xb3\xd1\xcf\xb4\xe3\xb2\xc90\xb4\x03\x00\x00\x00\xff\xff',
+         11, 0xbaf5c69f,
+         (0xc18edfc0, 0x586cb9c1, 0xb0d97382, 0xbac3e145, 0xaef6c4cb, 0x869c8fd7, 0xd64819ef, 0x77e1359f, 0xefc26b3e, 0x4f5d03d, 0x9eba07a, 0x13d740f4, 0x27ae81e8, 0x4f5d03d0, 0x9eba07a0, 0xe6050901, 0x177b1443, 0x2ef62886, 0x5dec510c, 0xbbd8a218, 0xacc04271, 0x82f182a3, 0xde920307, 0x6655004f, 0xccaa009e, 0x4225077d, 0x844a0efa, 0xd3e51bb5, 0x7cbb312b, 0xf9766256, 0x299dc2ed, 0x533b85da)),
+        (b'\xb2\xd1\xcf0\xb4\xe3\xb2)\xb0\x03\x00\x00\x00\xff\xff',
+         9, 0xcba61f32,
+         (0x177b1443, 0x2ef62886, 0x5dec510c, 0xbbd8a218, 0xacc04271, 0x82f182a3, 0xde920307, 0x6655004f, 0xccaa009e, 0x4225077d, 0x844a0efa, 0xd3e51bb5, 0x7cbb312b, 0xf9766256, 0x299dc2ed, 0x533b85da, 0xa6770bb4, 0x979f1129, 0xf44f2413, 0x33ef4e67, 0x67de9cce, 0xcfbd399c, 0x440b7579, 0x8816eaf2, 0xcb5cd3a5, 0x4dc8a10b, 0x9b914216, 0xec53826d, 0x3d6029b, 0x7ac0536, 0xf580a6c, 0x1eb014d8)),
+        (b'\xb2\xd1/\xb0\xe3\x02\x00\x00\x00\xff\xff',
+         5, 0xaf4387c1,
+         (0x3d6029b0, 0x7ac05360, 0xf580a6c0, 0x30704bc1, 0x60e09782, 0xc1c12f04, 0x58f35849, 0xb1e6b092, 0xb8bc6765, 0xaa09c88b, 0x8f629757, 0xc5b428ef, 0x5019579f, 0xa032af3e, 0x9b14583d, 0xed59b63b, 0x1c26a37, 0x384d46e, 0x709a8dc, 0xe1351b8, 0x1c26a370, 0x384d46e0, 0x709a8dc0, 0xe1351b80, 0x191b3141, 0x32366282, 0x646cc504, 0xc8d98a08, 0x4ac21251, 0x958424a2, 0xf0794f05, 0x3b83984b)),
+        (b'\xe3\xb2\xd1O\xc9,\xb3\xe3\xb2)N.\xca,(\xb1\xe3J+\xcdK.\xc9\xcc\xcfS(JM\xc9,JM.\t\xc9\x0f\xca\xcf/\xd1\xd0T\xa8\xe6*\xcf\xccK\xc9/\xd7\xcb\xc9ON\x04)\xd1\xcb(JMS\xb0UP\xd2W\xb2\xe6\xaa\xe5\xb2\xd1\x87\x99a\xa3\x9f\x94\x9fR\t\xa23Jrs\xec\x00',
+         100, 0x2b1ba21b,
+         (0x759fc69d, 0xeb3f8d3a, 0xd0e1c35, 0x1a1c386a, 0x343870d4, 0x6870e1a8, 0xd0e1c350, 0x7ab280e1, 0xf56501c2, 0x31bb05c5, 0x63760b8a, 0xc6ec1714, 0x56a92869, 0xad5250d2, 0x81d5a7e5, 0xd8da498b, 0x6ac59557, 0xd58b2aae, 0x7067531d, 0xe0cea63a, 0x1aec4a35, 0x35d8946a, 0x6bb128d4, 0xd76251a8, 0x75b5a511, 0xeb6b4a22, 0xda79205, 0x1b4f240a, 0x369e4814, 0x6d3c9028, 0xda792050, 0x6f8346e1)),
+    ),
+    ('icon', 'title', 'message', 'button'),
+)
+
+ASSETS = {
+    '/static/background-72641d6d.svg': (
+        '"72641d6d"',
+        b'Content-Type: image/svg+xml\r\nCache-Control: public, max-age=31536000, immutable\r\nETag: "72641d6d"\r\nConnection: close\r\n',
+        b'\x1f\x8b\x08\x00\x00\x00\x00\x00\x02\x03}R\xdb\x8e\x1b7\x0c\xfd\x15\x01\x01:\t \xd3")Jbj\x1bh\xfd\x9c\x97\xe6\x0b6\xf1\xc4v\xb2\xbb\xde\xda\x93\xf5\xf6\xef{dw/\x0fA\x07\xb0gD\xf1rx\xceY\x9c\x1e\xb7\xe1\xe9\xee\xf6\xfe\xb4\x1cv\xd3\xf4\xf0q>?\x9f\xcftV:\x1c\xb7sI)\xcd\x911\x84\xc7\xf1x\xda\x1f\xee\x97\x03\x13\x0f\xd7\x82\x8fO\xb7\xfb\xfb\x1f\xbf*cw\x9f_n\x9fS\xd1\xe3\xfb\xeb\x84\xcb\x896\xe3\xe3\xf5k\x08\xe7\xfdf\xda\xa1\xb7K\x1a\xc2n\xdcow\x13N\xa9\xe1\xf4p\x1cO\xe3\xf1q\xfc\xe3\xf40~\x9d\xfe\xba\x99\xf6\x87\xe5p\x7f\xb8\x1f\x81i?\x9e\xff<<-\x87\x14R\xe8\xb5\xe1R\xb2Zl\xc3\xdd\xcd\t\xc8~\x1eo\xdf\xff\xf6\xf7\xcf\xc3\xf4\xfb\xbb\xcf}\xd0\'D9%\xbe\xc6>\x0c\xe1\xdb\xfe\xf6\xf6\xbfn\xab\xc5\x11\xfd\xff\x0fI\x1f4\x84\x7f.\xff\xd7\xc2\xe3\xf6\xcb\xcd{\xb1\x18$q\xc4\xf0\x84\xbf\x0f\xe84\xef\xadV\x8b\x87\x9bi\x176\xcb\xe1S\x8a\xa5\x16\x12\xf35\xab\x90Y,\xae\xa4\xceQj\xa3V[,-\x916\x8b\xf8\x91\x94\x1c\xcd\x9dr\xd3unN%\xe3,\x898\x15\xbc\x95Z\x11\xe4%\xf2\x1a\xcd\x8c\nK\x14S\xaa\xeakkJ\tm8+\xca<ZcR\xadQ\x13YnH\xcfTK\x8d\xb3\xeax\xeb\xda\xc4\xc9=\xc7\x197A\x9f\x1a1\x92\x9ar\x9c\t2\x80!\xe6\xe4\xc4\x180S\x94f\xafkt\x030\x8b\xb3,X\xc8K\x14m\xa4\t\x19\x19\x18T2fg\x12\xcc\x9eeg\xecR\xd6\x8aU\x8a\xc6\x99\xa9\x92\x01\xcc\xacd\xec\x82!\x85\x1d\xa5\r\xe3+`g\xdc\x18\xd6\xd5l\xeb\x99\x00PJ@f\x86HE7e\xa6T\x0b\xdar\xa5\n\xeaf\xeaX\xbe\xe7h\x16Dt\x8d\x89\x8dP\t\xf8\xc6TPTZ\x06\x1f\x98 j\xe4\x19E\x15D\x1a\xa3\r\'\xa0q\x8c\xaaV(\x19\xa40\xb2\xde\xad\x00fJz\xe1\x10\xb3\x00\xa1$\xca\x08\x08\xc8v\xa9}L\x01m\xb1S\x02\xa3wD\xa0S%fp\xa3\x10w\xa6\xe0\x06\x95\x96*\x16fl\xd3\xb9\x12\xa8!\xe0\xb0\xef\x0b\x15=y,\xe8,P\xf7\xc5\x1e\xcf\xbez\xc7\xea_\xf2\xa6;\xa9{\xe8\x8d\x93\xae.\xf7l\xd4l-\t\xf6\xf1,\x08\x00\x02\x17\t\xc2]\x1f\x0e\\\xb9\x00K\x10\xa9\x99\xach\xe0\xa2L\x95\x83d6\xaa9\xb0A&k5H\x81\tXQ\xd2\xe1\x01G\x90\n\xb8\xaa\x1e\xa0$\xf8\xcc\x1a\xc0)x\xf4\x16\x90\xd7\x95\xf2kD\xac\x06fDr\xcf\xa9X\xc658\x04K\xde\xcf)Q\x93\x12\x1a\xc3\xf1\xde\xfc\xe5\tP\xa7Q\xe2P+L\x8f#\xc8\x05\xc1\x12Ja \t\xa28k\xa9\xc1\n\xa0\x96\x8c%\xe0\x18\xd7\x1c\xba\xe2\x90\xabo\t}M\x82b\x187N/\x0f\x16s\x98@\xab\x05\x15\xac\x93\xca\xeb\\\x80m\xe0\x8b\xb1}\xceP\xc6\xb0O\x85\xc8\xadX\xc8-\x11\xa3\xb8\x00\xb4\xe0\xc2\x18\x13+*2>\xe0jT\x80\x93\xf4\xda\xcc\xad\x93Q.\x93\x0c\x0er\xc0b\xc1^\x85\x0b\x16\x81\x11Z}\xb32\x0bP\xb9\xbcFZhpm\xc6\x0e\xb8\x02\xd0\xd6\x028\xa2\x96z\x9bVa,\xee\xdc:YG\xd1\xfd\x9c\xa5_AxH\xd7s\x98Z\xd7Qk\xbf\x92\x8e\xa6\x82T$\x1b>\xb8K\xae\x05\xf2\x81\xa270\n\x98l\r\xd9\xb9:\x18D\xa4\x82dnz]=\x81~\x90\xa4d\x10\xe1\xf9\xe9n\x82\xb6\x9a\xba\xcf*\xb0\x82\xaf\xb76|1\xad\xf2hu|5\xed|\xbbZl\xc6o\xa7\xd5\xe2\xee\xe6\xf4#\xec\xe1\xdf\xcf\x8f\xdb\xef\xa7O8A3F\xe6q\xfc:\x85\xf3~3\xed\x96C\xef9\x84\xdd\xb8\xdf\xee&\x9cRK\xcf\x9d\xcf\xbb\xfdt\xe9\xdb\xd3\xf1\xea\xed\xf0\xba\xf6\x9e\x9f\x1e\xb7\xab\x7f\x01m\x1ddr\xc6\x06\x00\x00'),
+    '/static/index-62125ae6.css': (
+        '"62125ae6"',
+        b'Content-Type: text/css\r\nCache-Control: public, max-age=31536000, immutable\r\nETag: "62125ae6"\r\nConnection: close\r\n',
+        b'\x1f\x8b\x08\x00\x00\x00\x00\x00\x02\x03}R\xdbj\xe30\x10\xfd\x15\x93Rh!N\xed\\\xdaD\xa2\xb0\xfb\xb6\xff\xb0\xec\xc3\xd8\x1a\xd9"\xb2d$9\x975\xfe\xf7\x95\x14\xa7\xeb\x90P\x0c\xc1\x99\x19\x9f\xdbL\xa1\xd9\xb9/\xa0\xdcWFw\x8a\xa5\xa2\x81\nIg\xe4\xcb\xec\xcd:p\xa2|\x9bt?\x96\xef\xeb\x9c\xbd\xb3\x85=T\xb3W:\xe9X\xf1\x17I\xa9\x0fh\xa6U\x83-\x82#J\x8fo\xb4FQ\xd5\x8e\xe4Yv\xa8\xe9Q0W\x87\xf7g\xca\xb5r)\x87F\xc83\xf9i\x04\xc8\xf9/\x94\x07\xf4\xf40\xb7\xa0lj\xd1\x08N\x87:\xef\xe3h\xa4[.6\x06\x1b\xea\xf0\xe4R\x90\xa2R\xa4D\xe5\xbc\x82\x06L%TZh\xe7tCVY{\xa2\x03\xd7\xa6\xe9\'\xa3\x12\xb9\xa3\x83\x84\x02\xe5=$\x13\xb6\x95p&\x85\xd4\xe5\xfe\n\xe7tK\xd6\x01\xeb\x16>]F|\xa1\xda\xce\xfdv\xe7\x16?g\x81f\xf6g>-\xb5`\xedQ\x1b\xe6\xcb\x16%\x96\xae\xbf\xb8\xdf\xedF\xf3\x91~u\xa1O\x8fX\xec\x85W\xda\xfa\xd0\x0c\xa8\x12}\x84\ni\xe1\x01\xd0\x90\xbc=%VK\xc1\x92\xa7\xb2,i\x0b\x8c\tU\x91l\xec\xa7\x06\x98\xe8,\xc97A\xd7"\xaaHK\xcf\x01B\xa1\x19y\xb7>\xf4\x8b\x0f\x92%\xd09=u\xb9\xf1\xcd+jt|\x0b\x1c\rO\xb6\\j\xa9\r9\xd6\xc2\xa1\xe73\xc8\r\xda\xba\xbf\xcd\xf0\xbf\xc7\xfc\xe2qB\x97\x07\xbc\x0b\xc8S\xbe\xda\x15kv\x1b\xa7\xed\x8aF\xf8@\xef\xf74\xb9\xa0\t^\\\xf8U\xffc\xb1O\xeb\x12\xf8&\xbb\xb2r\xce\xaf\xe1N\x82\xbe\t\xb2\xec\x8c\xf5\xa3\xad\x16\xf1\xc4\x86\x85\xd4\xe0g\xfaoC\x1c\xf5m\x82\x06\xb0\xad_\xbb\xc7tB\x93\xfc\xeb\xc4"\xdf\x15\x8d\x14\xe8\xef\x14\xe7\xd7\xbf\xc0=W\x1fv\xe7\x0f\x9b\xccf\xb42\x82\xa5`\x10H\xfe\x96\x8f\xf0\x1f\x0f\xd0\x0b}Jm\rL\x1f\xbd\xb2\xf0\xac\xfc\xcd\x04\x9b\x89P\x16\x1d\xe5Bzd\xc2\x8cn\xc7\xb9\x97\xad\x87I\xe2O\x16\'_)(\xd1\x04<E\xe46YZ\xff)\x17\xca/9\x81\xf0\xb1\x027\x11~Q\xfa\x15Fxb \x0f\x88\xd2o\x98R\x86!\x944\xb7t\xf8\xb1\xc737\xd0\xa0M\xe4\xb6\xcf\x9e\xe7y\xf6\xdc\xdfn&\x1bV\xbe\xbe\xbe\xab\xfb\xec\x93lx\xf7\xbd\x8fG\xbda\x17\xd1\xee\xe1\x92\xd0\x1c\xfe\x01\xe6Z\x12b\x14\x05\x00\x00'),
+    '/static/status-a4af1794.css': (
+        '"a4af1794"',
+        b'Content-Type: text/css\r\nCache-Control: public, max-age=31536000, immutable\r\nETag: "a4af1794"\r\nConnection: close\r\n',
+        b'\x1f\x8b\x08\x00\x00\x00\x00\x00\x02\x03\xadR_o\x9b0\x10\xff*Q\xaaJ\x89\x14\xa7@!\xeb\xec\xa7i/\xfb\x1a\x06\x1f`\xd5\xd8\xc864\x19\xcaw\xdf\x19HC\xd3v\xd2\xd4= \xcew\xe6~\xff\xc8\x8d8\r9/\x9e+k:-\x88lx\x05\xb4\xb3j\xb3~p\x9e{Y<,\xa6\xdf\x92C\x1a\x8b\x83\xd8\xbb\xbeZo\xd9b\xe2\xe4o\xa0\x85\xe9\xc1.\xbb\x16Z\xe0\x9ej3W\xac\x06Y\xd5\x9e\xc6Q\xd4\xd7\xecE\n_\x87\xfa\x9e\x95F{R\xf2F\xaa\x13\xfda%W\xbb_\xa0z@x\xbes\\;\xe2\xc0\xca\x92\x9d\xebx\x18\xaf\x8ep\xc9>\xb3\xd00\x0fGO\xb8\x92\x95\xa6\x05h\x8f\x0c\x1an+\xa9In\xbc7\r}\x8c\xda\xe3\xa5\xe5MK\xb3p>\xb7\x8bE\xf1?,:\xef\xa5n;O\n\xfc\x9aK\rv\x98d<\xa1\x8a\xe9:\x8dV\xbc\xf3\xe6-\xe4=k\xb9\x10RW4\r[\xe6\xc38\x8cC#7V\x80%\x96\x0b\xd99\x9a\x8c\xad\xab\x8f\x85Q\xc6\xd2\x97Zz`g9|\x8a\x93N\x0c\xab\x8a\x145\x14\xcfCn\x8eAa\x80\x9d\x01\xb0\xc3\xa6mwi\xc1\xcb,b\xadq\xd2K\xa3\xa9\x05\x85y\xf7\xc0\x84t\xad\xe2\'\x9a+S<3o\xd1\xff\xd2\xd8\x86\xba\x82+\xd8\xf4\xdcn\x08\xa9*\xb7{\xdan\xe7\x0c\x93\x04q\xe7l\xc7zB\xa3X\xae\x9cQR\xac\xc6--\xb7\xe8\xeb\x8dV\xcc\xbf=^9S\xcaK\xb4~\x08\xfe\xe2e\xba^\xdf\xf0\xf9X\xd3\xab\n\x9e#`\x87>)(=}D.\xc1\x18\x12c1q=\\\xa9.\x9d\x9f\x86\xd1*P\x0eOt\x198\x7fR@G\x15W/\x88\xb12D0\xfd\x19\xab\x80\xb50\xca\x1a\xcf=l\xd2L@\xb5\x9d\xa4)\xe3\xe0\xafqX\x10_\x88\xe2\xf0_\xa2H_\x93\x08t\xe7$v\x8bF\x0e\x88\x0e_\xcff\xa2\x1a/\xa2H\xde\xfc\xf0\xb4\xe8l\xe0\xf73X\xf3\x99\xb17\xe4\xb39\xea\'|\x8f\xd9\xc7\x1f\x88\x19\xde\xed"\x97\x94,\xf8\xcej\x92w\x98\xa8\x1eJ\x94\x18\xa4\x00M\xf6\x99\x85\xe6B9\x8a\xeeY\xc3-fO\x02Xp\x8c\xb5\\\x88 9\x89\xde\x88 S\xb0wi\xc1\xcb,\x9ac\xbe+\xcb\xf2\x12\x896\x1anD\xc4A\x05\x8awx\xb55\x12m\x9e\xe5O\x06\xde._E\xfbG\xb7\x02\xee\x80 !\xd3yv\xa3\x83\xd6\xa6G\xd5\x1f\x90\xcax\x94~g\xe7?\x94\x17\xaf\xa4\x00\x06\x00\x00'),
+}
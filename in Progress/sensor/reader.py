@@ -1,12 +1,13 @@
       
-import socket
-from random import random
-import network
-
-from utime import sleep, sleep_us, ticks_us
 from dht import DHT22
-from machine import Pin, ADC, Timer
+from machine import Pin, ADC
 import time
+import uasyncio as asyncio
+
+# Upper limit in seconds for a manually triggered watering
+MAX_MANUAL_PULSE = 120
+# Milliseconds the DHT22 needs after power up before it delivers valid readings
+DHT_WARMUP = 2000
 
 class SensorData:
     """Class for keeping track of measured sensor data."""
@@ -34,6 +35,13 @@ class SensorReader:
         self._trigger = Pin(9, Pin.OUT)
         self._echo = Pin(10, Pin.IN)
         self.data = SensorData()
+        self._ready_at = time.ticks_add(time.ticks_ms(), DHT_WARMUP)
+
+    async def wait_until_ready(self) -> None:
+        """Waits until the DHT22 finished its warm up, returns at once if it already has."""
+        remaining = time.ticks_diff(self._ready_at, time.ticks_ms())
+        if remaining > 0:
+            await asyncio.sleep_ms(remaining)
 
     def _measure_temperature(self) -> None:
         """Measures temperature and stores it in data.temperature."""
@@ -112,13 +120,31 @@ class SensorReader:
         return ret_dict
 
 class SensorController:
-    def __init__(self, reader):
+    def __init__(self, reader, events=None):
         self._sensor_reader = reader
+        self._events = events
         self._pump1 = Pin(21, Pin.OUT, value=0)
         self._pump2 = Pin(20, Pin.OUT, value=0)
         self._pump3 = Pin(19, Pin.OUT, value=0)
+        self._pumps = (self._pump1, self._pump2, self._pump3)
+        # which part drives a pump right now: None, 'auto' for the watering cycle or 'manual'
+        self._owners = [None, None, None]
         self._lamp = Pin(4, Pin.OUT)
         self._fan = Pin(5, Pin.OUT)
+        self._tank_empty = False
+        # soil humidity in % below which a pump waters, and duration of one watering in s
+        self.moisture_threshold = 50
+        self.pump_pulse = 30
+
+    def _emit(self, kind, data) -> None:
+        """Forwards an actuator event to the event bus, if one is attached."""
+        if self._events:
+            self._events.emit(kind, data)
+
+    def configure(self, moisture_threshold: int, pump_pulse: int) -> None:
+        """Applies new watering parameters, they take effect with the next watering cycle."""
+        self.moisture_threshold = moisture_threshold
+        self.pump_pulse = pump_pulse
 
     def get_emergency_stop_status(self):
         """Returns the emergency stop status of each pump as a dictionary."""
@@ -130,53 +156,124 @@ class SensorController:
 
     def activate_pump(self, pump_pin):
         pump_pin.off()
+        self._emit("pump", {"pump": self._pumps.index(pump_pin) + 1, "state": "on"})
 
-    def activate_needed_pumps(self) -> None:
-        """Aktiviert Pumpen, falls zugehörige Bodenfeuchtigkeit einen festgelegten Wert unterschreitet."""
-        
-        # Pumpe 1
-        if not self._sensor_reader.data.emg_stop_pump1:
-            if self._sensor_reader.data.soil_humidity_1 < 50:
-                self.activate_pump(self._pump1)
-            else:
-                self._pump1.on()
+    def _check_tank(self) -> None:
+        """Reports an empty water tank once until it is refilled."""
+        is_empty = bool(self._sensor_reader.data.is_water_empty)
+        if is_empty != self._tank_empty:
+            self._tank_empty = is_empty
+            self._emit("tank_empty", {"tank_empty": is_empty})
 
-        # Pumpe 2
-        if not self._sensor_reader.data.emg_stop_pump2:
-            if self._sensor_reader.data.soil_humidity_2 < 50:
-                self.activate_pump(self._pump2)
-            else:
-                self._pump2.on()
+    def check_watering(self, zone: int, seconds: int) -> None:
+        """Raises ValueError if a manual watering of zone would violate a safety limit."""
+        if zone not in (1, 2, 3):
+            raise ValueError(f"Unknown zone {zone}")
+        if not 0 < seconds <= MAX_MANUAL_PULSE:
+            raise ValueError(f"Watering time must be between 1 and {MAX_MANUAL_PULSE} s")
+        if getattr(self._sensor_reader.data, f"emg_stop_pump{zone}"):
+            raise ValueError(f"Emergency stop of pump {zone} is active")
+        if self._sensor_reader.data.is_water_empty:
+            raise ValueError("Water tank is empty")
+        # the relays are low active and start at 0, so only the owner tells a running pump
+        if self._owners[zone - 1]:
+            raise ValueError(f"Pump {zone} is already running")
+
+    def start_watering(self, zone: int, seconds: int):
+        """
+        Starts a manual watering of zone, the automatic cycle leaves the pump alone until it
+        is done.
+
+        Returns
+        -------
+        Task
+            Task switching the pump off after seconds and measuring the soil of the zone
+            again. A manual watering never sets the emergency stop, the automatic cycle
+            judges the sensor after its own pulses.
+
+        Raises
+        ------
+        ValueError
+            If the watering would violate a safety limit, see check_watering.
+        """
+        self.check_watering(zone, seconds)
+        self._owners[zone - 1] = "manual"
+        self.activate_pump(self._pumps[zone - 1])
+        return asyncio.create_task(self._finish_watering(zone, seconds))
+
+    async def _finish_watering(self, zone: int, seconds: int) -> None:
+        try:
+            await asyncio.sleep(seconds)
+        finally:
+            self._pumps[zone - 1].on()
+            self._owners[zone - 1] = None
+            self._emit("pump", {"pump": zone, "state": "off"})
+        self._sensor_reader.measure(f"soil_humidity_{zone}")
+
+    async def water_zone(self, zone: int, seconds: int) -> None:
+        """Waters one zone manually for the given number of seconds."""
+        await self.start_watering(zone, seconds)
+
+    def _check_after_pulse(self, zone: int) -> None:
+        """Sets the emergency stop of a zone whose soil is still too dry after watering, its
+        sensor is taken as broken. Once set, it stays set."""
+        data = self._sensor_reader.data
+        if getattr(data, f"soil_humidity_{zone}") < self.moisture_threshold:
+            if not getattr(data, f"emg_stop_pump{zone}"):
+                self._emit("emergency_stop", {"pump": zone})
+            setattr(data, f"emg_stop_pump{zone}", True)
+            self._pumps[zone - 1].on()
+            print(f"Bodenfeuchte-Sensor {zone} defekt! Neustart des Geräts erforderlich!")
+
+    def clear_emergency_stop(self, zone: int) -> None:
+        """Releases the emergency stop of a pump, which otherwise needs a restart."""
+        if zone not in (1, 2, 3):
+            raise ValueError(f"Unknown zone {zone}")
+        setattr(self._sensor_reader.data, f"emg_stop_pump{zone}", False)
+        self._emit("emergency_stop", {"pump": zone, "cleared": True})
+
+    def set_lamp(self, on: bool) -> None:
+        """Switches the lamp, the relay is low active like the pump relays."""
+        self._lamp.value(0 if on else 1)
+        self._emit("lamp", {"state": "on" if on else "off"})
+
+    def set_fan(self, on: bool) -> None:
+        """Switches the fan, the relay is low active like the pump relays."""
+        self._fan.value(0 if on else 1)
+        self._emit("fan", {"state": "on" if on else "off"})
+
+    async def activate_needed_pumps(self) -> None:
+        """Aktiviert Pumpen, falls zugehörige Bodenfeuchtigkeit einen festgelegten Wert unterschreitet.
+        Pumpen, die gerade manuell bewässern, werden übersprungen."""
+        self._check_tank()
+        data = self._sensor_reader.data
 
-        # Pumpe 3
-        if not self._sensor_reader.data.emg_stop_pump3:
-            if self._sensor_reader.data.soil_humidity_3 < 50:
-                self.activate_pump(self._pump3)
+        for zone, pump in enumerate(self._pumps, 1):
+            if getattr(data, f"emg_stop_pump{zone}") or self._owners[zone - 1]:
+                continue
+            if getattr(data, f"soil_humidity_{zone}") < self.moisture_threshold:
+                self._owners[zone - 1] = "auto"
+                self.activate_pump(pump)
             else:
-                self._pump3.on()
+                pump.on()
 
-        time.sleep(30)
+        await asyncio.sleep(self.pump_pulse)
 
-        # Turn off pumps after sleep
-        self._pump1.on()
-        self._pump2.on()
-        self._pump3.on()
+        # Turn off pumps after sleep, a manual watering started meanwhile keeps running
+        for zone, pump in enumerate(self._pumps, 1):
+            if self._owners[zone - 1] == "auto":
+                pump.on()
+                self._owners[zone - 1] = None
+                self._emit("pump", {"pump": zone, "state": "off"})
+            elif self._owners[zone - 1] is None:
+                pump.on()
 
         # Perform sensor measurement
         self._sensor_reader.measure()
 
         # Check for emergency stop conditions and set them permanently to True if triggered
-        if self._sensor_reader.data.soil_humidity_1 < 50:
-            self._sensor_reader.data.emg_stop_pump1 = True  # Once set to True, it will stay True
-            self._pump1.on()
-            print("Bodenfeuchte-Sensor 1 defekt! Neustart des Geräts erforderlich!")
-
-        if self._sensor_reader.data.soil_humidity_2 < 50:
-            self._sensor_reader.data.emg_stop_pump2 = True  # Once set to True, it will stay True
-            self._pump2.on()
-            print("Bodenfeuchte-Sensor 2 defekt! Neustart des Geräts erforderlich!")
-
-        if self._sensor_reader.data.soil_humidity_3 < 50:
-            self._sensor_reader.data.emg_stop_pump3 = True  # Once set to True, it will stay True
-            self._pump3.on()
-            print("Bodenfeuchte-Sensor 3 defekt! Neustart des Geräts erforderlich!")
+        # zones under manual control are left out, a manual pulse of any length is no reason
+        # to take the sensor as broken
+        for zone in (1, 2, 3):
+            if self._owners[zone - 1] is None:
+                self._check_after_pulse(zone)
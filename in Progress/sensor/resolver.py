@@ -0,0 +1,153 @@
+"""Shared DNS cache for all outbound connections.
+
+socket.getaddrinfo blocks the event loop, knows no TTL and fails the upload as soon as the
+router's DNS hiccups. resolve() sends its own A query over a non-blocking UDP socket to the
+DNS server of the station interface and caches the answer for its TTL. Failed lookups are
+cached for NEGATIVE_TTL seconds and, if the server is unreachable, an expired address is
+served for up to STALE_TTL seconds instead of failing.
+"""
+
+import network
+import uasyncio as asyncio
+import urandom as random
+import usocket as socket
+import utime as time
+
+# Bounds for the TTL reported by the server in seconds
+MIN_TTL = 60
+MAX_TTL = 3600
+# Seconds a failed lookup is not repeated
+NEGATIVE_TTL = 30
+# Seconds an expired address may still be used while the DNS server is unreachable
+STALE_TTL = 86400
+# Seconds to wait for an answer of the DNS server
+QUERY_TIMEOUT = 2
+DNS_PORT = 53
+
+# host -> (address, ticks of expiry, ticks of stale expiry)
+_cache = {}
+# host -> ticks until which the host is not looked up again
+_failed = {}
+stats = {"hits": 0, "misses": 0, "stale": 0, "negative": 0, "lookup_ms": 0}
+
+
+def _is_ip(host: str) -> bool:
+    parts = host.split(".")
+    return len(parts) == 4 and all(part.isdigit() for part in parts)
+
+
+def _build_query(query_id: int, host: str) -> bytes:
+    question = b""
+    for label in host.split("."):
+        question += bytes((len(label),)) + label.encode()
+    # header: id, recursion desired, one question; question: name, type A, class IN
+    return (query_id.to_bytes(2, "big") + b"\x01\x00\x00\x01\x00\x00\x00\x00\x00\x00"
+            + question + b"\x00\x00\x01\x00\x01")
+
+
+def _skip_name(packet: bytes, offset: int) -> int:
+    while True:
+        length = packet[offset]
+        if length & 0xC0 == 0xC0:  # compression pointer
+            return offset + 2
+        if length == 0:
+            return offset + 1
+        offset += length + 1
+
+
+def _parse_answer(packet: bytes, query_id: int) -> tuple:
+    """Returns (address, ttl) of the first A record, address is None for NXDOMAIN or no record."""
+    if int.from_bytes(packet[0:2], "big") != query_id:
+        raise OSError("DNS answer for another query")
+    rcode = packet[3] & 0x0F
+    if rcode not in (0, 3):
+        raise OSError(f"DNS server error {rcode}")
+    answers = int.from_bytes(packet[6:8], "big")
+    offset = _skip_name(packet, 12) + 4
+    for _ in range(answers):
+        offset = _skip_name(packet, offset)
+        record_type = int.from_bytes(packet[offset:offset + 2], "big")
+        ttl = int.from_bytes(packet[offset + 4:offset + 8], "big")
+        length = int.from_bytes(packet[offset + 8:offset + 10], "big")
+        offset += 10
+        if record_type == 1 and length == 4:
+            return ".".join(str(byte) for byte in packet[offset:offset + 4]), ttl
+        offset += length
+    return None, NEGATIVE_TTL
+
+
+async def _query(host: str, server: str) -> tuple:
+    query_id = random.getrandbits(16)
+    sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+    sock.setblocking(False)
+    try:
+        sent = time.ticks_ms()
+        sock.sendto(_build_query(query_id, host), (server, DNS_PORT))
+        while True:
+            try:
+                packet = sock.recv(512)
+                return _parse_answer(packet, query_id)
+            except OSError as e:
+                if e.args and e.args[0] != 11:  # anything but EAGAIN
+                    raise
+                if time.ticks_diff(time.ticks_ms(), sent) > QUERY_TIMEOUT * 1000:
+                    raise OSError("DNS timeout")
+                await asyncio.sleep_ms(5)
+    finally:
+        sock.close()
+
+
+def _dns_server() -> str:
+    return network.WLAN(network.STA_IF).ifconfig()[3]
+
+
+async def resolve(host: str) -> str:
+    """
+    Resolves host to an IPv4 address using the shared cache.
+
+    Parameters
+    ----------
+    host : str
+        Hostname or IPv4 address, addresses are returned unchanged.
+
+    Returns
+    -------
+    str
+        IPv4 address of host.
+
+    Raises
+    ------
+    OSError
+        If the host does not exist or the lookup failed and no stale address is known.
+    """
+    if _is_ip(host):
+        return host
+    now = time.ticks_ms()
+    entry = _cache.get(host)
+    if entry and time.ticks_diff(entry[1], now) > 0:
+        stats["hits"] += 1
+        return entry[0]
+    if host in _failed and time.ticks_diff(_failed[host], now) > 0:
+        stats["negative"] += 1
+        if entry and time.ticks_diff(entry[2], now) > 0:
+            stats["stale"] += 1
+            return entry[0]
+        raise OSError(f"DNS lookup for {host} failed recently")
+    stats["misses"] += 1
+    try:
+        address, ttl = await _query(host, _dns_server())
+    except (OSError, IndexError) as e:
+        _failed[host] = time.ticks_add(now, NEGATIVE_TTL * 1000)
+        if entry and time.ticks_diff(entry[2], now) > 0:
+            stats["stale"] += 1
+            print(f"DNS nicht erreichbar ({e}), verwende alte Adresse für {host}")
+            return entry[0]
+        raise OSError(f"DNS lookup for {host} failed: {e}")
+    stats["lookup_ms"] = time.ticks_diff(time.ticks_ms(), now)
+    if address is None:
+        _failed[host] = time.ticks_add(now, NEGATIVE_TTL * 1000)
+        raise OSError(f"Host {host} not found")
+    _failed.pop(host, None)
+    ttl = max(MIN_TTL, min(ttl, MAX_TTL))
+    _cache[host] = (address, time.ticks_add(now, ttl * 1000), time.ticks_add(now, (ttl + STALE_TTL) * 1000))
+    return address
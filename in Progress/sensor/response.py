@@ -0,0 +1,127 @@
+"""Response writer of the provisioning portal.
+
+Bodies are written in slices of a memoryview, so a page stored in flash or a buffer is never
+copied into a new bytes object. After every slice the stream is drained; a partial write
+leaves the rest of that slice in the stream, which retries it until it is sent. Status lines
+and headers are preencoded constants. Bodies whose length is not known in advance are sent
+with 'Transfer-Encoding: chunked'.
+"""
+
+import uasyncio as asyncio
+
+# Largest slice written before the stream is drained
+CHUNK_SIZE = 512
+# Seconds the client may take to accept one slice
+WRITE_TIMEOUT = 10
+
+STATUS_LINES = {
+    200: b"HTTP/1.1 200 OK\r\n",
+    302: b"HTTP/1.1 302 Found\r\n",
+    304: b"HTTP/1.1 304 Not Modified\r\n",
+    400: b"HTTP/1.1 400 Bad Request\r\n",
+    404: b"HTTP/1.1 404 Not Found\r\n",
+    413: b"HTTP/1.1 413 Payload Too Large\r\n",
+    431: b"HTTP/1.1 431 Request Header Fields Too Large\r\n",
+}
+HTML_HEAD = b"Content-Type: text/html; charset=utf-8\r\nTransfer-Encoding: chunked\r\nConnection: close\r\n\r\n"
+HTML_GZIP_HEAD = (b"Content-Type: text/html; charset=utf-8\r\nContent-Encoding: gzip\r\n"
+                  b"Vary: Accept-Encoding\r\nTransfer-Encoding: chunked\r\nConnection: close\r\n\r\n")
+JSON_CHUNKED_HEAD = (b"Content-Type: application/json\r\nCache-Control: no-cache\r\n"
+                     b"Transfer-Encoding: chunked\r\nConnection: close\r\n\r\n")
+# heads for send(), which adds Content-Length and the empty line
+JSON_HEAD = b"Content-Type: application/json\r\nCache-Control: no-cache\r\nConnection: close\r\n"
+EMPTY_HEAD = b"Connection: close\r\n"
+# appended to the preencoded heads of static assets
+GZIP_ENCODING = b"Content-Encoding: gzip\r\nVary: Accept-Encoding\r\n"
+CHUNKED_END = b"Transfer-Encoding: chunked\r\n\r\n"
+_CRLF = b"\r\n"
+_LAST_CHUNK = b"0\r\n\r\n"
+
+
+class ResponseWriter:
+    """
+    Writes one response to an asyncio stream.
+
+    Parameters
+    ----------
+    writer : asyncio.StreamWriter
+        Stream of the client.
+
+    Attributes
+    ----------
+    buffer : bytearray
+        Scratch buffer of CHUNK_SIZE bytes, e.g. for decompressing into.
+    sent : int
+        Body bytes written so far, without chunk framing.
+    """
+    def __init__(self, writer):
+        self._writer = writer
+        self._chunked = False
+        self.buffer = bytearray(CHUNK_SIZE)
+        self.sent = 0
+
+    async def _drain(self) -> None:
+        await asyncio.wait_for(self._writer.drain(), WRITE_TIMEOUT)
+
+    async def _write(self, data) -> None:
+        view = memoryview(data)
+        for start in range(0, len(view), CHUNK_SIZE):
+            self._writer.write(view[start:start + CHUNK_SIZE])
+            await self._drain()
+
+    async def start(self, status: int, head: bytes) -> None:
+        """Writes status line and a preencoded head ending with the empty line. A head with
+        'Transfer-Encoding: chunked' switches the body to chunked framing."""
+        self._chunked = b"chunked" in head
+        self._writer.write(STATUS_LINES[status])
+        await self._write(head)
+
+    async def write(self, data) -> None:
+        """Writes a part of the body, empty data is skipped."""
+        if not data:
+            return
+        if self._chunked:
+            self._writer.write(b"%x\r\n" % len(data))
+        await self._write(data)
+        if self._chunked:
+            self._writer.write(_CRLF)
+        self.sent += len(data)
+
+    async def write_pieces(self, pieces: list) -> None:
+        """Writes several parts of the body as one chunk. Small parts are drained together,
+        once CHUNK_SIZE bytes are waiting."""
+        length = sum(len(piece) for piece in pieces)
+        if not length:
+            return
+        if self._chunked:
+            self._writer.write(b"%x\r\n" % length)
+        waiting = 0
+        for piece in pieces:
+            if len(piece) > CHUNK_SIZE:
+                await self._write(piece)
+                waiting = 0
+                continue
+            self._writer.write(piece)
+            waiting += len(piece)
+            if waiting >= CHUNK_SIZE:
+                await self._drain()
+                waiting = 0
+        if self._chunked:
+            self._writer.write(_CRLF)
+        self.sent += length
+
+    async def end(self) -> None:
+        """Finishes the body, for chunked responses with the last chunk."""
+        if self._chunked:
+            self._writer.write(_LAST_CHUNK)
+        await self._drain()
+
+    async def send(self, status: int, head: bytes, body: bytes = b"") -> None:
+        """Writes a complete response with Content-Length, head holds the preencoded headers
+        without the empty line."""
+        self._writer.write(STATUS_LINES[status])
+        self._writer.write(head)
+        self._writer.write(b"Content-Length: %d\r\n\r\n" % len(body))
+        await self._write(body)
+        self.sent += len(body)
+        await self._drain()
@@ -0,0 +1,97 @@
+"""Precompiled templates for HTML and JSON generated on the board.
+
+A template is text with {{name}} slots. On first use it is split once into static byte chunks
+and slot names, the same layout tools/build_portal.py produces for the pages of the portal at
+build time. Rendering never concatenates: pieces() interleaves the static chunks with the
+values, and render() writes them to a response as one chunk, so the document never exists
+as a whole in RAM.
+
+    OPTION = Template("<option value='{{name}}'>{{name}}</option>")
+    await OPTION.render(response, {"name": b"Gewaechshaus"})
+"""
+
+
+def compile_template(source: str) -> tuple:
+    """
+    Splits a template into its static parts and slots.
+
+    Returns
+    -------
+    tuple
+        Static parts as tuple of bytes and slot names as tuple of str, a slot lies between
+        two consecutive parts.
+
+    Raises
+    ------
+    ValueError
+        If a slot is not closed.
+    """
+    parts = []
+    slots = []
+    while True:
+        start = source.find("{{")
+        if start < 0:
+            parts.append(source.encode("utf-8"))
+            return tuple(parts), tuple(slots)
+        end = source.find("}}", start)
+        if end < 0:
+            raise ValueError("Unclosed slot in template")
+        parts.append(source[:start].encode("utf-8"))
+        slots.append(source[start + 2:end].strip())
+        source = source[end + 2:]
+
+
+class Template:
+    """
+    Template compiled on first use.
+
+    Parameters
+    ----------
+    source : str
+        Text with {{name}} slots. The values are inserted as given, escaping is up to the caller.
+    """
+    def __init__(self, source: str):
+        self._source = source
+        self._compiled = None
+
+    @property
+    def compiled(self) -> tuple:
+        if self._compiled is None:
+            self._compiled = compile_template(self._source)
+            # the source is not needed any more
+            self._source = None
+        return self._compiled
+
+    def pieces(self, values: dict, into: list = None) -> list:
+        """
+        Interleaves the static parts with the values.
+
+        Parameters
+        ----------
+        values : dict
+            Slot names to bytes, or to lists of bytes e.g. from pieces() of another template.
+        into : list, optional
+            List the pieces are appended to, a new list by default.
+
+        Returns
+        -------
+        list
+            Pieces of the rendered document as bytes, empty pieces left out.
+        """
+        parts, slots = self.compiled
+        pieces = [] if into is None else into
+        for i, part in enumerate(parts):
+            if part:
+                pieces.append(part)
+            if i < len(slots):
+                value = values[slots[i]]
+                if isinstance(value, list):
+                    pieces.extend(value)
+                elif value:
+                    pieces.append(value)
+        return pieces
+
+    async def render(self, response, values: dict) -> None:
+        """Writes the rendered document to a ResponseWriter, as one chunk of a chunked
+        response."""
+        await response.write_pieces(self.pieces(values))
@@ -0,0 +1,176 @@
+"""NTP time synchronisation for timestamping readings.
+
+The board has no battery backed clock, so readings are stamped from ticks_ms. TimeSync maps
+ticks to Unix time with the result of the last NTP exchange and corrects the drift of the
+crystal measured between two synchronisations. Readings taken before the first
+synchronisation keep their ticks and are stamped afterwards.
+
+ticks_diff only covers about 6 days of the wrapping ticks counter, so the base of the
+mapping moves forward once a day while the server stays unreachable. Replies are accepted
+only as answer to the request sent: server mode, a stratum and our transmit timestamp
+echoed as origin timestamp.
+"""
+
+import machine
+import uasyncio as asyncio
+import urandom as random
+import usocket as socket
+import utime as time
+
+from sensor import resolver
+
+# Seconds between the NTP epoch (1900) and the Unix epoch (1970)
+NTP_UNIX_DELTA = 2208988800
+# Seconds between the Unix epoch and the epoch of the MicroPython port (1970 or 2000)
+PORT_EPOCH_OFFSET = 946684800 if time.gmtime(0)[0] == 2000 else 0
+# Seconds to wait for the answer of the NTP server
+NTP_TIMEOUT = 2
+# Seconds between two attempts while the server is unreachable
+RETRY_INTERVAL = 30
+# Drift corrections beyond this value are treated as measurement errors
+MAX_DRIFT_PPM = 500
+# Seconds after which the base moves forward, well below the 2**29 ms range of ticks_diff
+REANCHOR_INTERVAL = 86400
+NTP_PACKET_SIZE = 48
+
+
+def _ntp_to_unix_ms(packet: bytes, offset: int) -> int:
+    seconds = int.from_bytes(packet[offset:offset + 4], "big") - NTP_UNIX_DELTA
+    fraction = int.from_bytes(packet[offset + 4:offset + 8], "big")
+    return seconds * 1000 + (fraction * 1000 >> 32)
+
+
+class TimeSync:
+    """
+    Keeps the RTC in sync with an NTP server and stamps readings.
+
+    Parameters
+    ----------
+    host : str, optional
+        NTP server (Default: 'pool.ntp.org').
+    interval : int, optional
+        Seconds between two synchronisations (Default: 3600).
+    port : int, optional
+        UDP port of the server (Default: 123).
+    """
+    def __init__(self, host: str = "pool.ntp.org", interval: int = 3600, port: int = 123):
+        self.host = host
+        self.port = port
+        self.interval = interval
+        self.synced = asyncio.Event()
+        # last measured correction in ms and the drift of ticks_ms in ppm
+        self.offset_ms = 0
+        self.drift_ppm = 0
+        self._base_ticks = 0
+        self._base_ms = 0
+        # ms between the last synchronisation and the base, after moving the base forward
+        self._carried_ms = 0
+
+    def now_ms(self, ticks: int = None):
+        """
+        Converts ticks to Unix time.
+
+        Parameters
+        ----------
+        ticks : int, optional
+            Value of utime.ticks_ms(), the current ticks if omitted.
+
+        Returns
+        -------
+        int or None
+            Milliseconds since 1970-01-01 UTC, None before the first synchronisation.
+        """
+        if not self.synced.is_set():
+            return None
+        if ticks is None:
+            ticks = time.ticks_ms()
+        elapsed = time.ticks_diff(ticks, self._base_ticks)
+        return self._base_ms + elapsed + elapsed * self.drift_ppm // 1000000
+
+    async def _query(self) -> tuple:
+        """Sends one NTP request and returns (Unix ms at receipt, ticks at receipt, round trip in ms)."""
+        address = (await resolver.resolve(self.host), self.port)
+        request = bytearray(NTP_PACKET_SIZE)
+        request[0] = 0x1B  # LI 0, version 3, client mode
+        # random transmit timestamp, the server echoes it as origin timestamp
+        request[40:44] = random.getrandbits(32).to_bytes(4, "big")
+        request[44:48] = random.getrandbits(32).to_bytes(4, "big")
+        sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        sock.setblocking(False)
+        try:
+            sent = time.ticks_ms()
+            sock.sendto(request, address)
+            while True:
+                try:
+                    packet = sock.recv(NTP_PACKET_SIZE)
+                    # late answers to an earlier request and forged ones are skipped
+                    if len(packet) < NTP_PACKET_SIZE or packet[24:32] == request[40:48]:
+                        break
+                except OSError:
+                    pass
+                # nothing received yet, poll again without blocking the event loop
+                if time.ticks_diff(time.ticks_ms(), sent) > NTP_TIMEOUT * 1000:
+                    raise OSError("NTP timeout")
+                await asyncio.sleep_ms(10)
+            received = time.ticks_ms()
+        finally:
+            sock.close()
+        if len(packet) < NTP_PACKET_SIZE:
+            raise OSError("NTP reply too short")
+        if packet[0] & 0x07 != 4:
+            raise OSError("NTP reply not in server mode")
+        if packet[1] == 0:
+            # stratum 0 is a kiss-o'-death, the code in the reference id says why
+            raise OSError(f"NTP server refused: {bytes(packet[12:16])}")
+        server_receive = _ntp_to_unix_ms(packet, 32)
+        server_transmit = _ntp_to_unix_ms(packet, 40)
+        round_trip = time.ticks_diff(received, sent) - (server_transmit - server_receive)
+        return server_transmit + round_trip // 2, received, round_trip
+
+    async def sync(self) -> None:
+        """Performs one synchronisation and updates offset, drift and RTC."""
+        unix_ms, ticks, round_trip = await self._query()
+        if self.synced.is_set():
+            predicted = self.now_ms(ticks)
+            self.offset_ms = unix_ms - predicted
+            elapsed = self._carried_ms + time.ticks_diff(ticks, self._base_ticks)
+            if elapsed > 0:
+                # ppm of error accumulated since the last synchronisation, added to the previous drift
+                drift = self.drift_ppm + self.offset_ms * 1000000 // elapsed
+                self.drift_ppm = max(-MAX_DRIFT_PPM, min(drift, MAX_DRIFT_PPM))
+        self._base_ticks = ticks
+        self._base_ms = unix_ms
+        self._carried_ms = 0
+        self._set_rtc(unix_ms)
+        self.synced.set()
+        print(f"Zeit synchronisiert: Korrektur {self.offset_ms} ms, Drift {self.drift_ppm} ppm, RTT {round_trip} ms")
+
+    def _set_rtc(self, unix_ms: int) -> None:
+        tm = time.gmtime(unix_ms // 1000 - PORT_EPOCH_OFFSET)
+        machine.RTC().datetime((tm[0], tm[1], tm[2], tm[6] + 1, tm[3], tm[4], tm[5], 0))
+
+    def _reanchor(self) -> None:
+        """Moves the base to now once it is REANCHOR_INTERVAL old, before ticks_diff wraps."""
+        if not self.synced.is_set():
+            return
+        ticks = time.ticks_ms()
+        elapsed = time.ticks_diff(ticks, self._base_ticks)
+        if elapsed >= REANCHOR_INTERVAL * 1000:
+            self._base_ms = self.now_ms(ticks)
+            self._base_ticks = ticks
+            self._carried_ms += elapsed
+
+    async def run(self) -> None:
+        """Synchronises at start and every interval seconds, retries sooner after failures."""
+        while True:
+            try:
+                await self.sync()
+                wait = self.interval
+            except Exception as e:
+                print(f"NTP-Synchronisation fehlgeschlagen: {e}")
+                wait = RETRY_INTERVAL
+            while wait > 0:
+                step = min(wait, REANCHOR_INTERVAL)
+                await asyncio.sleep(step)
+                wait -= step
+                self._reanchor()
@@ -0,0 +1,335 @@
+"""Station connection with fast reconnect.
+
+After every successful connection the BSSID and channel of the access point, the IP lease
+and the connection duration are stored in /wifi_cache.json. The next boot connects to the
+cached BSSID directly, without scanning first, and can optionally reuse the lease as static
+IP to skip DHCP. The connection timeout adapts to the durations of previous connections,
+so a slow DHCP server no longer sends the board into access point mode.
+
+With several known networks (see sensor.credentials), connect_known tries the cached access
+point first and otherwise ranks the known networks by one scan and fails over between them.
+
+While running, WifiSupervisor watches the link, reconnects through connect_known with
+exponential backoff, failing over to another known network if the last one is gone, and
+pauses uploads via its 'online' event until the connection is back. Connecting awaits the
+link state, so the measuring loop keeps running meanwhile.
+"""
+
+import json
+import network
+import os
+import uasyncio as asyncio
+import utime as time
+
+CACHE_PATH = "/wifi_cache.json"
+# Bounds of the adaptive connection timeout in ms
+MIN_TIMEOUT = 5000
+MAX_TIMEOUT = 20000
+# Timeout in ms while no connection was recorded yet
+DEFAULT_TIMEOUT = 10000
+# Number of connection durations the timeout is derived from
+HISTORY_SIZE = 5
+# Extra time in ms granted while the link is up but DHCP has not answered yet
+DHCP_GRACE = 5000
+
+# Seconds between two link checks of the supervisor
+CHECK_INTERVAL = 5
+# Bounds of the backoff between reconnect attempts in seconds
+MIN_BACKOFF = 1
+MAX_BACKOFF = 60
+# RSSI in dBm below which the signal is reported as weak
+WEAK_RSSI = -80
+
+# Link states of the cyw43 driver
+STAT_LINK_NOIP = 2
+STAT_GOT_IP = 3
+FAILED_STATES = (network.STAT_WRONG_PASSWORD, network.STAT_NO_AP_FOUND, network.STAT_CONNECT_FAIL)
+
+
+def load_cache(path: str = CACHE_PATH) -> dict:
+    """Returns the cached connection details, an empty dict if none are stored."""
+    try:
+        with open(path) as file:
+            return json.load(file)
+    except (OSError, ValueError):
+        return {}
+
+
+def save_cache(cache: dict, path: str = CACHE_PATH) -> None:
+    """Writes the connection details if they changed, to a temporary file first so that a
+    reset while writing keeps the previous cache intact."""
+    data = json.dumps(cache)
+    try:
+        with open(path) as file:
+            if file.read() == data:
+                return
+    except OSError:
+        pass
+    with open(path + ".tmp", "w") as file:
+        file.write(data)
+    os.rename(path + ".tmp", path)
+
+
+def adaptive_timeout(durations: list) -> int:
+    """Twice the slowest of the recent connection durations, limited to MIN/MAX_TIMEOUT."""
+    if not durations:
+        return DEFAULT_TIMEOUT
+    return max(MIN_TIMEOUT, min(2 * max(durations), MAX_TIMEOUT))
+
+
+def _find_access_point(wlan, ssid: str):
+    """Scans for ssid and returns (bssid, channel) of the strongest access point or None."""
+    best = None
+    # compared as bytes, SSIDs of neighbouring networks need not be valid UTF-8
+    name = ssid.encode("utf-8")
+    for net in wlan.scan():
+        if net[0] == name and (best is None or net[3] > best[3]):
+            best = net
+    return (best[1], best[2]) if best else None
+
+
+def _restore_dhcp(wlan) -> bool:
+    """
+    Switches the station back from a static address to DHCP, returns False if that failed.
+
+    The rp2 port does not know ifconfig("dhcp"). Firmware with WLAN.ipconfig turns DHCP on
+    again directly, older firmware only gets a fresh interface, which starts without address
+    and asks the DHCP server when it connects.
+    """
+    try:
+        if hasattr(wlan, "ipconfig"):
+            wlan.ipconfig(dhcp4=True)
+        else:
+            wlan.active(False)
+            wlan.active(True)
+        return True
+    except (OSError, TypeError, ValueError) as e:
+        print(f"DHCP konnte nicht wieder eingeschaltet werden: {e!r}")
+        return False
+
+
+async def _wait_for_connection(wlan, timeout: int) -> bool:
+    start = time.ticks_ms()
+    deadline = timeout
+    while time.ticks_diff(time.ticks_ms(), start) < deadline:
+        status = wlan.status()
+        if status == STAT_GOT_IP:
+            return True
+        if status in FAILED_STATES:
+            return False
+        if status == STAT_LINK_NOIP:
+            # associated, only DHCP is slow: don't give up on the network yet
+            deadline = max(deadline, timeout + DHCP_GRACE)
+        await asyncio.sleep_ms(50)
+    return False
+
+
+async def connect(wlan, ssid: str, password: str, static_ip: bool = False, access_point: tuple = None,
+                  fallback: bool = True, scan: bool = True) -> dict:
+    """
+    Connects the station interface, using the cached access point if possible.
+
+    Parameters
+    ----------
+    wlan : network.WLAN
+        Station interface.
+    ssid : str
+        Name of the network.
+    password : str
+        Password of the network.
+    static_ip : bool, optional
+        Reuse the cached IP lease instead of asking the DHCP server (Default: False).
+    access_point : tuple, optional
+        (bssid, channel) from a scan done by the caller. The network is then joined through
+        this access point, without trying the cached one and without scanning again.
+    fallback : bool, optional
+        Join the network without the cached access point if that fails (Default: True).
+    scan : bool, optional
+        Look for the access point by a scan before joining without the cached one. Without,
+        any access point of the network is joined, e.g. of a hidden one (Default: True).
+
+    Returns
+    -------
+    dict
+        'connected' (bool), 'path' ('fast' or 'cold'), 'duration' in ms and 'dhcp', False if
+        the station is left with the static address because DHCP could not be restored.
+    """
+    start = time.ticks_ms()
+    wlan.active(True)
+    cache = load_cache()
+    durations = cache.get("durations", []) if cache.get("ssid") == ssid else []
+    timeout = adaptive_timeout(durations)
+    path = "cold"
+    connected = False
+    dhcp = True
+
+    if access_point is None and cache.get("ssid") == ssid and cache.get("bssid"):
+        # fast path: connect to the known access point without scanning
+        path = "fast"
+        static = static_ip and bool(cache.get("ifconfig"))
+        if static:
+            wlan.ifconfig(tuple(cache["ifconfig"]))
+        wlan.connect(ssid, password, bssid=bytes.fromhex(cache["bssid"]))
+        connected = await _wait_for_connection(wlan, timeout)
+        if not connected:
+            print("Schnellverbindung fehlgeschlagen")
+            wlan.disconnect()
+            if static and not _restore_dhcp(wlan):
+                # joining with the stale address would not work either
+                dhcp = False
+                fallback = False
+
+    if not connected and (fallback or path == "cold"):
+        path = "cold"
+        if access_point is None and scan:
+            access_point = _find_access_point(wlan, ssid)
+        if access_point:
+            wlan.connect(ssid, password, bssid=access_point[0])
+        else:
+            # hidden network or scan failed
+            wlan.connect(ssid, password)
+        connected = await _wait_for_connection(wlan, timeout)
+
+    duration = time.ticks_diff(time.ticks_ms(), start)
+    if connected:
+        if access_point:
+            cache = {"bssid": access_point[0].hex(), "channel": access_point[1]}
+        elif cache.get("ssid") != ssid:
+            cache = {}
+        cache["ssid"] = ssid
+        cache["ifconfig"] = list(wlan.ifconfig())
+        cache["durations"] = (durations + [duration])[-HISTORY_SIZE:]
+        save_cache(cache)
+    print(f"WLAN-Verbindung zu {ssid} ({path}): {'ok' if connected else 'fehlgeschlagen'} nach {duration} ms")
+    return {"connected": connected, "path": path, "duration": duration, "dhcp": dhcp}
+
+
+async def connect_known(wlan, store, static_ip: bool = False) -> dict:
+    """
+    Connects the station interface to the best of the known networks.
+
+    The network of the cached access point is tried first without scanning. If it is not in
+    reach, one scan ranks the known networks (see CredentialStore.rank), which are tried in
+    turn until one connects. The attempts are counted in the store, which is saved.
+
+    Parameters
+    ----------
+    wlan : network.WLAN
+        Station interface.
+    store : CredentialStore
+        Known networks.
+    static_ip : bool, optional
+        Reuse the cached IP lease on the fast path (Default: False).
+
+    Returns
+    -------
+    dict
+        Result of connect() for the last network tried, with 'duration' as total time in ms,
+        'ssid' and 'password' of the connected network (None if all failed) and 'attempts'.
+    """
+    start = time.ticks_ms()
+    wlan.active(True)
+    result = {"connected": False, "path": "cold"}
+    attempts = 0
+    cached = store.get(load_cache().get("ssid"))
+    if cached:
+        attempts += 1
+        result = await connect(wlan, cached["ssid"], cached["password"], static_ip, fallback=False)
+        store.record(cached["ssid"], result["connected"], result["duration"])
+    if not result["connected"] and result.get("dhcp", True):
+        scan_start = time.ticks_ms()
+        ranked = store.rank(wlan.scan())
+        print(f"WLAN-Scan für {len(store)} bekannte Netzwerke: {time.ticks_diff(time.ticks_ms(), scan_start)} ms")
+        for entry, access_point in ranked:
+            if entry is cached and access_point is None:
+                # the cached network is out of reach, it was tried already
+                continue
+            if access_point is None:
+                print(f"{entry['ssid']} nicht gefunden, versuche es trotzdem (verstecktes Netzwerk?)")
+            attempts += 1
+            result = await connect(wlan, entry["ssid"], entry["password"], access_point=access_point,
+                                   scan=False)
+            store.record(entry["ssid"], result["connected"], result["duration"])
+            if result["connected"]:
+                cached = entry
+                break
+            wlan.disconnect()
+    store.save()
+    result["duration"] = time.ticks_diff(time.ticks_ms(), start)
+    result["attempts"] = attempts
+    result["ssid"] = cached["ssid"] if result["connected"] else None
+    result["password"] = cached["password"] if result["connected"] else None
+    print(f"WLAN: {result['ssid'] or 'kein bekanntes Netzwerk'} nach {attempts} Versuchen, "
+          f"{result['duration']} ms")
+    return result
+
+
+class WifiSupervisor:
+    """
+    Keeps the station connected while the measuring loop runs.
+
+    Parameters
+    ----------
+    wlan : network.WLAN
+        Connected station interface.
+    credentials : CredentialStore
+        Known networks, a reconnect tries them like connect_known at boot.
+    static_ip : bool
+        Reuse the cached IP lease when reconnecting to the cached access point.
+    portal_after : int
+        Seconds of outage after which on_long_outage is called.
+    on_long_outage : callable
+        Called once the outage exceeds portal_after, e.g. to start the provisioning portal.
+    """
+    def __init__(self, wlan, credentials, static_ip: bool, portal_after: int, on_long_outage):
+        self.wlan = wlan
+        self.credentials = credentials
+        self.static_ip = static_ip
+        self.portal_after = portal_after
+        self.on_long_outage = on_long_outage
+        self.online = asyncio.Event()
+        if wlan.isconnected():
+            self.online.set()
+        self.metrics = {"disconnects": 0, "reconnect_attempts": 0, "last_outage_ms": None,
+                        "longest_outage_ms": 0, "last_reconnect_ms": None, "rssi": None, "ssid": None}
+
+    async def _reconnect(self) -> bool:
+        self.metrics["reconnect_attempts"] += 1
+        self.wlan.disconnect()
+        result = await connect_known(self.wlan, self.credentials, self.static_ip)
+        if result["connected"]:
+            self.metrics["last_reconnect_ms"] = result["duration"]
+            self.metrics["ssid"] = result["ssid"]
+        return result["connected"]
+
+    async def _recover(self) -> None:
+        """Reconnects with backoff until the link is back or the outage is too long."""
+        lost = time.ticks_ms()
+        self.metrics["disconnects"] += 1
+        self.online.clear()
+        print("WLAN-Verbindung verloren, Uploads pausiert")
+        backoff = MIN_BACKOFF
+        while not await self._reconnect():
+            outage = time.ticks_diff(time.ticks_ms(), lost)
+            if outage > self.portal_after * 1000:
+                print(f"WLAN seit {outage // 1000} s nicht erreichbar")
+                self.on_long_outage()
+                return
+            await asyncio.sleep(backoff)
+            backoff = min(backoff * 2, MAX_BACKOFF)
+        outage = time.ticks_diff(time.ticks_ms(), lost)
+        self.metrics["last_outage_ms"] = outage
+        self.metrics["longest_outage_ms"] = max(outage, self.metrics["longest_outage_ms"])
+        self.online.set()
+        print(f"WLAN wieder verbunden nach {outage} ms, Uploads fortgesetzt")
+
+    async def run(self) -> None:
+        while True:
+            await asyncio.sleep(CHECK_INTERVAL)
+            if self.wlan.status() == STAT_GOT_IP:
+                rssi = self.wlan.status("rssi")
+                if rssi < WEAK_RSSI and (self.metrics["rssi"] is None or self.metrics["rssi"] >= WEAK_RSSI):
+                    print(f"Schwaches WLAN-Signal: {rssi} dBm")
+                self.metrics["rssi"] = rssi
+            else:
+                await self._recover()
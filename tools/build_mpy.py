@@ -0,0 +1,182 @@
+"""Builds the deploy layout of the Pico with precompiled .mpy bytecode.
+
+MicroPython compiles every imported .py file on each boot. This script cross-compiles the
+sensor package with mpy-cross, so the board only loads ready bytecode. main.py stays source,
+as MicroPython only runs main.py from the filesystem.
+
+    python tools/build_mpy.py               build build/device/
+    python tools/build_mpy.py --manifest    additionally write build/manifest.py for freezing
+    python tools/build_mpy.py --bench       compare startup of source and .mpy on the Unix port
+
+MicroPython looks for 'module.py' before 'module.mpy', so the sensor/*.py files must be
+removed from the board when deploying the .mpy files:
+
+    mpremote rm -r :sensor + cp -r build/device/sensor : + cp build/device/main.py :
+
+Frozen into the firmware, the modules run directly from flash and their string constants
+(e.g. the HTML pages of the access point) never occupy RAM:
+
+    make -C ports/rp2 BOARD=RPI_PICO_W FROZEN_MANIFEST=<repo>/build/manifest.py
+"""
+
+import argparse
+import importlib.util
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+SOURCE_DIR = os.path.join(ROOT, "in Progress")
+BUILD_DIR = os.path.join(ROOT, "build")
+PACKAGE = "sensor"
+# Architecture of the RP2040, only relevant for native code but recorded in the .mpy header
+MARCH = "armv6m"
+
+# Minimal replacements of the hardware modules, so the package imports on the Unix port
+UNIX_STUBS = {
+    "machine.py": (
+        "class Pin:\n"
+        "    IN = OUT = PULL_UP = 0\n"
+        "    def __init__(self, *args, **kwargs): pass\n"
+        "    def value(self, *args): return 1\n"
+        "    def on(self): pass\n"
+        "    def off(self): pass\n"
+        "class ADC:\n"
+        "    def __init__(self, *args): pass\n"
+        "    def read_u16(self): return 30000\n"
+        "class Timer: pass\n"
+        "class RTC:\n"
+        "    def datetime(self, *args): pass\n"
+        "def unique_id(): return b'\\x00\\x01'\n"
+        "def reset(): pass\n"
+    ),
+    "network.py": (
+        "STA_IF, AP_IF = 0, 1\n"
+        "STAT_WRONG_PASSWORD, STAT_NO_AP_FOUND, STAT_CONNECT_FAIL = -3, -2, -1\n"
+        "class WLAN:\n"
+        "    def __init__(self, *args): pass\n"
+        "    def active(self, *args): return True\n"
+        "    def scan(self): return []\n"
+        "    def ifconfig(self, *args): return ('0.0.0.0',) * 4\n"
+        "def country(*args): pass\n"
+    ),
+    "dht.py": (
+        "class DHT22:\n"
+        "    def __init__(self, pin): pass\n"
+    ),
+}
+
+# Imports one module in a fresh interpreter, prints: import time in us, heap taken by the
+# module and the modules it imports in bytes
+BENCH_SCRIPT = """
+import gc, sys, time
+sys.path.insert(0, {path!r})
+sys.path.insert(0, {stubs!r})
+gc.collect()
+heap = gc.mem_alloc()
+start = time.ticks_us()
+__import__({module!r})
+duration = time.ticks_diff(time.ticks_us(), start)
+gc.collect()
+print(duration, gc.mem_alloc() - heap)
+"""
+
+
+def find_mpy_cross() -> list:
+    """Returns the command of mpy-cross, either from PATH or from the pip package mpy-cross."""
+    if shutil.which("mpy-cross"):
+        return ["mpy-cross"]
+    if importlib.util.find_spec("mpy_cross") is None:
+        sys.exit("mpy-cross not found, install it with 'pip install mpy-cross'")
+    return [sys.executable, "-m", "mpy_cross"]
+
+
+def package_modules() -> list:
+    package_dir = os.path.join(SOURCE_DIR, PACKAGE)
+    return sorted(name for name in os.listdir(package_dir) if name.endswith(".py"))
+
+
+def compile_package(target: str, march: str = MARCH) -> None:
+    """Cross-compiles all modules of the sensor package into target/sensor/*.mpy."""
+    mpy_cross = find_mpy_cross()
+    out_dir = os.path.join(target, PACKAGE)
+    os.makedirs(out_dir, exist_ok=True)
+    for name in package_modules():
+        source = os.path.join(SOURCE_DIR, PACKAGE, name)
+        output = os.path.join(out_dir, name[:-3] + ".mpy")
+        command = mpy_cross + ["-o", output, "-s", f"{PACKAGE}/{name}"]
+        if march:
+            command.append(f"-march={march}")
+        subprocess.run(command + [source], check=True)
+        print(f"{PACKAGE}/{name} -> {os.path.relpath(output, ROOT)}")
+
+
+def build_device() -> str:
+    target = os.path.join(BUILD_DIR, "device")
+    shutil.rmtree(target, ignore_errors=True)
+    compile_package(target)
+    shutil.copy(os.path.join(SOURCE_DIR, "main.py"), target)
+    return target
+
+
+def write_manifest() -> str:
+    path = os.path.join(BUILD_DIR, "manifest.py")
+    with open(path, "w") as file:
+        file.write('include("$(PORT_DIR)/boards/manifest.py")\n')
+        file.write(f'package("{PACKAGE}", base_path={SOURCE_DIR!r})\n')
+    return path
+
+
+def run_bench(micropython: str, path: str, stubs: str) -> dict:
+    """Imports every module in its own interpreter, so modules imported before do not make
+    the later ones look cheap."""
+    timings = {}
+    for name in package_modules():
+        if name == "__init__.py":
+            continue
+        module = "sensor." + name[:-3]
+        script = BENCH_SCRIPT.format(path=path, stubs=stubs, module=module)
+        result = subprocess.run([micropython, "-c", script], capture_output=True, text=True, check=True)
+        duration, heap = result.stdout.split()
+        timings[module] = (int(duration), int(heap))
+    return timings
+
+
+def bench(micropython: str) -> None:
+    """Prints import time and heap taken by every module with its imports, source versus .mpy."""
+    with tempfile.TemporaryDirectory() as temp:
+        stubs = os.path.join(temp, "stubs")
+        os.makedirs(stubs)
+        for name, content in UNIX_STUBS.items():
+            with open(os.path.join(stubs, name), "w") as file:
+                file.write(content)
+        # the Unix port loads .mpy files of its own architecture only, so compile without -march
+        mpy_dir = os.path.join(temp, "mpy")
+        compile_package(mpy_dir, march=None)
+        source = run_bench(micropython, SOURCE_DIR, stubs)
+        compiled = run_bench(micropython, mpy_dir, stubs)
+    print(f"{'Modul':<24}{'Quelle us':>12}{'.mpy us':>12}{'Heap Quelle':>14}{'Heap .mpy':>12}")
+    for name in source:
+        print(f"{name:<24}{source[name][0]:>12}{compiled[name][0]:>12}"
+              f"{source[name][1]:>14}{compiled[name][1]:>12}")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[0])
+    parser.add_argument("--manifest", action="store_true", help="write a manifest for frozen firmware")
+    parser.add_argument("--bench", action="store_true", help="run the startup benchmark on the Unix port")
+    parser.add_argument("--micropython", default="micropython", help="binary of the Unix port")
+    args = parser.parse_args()
+
+    target = build_device()
+    print(f"Deploy layout in {os.path.relpath(target, ROOT)}")
+    if args.manifest:
+        print(f"Manifest in {os.path.relpath(write_manifest(), ROOT)}")
+    if args.bench:
+        bench(args.micropython)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,179 @@
+"""Pre-renders the pages of the provisioning portal into sensor/portal_assets.py.
+
+The pages in tools/portal/ are minified and compressed once on the host. The board then
+sends the compressed bytes straight from flash with 'Content-Encoding: gzip' and only
+fills in the dynamic values, marked as {{name}} in the sources, at request time.
+
+    python tools/build_portal.py
+
+Every page is split at its slots into static parts. Each part is compressed into raw
+deflate blocks of its own, so the board can place the values between them as stored
+(uncompressed) blocks without touching the compressed data. A gzip trailer needs the
+CRC-32 of the whole document; since the CRC over a fixed part is an affine function of
+the CRC before it, every part carries its CRC-32 from zero and one column per bit of
+that function, and the board continues the checksum across a part with 32 XORs.
+
+Stylesheets and images next to the pages are static assets. They are gzip-compressed as a
+whole and served under a name carrying a hash of their content, e.g.
+/static/index-1a2b3c4d.css, so the browser may cache them for good; references like
+"/static/index.css" in pages and stylesheets are rewritten to these names.
+"""
+
+import os
+import re
+import zlib
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+PAGES_DIR = os.path.join(ROOT, "tools", "portal")
+OUTPUT = os.path.join(ROOT, "in Progress", "sensor", "portal_assets.py")
+# Window size of the compressor as power of two. The board only needs a window of this size
+# when it has to decompress a page for a client without gzip support.
+WBITS = 10
+# Seconds browsers may cache a static asset, a changed asset gets a new name anyway
+MAX_AGE = 31536000
+# Static assets by content type, images first since stylesheets refer to them
+ASSET_TYPES = (
+    (".svg", "image/svg+xml"),
+    (".css", "text/css"),
+)
+
+SLOT = re.compile(r"\{\{(\w+)\}\}")
+STYLE = re.compile(r"(<style>)(.*?)(</style>)", re.S)
+STATIC = re.compile(r"/static/([\w.-]+)")
+
+
+def _strip_lines(text: str) -> str:
+    return "\n".join(line.strip() for line in text.splitlines() if line.strip())
+
+
+def minify_css(css: str) -> str:
+    """Drops comments and all whitespace that is not needed."""
+    css = re.sub(r"/\*.*?\*/", "", css, flags=re.S)
+    return re.sub(r"\s*([{};,])\s*|(:)\s+", r"\1\2", _strip_lines(css))
+
+
+def minify(html: str) -> str:
+    """Drops indentation, empty lines and CSS comments and compacts the style blocks.
+    Line breaks are kept, so that scripts without semicolons stay valid."""
+    html = _strip_lines(re.sub(r"/\*.*?\*/", "", html, flags=re.S))
+    return STYLE.sub(lambda m: m.group(1) + minify_css(m.group(2)) + m.group(3), html)
+
+
+def link_assets(text: str, names: dict) -> str:
+    """Rewrites references to static assets to their versioned names."""
+    def replace(match):
+        if match.group(1) not in names:
+            raise KeyError(f"unknown static asset {match.group(0)}")
+        return "/static/" + names[match.group(1)]
+    return STATIC.sub(replace, text)
+
+
+def crc_columns(data: bytes) -> tuple:
+    """CRC-32 of data from zero and the change of the result for every bit of the start value."""
+    base = zlib.crc32(data, 0)
+    return base, tuple(zlib.crc32(data, 1 << bit) ^ base for bit in range(32))
+
+
+def compress_part(data: bytes, last: bool) -> bytes:
+    compressor = zlib.compressobj(9, zlib.DEFLATED, -WBITS)
+    # a sync flush ends byte aligned without the final bit, so more blocks can follow
+    return compressor.compress(data) + compressor.flush(zlib.Z_FINISH if last else zlib.Z_SYNC_FLUSH)
+
+
+def build_page(html: str) -> tuple:
+    """Returns the static parts as (compressed, size, crc, columns) and the slot names."""
+    pieces = SLOT.split(minify(html))
+    texts, slots = pieces[0::2], pieces[1::2]
+    parts = []
+    for i, text in enumerate(texts):
+        data = text.encode("utf-8")
+        crc, columns = crc_columns(data)
+        parts.append((compress_part(data, i == len(texts) - 1), len(data), crc, columns))
+    return tuple(parts), tuple(slots)
+
+
+def check_page(html: str, page: tuple) -> None:
+    """Splices test values into the page like the board does and decompresses the result."""
+    parts, slots = page
+    values = [f"<{name}>".encode() for name in slots]
+    stream = b""
+    for i, part in enumerate(parts):
+        stream += part[0]
+        if i < len(values):
+            stream += b"\x00" + len(values[i]).to_bytes(2, "little") \
+                + (0xFFFF ^ len(values[i])).to_bytes(2, "little") + values[i]
+    expected = SLOT.sub(lambda m: f"<{m.group(1)}>", minify(html)).encode("utf-8")
+    assert zlib.decompress(stream, -15) == expected, "spliced page does not decompress"
+
+
+def build_asset(filename: str, text: str, content_type: str) -> tuple:
+    """Returns the versioned name and the asset as (ETag, head, gzip data)."""
+    data = (minify_css(text) if filename.endswith(".css") else _strip_lines(text)).encode("utf-8")
+    version = f"{zlib.crc32(data):08x}"
+    stem, extension = os.path.splitext(filename)
+    compressor = zlib.compressobj(9, zlib.DEFLATED, 16 + WBITS)
+    compressed = compressor.compress(data) + compressor.flush()
+    assert zlib.decompress(compressed, 16 + 15) == data, "asset does not decompress"
+    etag = f'"{version}"'
+    head = (f"Content-Type: {content_type}\r\nCache-Control: public, max-age={MAX_AGE}, immutable\r\n"
+            f"ETag: {etag}\r\nConnection: close\r\n").encode()
+    return f"{stem}-{version}{extension}", (etag, head, compressed)
+
+
+def write_module(pages: dict, assets: dict) -> None:
+    with open(OUTPUT, "w") as file:
+        file.write('"""Pre-rendered pages of the provisioning portal.\n\n'
+                   'Generated by tools/build_portal.py from tools/portal/, do not edit.\n'
+                   'Every page is (parts, slots), the static parts are (raw deflate data,\n'
+                   'uncompressed size, CRC-32, CRC columns), a slot lies between two parts.\n'
+                   'ASSETS maps the paths of static assets to (ETag, head, gzip data).\n"""\n\n')
+        file.write(f"WBITS = {WBITS}\n")
+        for name, (parts, slots) in pages.items():
+            file.write(f"\n{name} = (\n    (\n")
+            for data, size, crc, columns in parts:
+                file.write(f"        ({data!r},\n         {size}, {crc:#010x},\n         (")
+                file.write(", ".join(f"{column:#x}" for column in columns))
+                file.write(")),\n")
+            file.write(f"    ),\n    {slots!r},\n)\n")
+        file.write("\nASSETS = {\n")
+        for path, (etag, head, data) in assets.items():
+            file.write(f"    {path!r}: (\n        {etag!r},\n        {head!r},\n        {data!r}),\n")
+        file.write("}\n")
+
+
+def _read(filename: str) -> str:
+    with open(os.path.join(PAGES_DIR, filename), encoding="utf-8") as file:
+        return file.read()
+
+
+def main() -> None:
+    filenames = sorted(os.listdir(PAGES_DIR))
+    names = {}
+    assets = {}
+    for extension, content_type in ASSET_TYPES:
+        for filename in filenames:
+            if not filename.endswith(extension):
+                continue
+            text = link_assets(_read(filename), names)
+            names[filename], asset = build_asset(filename, text, content_type)
+            assets["/static/" + names[filename]] = asset
+            print(f"{filename}: {len(text.encode())} -> {len(asset[2])} compressed as {names[filename]}")
+
+    pages = {}
+    for filename in filenames:
+        if not filename.endswith(".html"):
+            continue
+        html = link_assets(_read(filename), names)
+        page = build_page(html)
+        check_page(html, page)
+        name = filename[:-5].upper()
+        pages[name] = page
+        compressed = sum(len(part[0]) for part in page[0])
+        print(f"{filename}: {len(html.encode())} -> {sum(part[1] for part in page[0])} minified "
+              f"-> {compressed} compressed, slots {', '.join(page[1])}")
+    write_module(pages, assets)
+    print(f"Written {os.path.relpath(OUTPUT, ROOT)}")
+
+
+if __name__ == "__main__":
+    main()
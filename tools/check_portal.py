@@ -0,0 +1,818 @@
+"""Host checks of the provisioning portal.
+
+Runs with CPython, no board needed. The MicroPython modules are replaced by the stand-ins of
+tools/standins.py, the portal serves its pages on 127.0.0.1 to clients of this script:
+
+    python tools/check_portal.py
+    python tools/check_portal.py pages parse_form --rounds 1000
+
+Every check raises AssertionError on the first failure and prints a summary line
+otherwise.
+"""
+
+import argparse
+import asyncio
+import contextlib
+import gzip
+import io
+import os
+import random
+import re
+import shutil
+import tempfile
+import time
+import tracemalloc
+import urllib.parse
+import zlib
+
+import standins
+
+standins.install()
+
+from sensor import access_point, credentials, pages, portal_assets  # noqa: E402
+from sensor.captive_dns import DnsResponder  # noqa: E402
+from sensor.http_request import (MAX_BODY_SIZE, MAX_HEAD_SIZE, RequestError, RequestParser,  # noqa: E402
+                                 parse_form)
+from sensor.response import (CHUNK_SIZE, EMPTY_HEAD, HTML_HEAD, JSON_CHUNKED_HEAD, STATUS_LINES,  # noqa: E402
+                             ResponseWriter)
+
+ADDRESS = "192.168.4.1"
+HOST = "127.0.0.1"
+
+
+def dns_query(name: str, qtype: int = 1, query_id: int = 0x1234, flags: int = 0x0100) -> bytes:
+    question = b"".join(bytes((len(label),)) + label.encode() for label in name.split(".")) + b"\x00"
+    return (query_id.to_bytes(2, "big") + flags.to_bytes(2, "big") + b"\x00\x01\x00\x00\x00\x00\x00\x00"
+            + question + qtype.to_bytes(2, "big") + b"\x00\x01")
+
+
+def check_dns(rounds: int) -> None:
+    """Answers of DnsResponder for A, AAAA and malformed queries."""
+    responder = DnsResponder(ADDRESS)
+    query = dns_query("connectivitycheck.gstatic.com")
+    response = responder.answer(query)
+    assert response[:2] == query[:2], "id not copied"
+    assert response[2] & 0x80 and response[2] & 0x01, "no response with recursion desired"
+    assert response[4:8] == b"\x00\x01\x00\x01", "expected one question and one answer"
+    assert response[12:len(query)] == query[12:], "question not copied"
+    assert response[-4:] == bytes(int(part) for part in ADDRESS.split(".")), "wrong address"
+
+    response = responder.answer(dns_query("example.com", qtype=28))
+    assert response[6:8] == b"\x00\x00", "AAAA query must get no answer"
+    assert responder.answer(dns_query("example.com", flags=0x8100)) is None, "response answered"
+    assert responder.answer(dns_query("example.com", flags=0x2800)) is None, "update answered"
+
+    # truncated and random packets give None or IndexError, which DnsResponder.run drops
+    rng = random.Random(1)
+    for _ in range(rounds):
+        packet = bytearray(query[:rng.randrange(len(query) + 1)])
+        for _ in range(rng.randrange(4)):
+            if packet:
+                packet[rng.randrange(len(packet))] = rng.randrange(256)
+        try:
+            responder.answer(bytes(packet))
+        except IndexError:
+            pass
+    print(f"DNS: answers ok, {rounds} malformed packets dropped without other errors")
+
+
+class SegmentedReader:
+    """Stream delivering data in segments of at most size bytes, like a slow client."""
+    def __init__(self, data: bytes, size: int):
+        self._data = data
+        self._size = size
+
+    async def readinto(self, buffer) -> int:
+        count = min(len(buffer), self._size, len(self._data))
+        buffer[:count] = self._data[:count]
+        self._data = self._data[count:]
+        return count
+
+
+def _read(parser: RequestParser, data: bytes, size: int):
+    return asyncio.run(parser.read(SegmentedReader(data, size)))
+
+
+def _status(parser: RequestParser, data: bytes, size: int = 64) -> int:
+    try:
+        _read(parser, data, size)
+    except RequestError as e:
+        return e.status
+    return 200
+
+
+def check_request_parser() -> None:
+    """RequestParser with every segmentation of a request and the size limits."""
+    parser = RequestParser()
+    body = b"network=Gew%C3%A4chshaus&password=se%26cr+et"
+    data = (b"POST /connect?job=7 HTTP/1.1\r\nHost: 192.168.4.1\r\nAccept: application/json\r\n"
+            b"Content-Type: application/x-www-form-urlencoded\r\nContent-Length: %d\r\n\r\n" % len(body)
+            + body)
+    for size in range(1, len(data) + 1):
+        request = _read(parser, data, size)
+        assert request.method == "POST" and request.path == "/connect", size
+        assert request.headers["accept"] == "application/json", size
+        params = {name: bytes(value) for name, value in request.params.items()}
+        assert params == {"job": b"7", "network": "Gewächshaus".encode(), "password": b"se&cr et"}, size
+
+    get = b"GET /status?job=1 HTTP/1.1\r\nHost: 192.168.4.1\r\n\r\n"
+    assert _status(parser, get) == 200
+    assert _status(parser, b"GET / HTTP/1.1\r\nX: " + b"a" * MAX_HEAD_SIZE + b"\r\n\r\n") == 431
+    oversized = b"POST /connect HTTP/1.1\r\nContent-Length: %d\r\n\r\n" % (MAX_BODY_SIZE + 1)
+    assert _status(parser, oversized) == 413
+    assert _status(parser, b"POST /connect HTTP/1.1\r\nContent-Length: x\r\n\r\n") == 400
+    assert _status(parser, b"GARBAGE\r\n\r\n") == 400
+    assert _status(parser, b"GET / HTTP/1.1\r\nHost: a") == 400, "closed during head"
+    assert _status(parser, data[:-5]) == 400, "closed during body"
+    assert _status(parser, b"GET /?%ff=1 HTTP/1.1\r\n\r\n") == 400, "name no valid UTF-8"
+    assert _status(parser, b"GET / HTTP/1.1\r\nUser-Agent: \xff\r\n\r\n") == 400, "header no valid UTF-8"
+    assert _status(parser, b"G\xc3T / HTTP/1.1\r\n\r\n") == 400, "method no valid UTF-8"
+    assert _status(parser, b"GET /\xe4 HTTP/1.1\r\n\r\n") == 400, "path no valid UTF-8"
+    # the parser is reused after errors
+    assert _status(parser, get) == 200
+    print(f"Request parser: {len(data)} segmentations, the size limits and heads that are no UTF-8 ok")
+
+
+def _reference_form(data: bytes) -> dict:
+    """Form decoded by urllib.parse, pairs kept like parse_form does."""
+    params = {}
+    for pair in data.split(b"&"):
+        if pair:
+            name, _, value = pair.partition(b"=")
+            name = urllib.parse.unquote_to_bytes(name.replace(b"+", b" ")).decode()
+            params[name] = urllib.parse.unquote_to_bytes(value.replace(b"+", b" "))
+    return params
+
+
+def _legacy_unquote(string: bytes) -> bytearray:
+    """access_point.unquote before parse_form replaced it, kept for the timing comparison."""
+    bits = string.split(b"%")
+    if len(bits) == 1:
+        return string
+    res = bytearray(bits[0])
+    for item in bits[1:]:
+        res.append(int(item[:2], 16))
+        res.extend(item[2:])
+    return res
+
+
+def check_parse_form(rounds: int) -> None:
+    """parse_form against urllib.parse with random, partly malformed forms, and its speed."""
+    rng = random.Random(2)
+    # mostly whole characters and escapes, like forms of real SSIDs; the single bytes of an
+    # escaped umlaut and a stray 0xFF make a few names that are no UTF-8
+    tokens = [b"a", b"b", b"z", b"0", b"g", b"G", b" ", b"%", b"+", b"=", b"&", b"2F", b"%2F", b"%20",
+              "ä".encode(), "€".encode(), b"%C3%A4", b"%E2%82%AC", b"%e2%82%ac"]
+    broken = [b"%C3", b"%A4", b"%FF", b"\xff"]
+    compared = 0
+    rejected = 0
+    for _ in range(rounds):
+        form = b"".join(rng.choice(broken if rng.random() < 0.005 else tokens) for _ in range(rng.randrange(30)))
+        buffer = bytearray(b"<<" + form + b">>")
+        try:
+            params = parse_form(buffer, 2, 2 + len(form))
+        except ValueError:
+            # a name that is no valid UTF-8, the request parser answers 400
+            try:
+                _reference_form(form)
+            except UnicodeError:
+                rejected += 1
+                continue
+            raise AssertionError(f"valid form rejected: {form}")
+        assert {name: bytes(value) for name, value in params.items()} == _reference_form(form), form
+        assert buffer[:2] == b"<<" and buffer[-2:] == b">>", "wrote outside the form"
+        compared += 1
+    assert compared > rounds * 0.8, "too few forms with UTF-8 names"
+
+    # names that are no UTF-8, in the query and in the body of a request
+    parser = RequestParser()
+    for name in (b"%FF", b"%C3", b"a%C3%28", b"%E2%82", b"\xff"):
+        form = name + b"=1"
+        try:
+            parse_form(bytearray(form), 0, len(form))
+        except ValueError:
+            pass
+        else:
+            raise AssertionError(f"name {name} accepted")
+        assert _status(parser, b"GET /connect?" + form + b" HTTP/1.1\r\n\r\n") == 400, name
+        post = (b"POST /connect HTTP/1.1\r\nContent-Type: application/x-www-form-urlencoded\r\n"
+                b"Content-Length: %d\r\n\r\n" % len(form) + form)
+        assert _status(parser, post) == 400, name
+    # values are bytes and stay undecoded
+    assert _status(parser, b"GET /connect?network=%FF HTTP/1.1\r\n\r\n") == 200
+
+    # longest SSID and password, every byte escaped
+    ssid = "".join(f"%{byte:02X}" for byte in b"x" * 32).encode()
+    password = "".join(f"%{byte:02X}" for byte in b"y" * 63).encode()
+    form = b"network=" + ssid + b"&password=" + password
+    buffer = bytearray(form)
+    runs = 2000
+    start = time.perf_counter()
+    for _ in range(runs):
+        buffer[:] = form
+        parse_form(buffer, 0, len(form))
+    new_us = (time.perf_counter() - start) / runs * 1e6
+    start = time.perf_counter()
+    for _ in range(runs):
+        for pair in form.split(b"&"):
+            _legacy_unquote(pair.partition(b"=")[2])
+    legacy_us = (time.perf_counter() - start) / runs * 1e6
+    print(f"parse_form: {compared} of {rounds} random forms match urllib.parse, {rejected} with names that "
+          f"are no UTF-8 rejected like by urllib.parse, answered with 400 in requests; "
+          f"{new_us:.0f} us per long form (unquote before: {legacy_us:.0f} us on CPython)")
+
+
+def _percentile(values: list, share: float) -> float:
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * share))]
+
+
+NETWORKS = ["FRITZ!Box 7590 XY", "Gewächshaus", "Vodafone-Homespot", "o2-WLAN42", "Telekom_FON",
+            "<script>alert(1)</script>", "Nachbar & Co", "MagentaWLAN-7KQ2", "WLAN-Gast", "Pixel_4821",
+            "EasyBox-123456", "Schrebergarten", "TP-Link_2.4GHz_AB12", "iPhone von Ute", "Werkstatt"]
+
+
+def _portal(networks: list = NETWORKS) -> access_point.Portal:
+    """Portal on the stand-in interfaces, answering requests for HOST like for its own
+    address."""
+    portal = access_point.Portal(standins.WLAN(0), standins.WLAN(1))
+    portal.ap_ipv4 = HOST
+    portal._redirect = f"Location: http://{HOST}/\r\nConnection: close\r\n".encode()
+    portal.scanner.networks = list(networks)
+    portal.scanner.scanned_at = standins._ticks_ms()
+    return portal
+
+
+async def _serve(portal: access_point.Portal) -> tuple:
+    """Starts the server of portal on a free port like Portal.run, returns the server and the
+    port."""
+    server = await standins.uasyncio.start_server(portal._handle, HOST, 0, backlog=access_point.MAX_CONNECTIONS)
+    return server, server.sockets[0].getsockname()[1]
+
+
+async def _fetch(port: int, path: str, headers: dict = None, body: bytes = b"", method: str = None) -> dict:
+    """
+    Sends one request to the portal like a browser on the access point.
+
+    Returns
+    -------
+    dict
+        'status', lowercase 'headers', decoded 'body' without chunk framing and gzip, the
+        'wire' bytes received and 'ms' to the last byte. A connection closed without response
+        has the status None.
+    """
+    start = time.perf_counter()
+    reader, writer = await asyncio.open_connection(HOST, port)
+    head = f"{method or ('POST' if body else 'GET')} {path} HTTP/1.1\r\nHost: {HOST}\r\n"
+    for name, value in (headers or {}).items():
+        head += f"{name}: {value}\r\n"
+    if body:
+        head += f"Content-Type: application/x-www-form-urlencoded\r\nContent-Length: {len(body)}\r\n"
+    try:
+        writer.write(head.encode() + b"\r\n" + body)
+        await writer.drain()
+        response = await reader.read()
+    except ConnectionError:
+        # closed by the portal before the request was read, the host answers with a reset
+        response = b""
+    milliseconds = (time.perf_counter() - start) * 1000
+    writer.close()
+    if not response:
+        return {"status": None, "headers": {}, "body": b"", "wire": 0, "ms": milliseconds}
+    head, _, content = response.partition(b"\r\n\r\n")
+    lines = head.decode().split("\r\n")
+    fields = {}
+    for line in lines[1:]:
+        name, _, value = line.partition(":")
+        fields[name.strip().lower()] = value.strip()
+    if fields.get("transfer-encoding") == "chunked":
+        chunks, rest = [], content
+        while True:
+            size, _, rest = rest.partition(b"\r\n")
+            size = int(size, 16)
+            if not size:
+                break
+            chunks.append(rest[:size])
+            rest = rest[size + 2:]
+        content = b"".join(chunks)
+    if fields.get("content-encoding") == "gzip":
+        content = gzip.decompress(content)
+    return {"status": int(lines[0].split()[1]), "headers": fields, "body": content, "wire": len(response),
+            "ms": milliseconds}
+
+
+class _Sink:
+    """Client stream that accepts everything at once and only counts the bytes."""
+    def __init__(self):
+        self.count = 0
+
+    def write(self, data) -> None:
+        self.count += len(data)
+
+    async def drain(self) -> None:
+        pass
+
+
+def _page_text(page: tuple) -> list:
+    """Static parts of a pre-rendered page as str, like the old code had them in its source."""
+    return [zlib.decompress(part[0] + pages.FINAL_BLOCK, -portal_assets.WBITS).decode() for part in page[0]]
+
+
+async def _built_as_string(response: ResponseWriter, texts: list, networks: list) -> None:
+    """The page built the way build_index_html did before it was pre-rendered: one string
+    grown with +=, encoded and sent as a whole."""
+    html = texts[0]
+    for name in networks:
+        html += f"<option value='{access_point._escape(name)}'>{access_point._escape(name)}</option>\n"
+    html += texts[1]
+    await response.send(200, HTML_HEAD.replace(b"Transfer-Encoding: chunked\r\n", b"")[:-2], html.encode())
+
+
+def _peak_heap(coroutine_function, rounds: int = 5) -> int:
+    """Peak of the Python heap in bytes above the level before the coroutine runs, measured by
+    tracemalloc in a running event loop, smallest of rounds runs."""
+    async def run():
+        peaks = []
+        tracemalloc.start()
+        for _ in range(rounds):
+            base = tracemalloc.get_traced_memory()[0]
+            tracemalloc.reset_peak()
+            await coroutine_function()
+            peaks.append(tracemalloc.get_traced_memory()[1] - base)
+        tracemalloc.stop()
+        return min(peaks)
+    return asyncio.run(run())
+
+
+def check_pages(requests: int = 50) -> None:
+    """Time to last byte and peak heap of the form page, pre-rendered and sent as gzip or
+    decompressed on the fly, against building it as one string; the CRC and deflate fallbacks."""
+    async def run():
+        portal = _portal()
+        server, port = await _serve(portal)
+        timings = {"gzip": [], "plain": []}
+        bodies = {}
+        for _ in range(requests):
+            for kind in timings:
+                result = await _fetch(port, "/", {"Accept-Encoding": "gzip, deflate"} if kind == "gzip" else {})
+                assert result["status"] == 200, result
+                timings[kind].append(result["ms"])
+                bodies[kind] = result
+        assert bodies["gzip"]["body"] == bodies["plain"]["body"], "gzip and plain pages differ"
+        assert "&lt;script&gt;" in bodies["plain"]["body"].decode(), "network name not escaped"
+
+        # firmware without binascii.crc32 and without deflate
+        crc32, deflate = pages._crc32, pages.deflate
+        pages._crc32 = pages._crc32_python
+        fallback = await _fetch(port, "/", {"Accept-Encoding": "gzip"})
+        pages.deflate = None
+        without_deflate = await _fetch(port, "/")
+        pages._crc32, pages.deflate = crc32, deflate
+        assert fallback["body"] == without_deflate["body"] == bodies["plain"]["body"], "fallback page differs"
+        assert without_deflate["headers"]["content-encoding"] == "gzip"
+        server.close()
+        return timings, bodies
+
+    output = io.StringIO()
+    with contextlib.redirect_stdout(output):
+        timings, bodies = asyncio.run(run())
+
+    texts = _page_text(portal_assets.INDEX)
+    heaps = {}
+    for kind in ("gzip", "plain"):
+        async def send(kind=kind):
+            await pages.send(ResponseWriter(_Sink()), *access_point.build_index_html(NETWORKS), kind == "gzip")
+        heaps[kind] = _peak_heap(send)
+
+    async def send_string():
+        await _built_as_string(ResponseWriter(_Sink()), texts, NETWORKS)
+    heaps["string"] = _peak_heap(send_string)
+    # the plain page includes the state of the host's zlib, far larger than the window of
+    # WBITS the deflate module of the board allocates, so only gzip is held against the string
+    assert heaps["gzip"] < heaps["string"], heaps
+    print(f"Pages: form page with {len(NETWORKS)} networks, {len(bodies['plain']['body'])} bytes of HTML; "
+          f"time to last byte (median) gzip {_percentile(timings['gzip'], 0.5):.2f} ms "
+          f"({bodies['gzip']['wire']} bytes), plain {_percentile(timings['plain'], 0.5):.2f} ms "
+          f"({bodies['plain']['wire']} bytes); peak heap per request gzip {heaps['gzip']} B, "
+          f"plain {heaps['plain']} B with host zlib, built as one string {heaps['string']} B; CRC and deflate fallbacks ok")
+
+
+def _scan_result(names: list) -> list:
+    """WLAN.scan() entries for names, strongest first, each network seen by two access points."""
+    entries = []
+    for i, name in enumerate(names):
+        ssid = name if isinstance(name, bytes) else name.encode()
+        entries.append((ssid, bytes(6), 1, -40 - 2 * i, 3, 0))
+        entries.append((ssid, bytes(6), 6, -80 - i, 3, 0))
+    return entries
+
+
+def check_scan(requests: int = 30, scan_time: float = 0.5) -> None:
+    """Latency of the form page from the cached scan against /refresh, which scans like every
+    page load did before the cache; duplicates and non-UTF-8 names of the scan."""
+    wlan = standins.WLAN(0)
+    wlan.networks = _scan_result(NETWORKS[:8] + [b"\xff\xfeDirect-TV", NETWORKS[0]])
+    wlan.scan_time = scan_time
+
+    async def run():
+        portal = _portal([])
+        portal.scanner.refresh()
+        server, port = await _serve(portal)
+        cached = []
+        for _ in range(requests):
+            result = await _fetch(port, "/", {"Accept-Encoding": "gzip"})
+            assert result["status"] == 200, result
+            cached.append(result["ms"])
+        html = result["body"].decode()
+        assert html.count("<option") == 8, "network listed twice or non-UTF-8 name listed"
+        assert html.index(NETWORKS[0]) < html.index(NETWORKS[1]), "networks not sorted by signal"
+        wlan.networks = _scan_result(["Neues Netz"] + NETWORKS[:8])
+        scans = wlan.scans
+        refreshed = await _fetch(port, "/refresh", {"Accept-Encoding": "gzip"})
+        assert wlan.scans == scans + 1 and "Neues Netz" in refreshed["body"].decode(), "/refresh did not scan"
+        server.close()
+        return cached, refreshed["ms"]
+
+    with contextlib.redirect_stdout(io.StringIO()):
+        cached, refreshed = asyncio.run(run())
+    wlan.scan_time = 0
+    assert _percentile(cached, 0.95) < scan_time * 1000 / 10, cached
+    assert refreshed >= scan_time * 1000, refreshed
+    print(f"Scan: form page from the cache p95 {_percentile(cached, 0.95):.2f} ms, /refresh and every page "
+          f"load before the cache {refreshed:.0f} ms with a scan of {scan_time * 1000:.0f} ms; "
+          f"duplicates and non-UTF-8 names left out")
+
+
+def check_load(clients: int = 16, requests: int = 25) -> None:
+    """Throughput and p99 of the form page for one and for many concurrent clients, the
+    connections over MAX_CONNECTIONS closed at once, clients that stall their request dropped."""
+    async def client(port: int, timings: list, rejected: list) -> None:
+        for _ in range(requests):
+            result = await _fetch(port, "/", {"Accept-Encoding": "gzip"})
+            if result["status"] is None:
+                rejected.append(result["ms"])
+            else:
+                assert result["status"] == 200, result
+                timings.append(result["ms"])
+
+    async def load(port: int, count: int) -> tuple:
+        timings, rejected = [], []
+        start = time.perf_counter()
+        await asyncio.gather(*(client(port, timings, rejected) for _ in range(count)))
+        return timings, rejected, len(timings) / (time.perf_counter() - start)
+
+    async def run():
+        portal = _portal()
+        server, port = await _serve(portal)
+        results = {count: await load(port, count) for count in (1, clients)}
+        # clients that open a connection and never finish their request
+        stalled = []
+        for _ in range(access_point.MAX_CONNECTIONS):
+            reader, writer = await asyncio.open_connection(HOST, port)
+            writer.write(b"GET / HTTP/1.1\r\nHost: ")
+            stalled.append((reader, writer))
+        await asyncio.sleep(0.05)
+        assert portal.connections == access_point.MAX_CONNECTIONS, portal.connections
+        turned_away = await _fetch(port, "/")
+        await asyncio.sleep(access_point.CLIENT_TIMEOUT + 0.1)
+        served = await _fetch(port, "/")
+        for reader, writer in stalled:
+            assert await reader.read() == b"", "stalled client got a response"
+            writer.close()
+        server.close()
+        return results, turned_away, served, portal
+
+    timeout = access_point.CLIENT_TIMEOUT
+    access_point.CLIENT_TIMEOUT = 0.5
+    with contextlib.redirect_stdout(io.StringIO()):
+        results, turned_away, served, portal = asyncio.run(run())
+    access_point.CLIENT_TIMEOUT = timeout
+    assert turned_away["status"] is None and turned_away["ms"] < 100, "client over the limit not closed at once"
+    assert served["status"] == 200, "portal blocked after stalled clients"
+    single, many = results[1], results[clients]
+    assert not single[1] and many[0], "single client rejected or no client served"
+    # connects beyond the listen backlog of the host wait for the retry of their SYN after a
+    # second, which only shows in the tail
+    assert _percentile(many[0], 0.95) < 100, "p95 over 100 ms"
+    retried = sum(1 for milliseconds in many[0] if milliseconds >= 1000)
+    print(f"Load: 1 client {single[2]:.0f} pages/s p99 {_percentile(single[0], 0.99):.1f} ms; {clients} clients "
+          f"{many[2]:.0f} pages/s p95 {_percentile(many[0], 0.95):.1f} ms p99 {_percentile(many[0], 0.99):.1f} ms "
+          f"({retried} SYN retries), {len(many[1])} of "
+          f"{clients * requests} connections over {access_point.MAX_CONNECTIONS} closed at once; "
+          f"{access_point.MAX_CONNECTIONS} stalled clients dropped after CLIENT_TIMEOUT, "
+          f"{portal.rejected} rejected in total")
+
+
+class _SlowClient(_Sink):
+    """Client stream taking data only on drain, 256 bytes per event loop pass, remembers the
+    most bytes it ever held waiting."""
+    def __init__(self):
+        super().__init__()
+        self.waiting = 0
+        self.most_waiting = 0
+
+    def write(self, data) -> None:
+        super().write(data)
+        self.waiting += len(data)
+        self.most_waiting = max(self.most_waiting, self.waiting)
+
+    async def drain(self) -> None:
+        while self.waiting:
+            self.waiting = max(0, self.waiting - 256)
+            await asyncio.sleep(0)
+
+
+async def _send_joined(writer, body: bytes) -> None:
+    """A response the way the portal wrote it before ResponseWriter: head and body joined into
+    one bytes object, written and drained at once."""
+    writer.write(STATUS_LINES[200] + EMPTY_HEAD + b"Content-Length: %d\r\n\r\n" % len(body)
+                 + body)
+    await writer.drain()
+
+
+def check_response(size: int = 64 * 1024, rounds: int = 40) -> None:
+    """Heap, throughput over a socket and bytes waiting in the stream of ResponseWriter against
+    joining head and body into one object."""
+    body = bytes(random.Random(3).getrandbits(8) for _ in range(size))
+    heaps = {"writer": _peak_heap(lambda: ResponseWriter(_Sink()).send(200, EMPTY_HEAD, body)),
+             "joined": _peak_heap(lambda: _send_joined(_Sink(), body))}
+
+    slow = _SlowClient()
+    asyncio.run(ResponseWriter(slow).send(200, EMPTY_HEAD, body))
+    assert slow.count > size and slow.most_waiting <= CHUNK_SIZE + 64, slow.most_waiting
+
+    async def handler(reader, writer, send):
+        await reader.readline()
+        await send(writer)
+        writer.close()
+
+    async def run():
+        rates = {}
+        for kind, send in (("writer", lambda writer: ResponseWriter(writer).send(200, EMPTY_HEAD, body)),
+                           ("joined", lambda writer: _send_joined(writer, body))):
+            server = await standins.uasyncio.start_server(lambda r, w, send=send: handler(r, w, send), HOST, 0)
+            port = server.sockets[0].getsockname()[1]
+            timings = []
+            for _ in range(rounds):
+                result = await _fetch(port, "/")
+                assert result["body"] == body, kind
+                timings.append(result["ms"])
+            server.close()
+            rates[kind] = size / 1024 / _percentile(timings, 0.5) * 1000
+        return rates
+
+    rates = asyncio.run(run())
+    assert heaps["writer"] < size / 4 < heaps["joined"], heaps
+    print(f"Response: {size // 1024} KB body, peak heap ResponseWriter {heaps['writer']} B, joined "
+          f"{heaps['joined']} B; median throughput {rates['writer']:.0f} KB/s in {CHUNK_SIZE} byte "
+          f"slices, joined {rates['joined']:.0f} KB/s on the host; at most {slow.most_waiting} B waiting in "
+          f"a slow stream")
+
+
+async def _render_per_piece(response: ResponseWriter, template, values: dict) -> None:
+    """Template.render before it wrote the pieces as one chunk, each piece framed and drained
+    on its own."""
+    for piece in template.pieces(values):
+        await response.write(piece)
+
+
+def check_render(rounds: int = 5000) -> None:
+    """Renders/s, heap and chunked bytes of the status JSON, written as one chunk by
+    Template.render against a chunk per piece."""
+    job = access_point.CredentialCheck.__new__(access_point.CredentialCheck)
+    job.id, job.state, job.duration = 12, "success", 4321
+    values = job.json_values()
+    results = {}
+    for kind in ("render", "per piece"):
+        async def render(kind=kind):
+            response = ResponseWriter(_Sink())
+            await response.start(200, JSON_CHUNKED_HEAD)
+            if kind == "render":
+                await access_point.STATUS_JSON.render(response, values)
+            else:
+                await _render_per_piece(response, access_point.STATUS_JSON, values)
+            await response.end()
+            return response
+
+        async def run():
+            start = time.perf_counter()
+            for _ in range(rounds):
+                response = await render()
+            return rounds / (time.perf_counter() - start), response._writer.count, response.sent
+
+        rate, wire, sent = asyncio.run(run())
+        results[kind] = (rate, wire, sent, _peak_heap(render))
+    ours, before = results["render"], results["per piece"]
+    assert ours[2] == before[2] and ours[1] < before[1], results
+    assert ours[0] > before[0], "render slower than a chunk per piece"
+    print(f"Render: status JSON {ours[2]} B, {ours[0]:.0f} renders/s as one chunk against {before[0]:.0f} "
+          f"with a chunk per piece, {ours[1]} against {before[1]} B on the wire, peak heap {ours[3]} "
+          f"against {before[3]} B")
+
+
+# Interval of the status poll of the form page, tools/portal/index.html
+POLL_INTERVAL = 0.5
+
+
+async def _submit(port: int, ssid: bytes, password: bytes, json: bool) -> tuple:
+    """Submits the form like the page with fetch (json) or without JavaScript, polls /status
+    like the page. Returns the answer of the submit, the final result and the milliseconds
+    until it was known."""
+    body = urllib.parse.urlencode({"network": ssid, "password": password}).encode()
+    start = time.perf_counter()
+    submit = await _fetch(port, "/connect", {"Accept": "application/json"} if json else {}, body)
+    assert submit["status"] == 200, submit
+    if not json:
+        return submit, submit, submit["ms"]
+    job = int(submit["body"].split(b'"job": ')[1].split(b",")[0])
+    while True:
+        status = await _fetch(port, f"/status?job={job}")
+        if b'"running"' not in status["body"]:
+            break
+        await asyncio.sleep(POLL_INTERVAL)
+    result = await _fetch(port, f"/result?job={job}")
+    return submit, result, (time.perf_counter() - start) * 1000
+
+
+@contextlib.contextmanager
+def _credential_store():
+    """Lets the portal save credentials to a temporary directory, yields the directory."""
+    directory = tempfile.mkdtemp()
+    store = access_point.CredentialStore
+    access_point.CredentialStore = lambda: credentials.CredentialStore(os.path.join(directory, "wifi.json"))
+    try:
+        yield directory
+    finally:
+        access_point.CredentialStore = store
+        shutil.rmtree(directory)
+
+
+def check_credentials(connect_time: float = 0.4, scan_time: float = 0.3) -> None:
+    """Time from submit to connected for the background check polled by the page against the
+    plain submit that blocks until the check ends; pages and /refresh while a check runs;
+    names that are no UTF-8 and a store that cannot be written end the job with an error."""
+    wlan = standins.WLAN(0)
+    wlan.connect_time = connect_time
+    wlan.scan_time = scan_time
+    wlan.reachable = {"Gewächshaus".encode(): "geheim123", b"Gast\xff": "geheim123"}
+    ssid = "Gewächshaus".encode()
+
+    async def run(directory: str):
+        portal = _portal()
+        server, port = await _serve(portal)
+        results = {}
+        # the page of the background check, another client loading pages meanwhile
+        submit = asyncio.create_task(_submit(port, ssid, b"geheim123", True))
+        await asyncio.sleep(0.05)
+        scans = wlan.scans
+        during = [(await _fetch(port, path))["ms"] for path in ("/", "/refresh", "/")]
+        assert wlan.scans == scans, "/refresh scanned while the station associates"
+        results["fetch"] = await submit
+        assert portal._finished and b"check" in results["fetch"][1]["body"], "check not successful"
+        results["plain"] = await _submit(port, ssid, b"geheim123", False)
+        results["wrong"] = await _submit(port, ssid, b"falsch", True)
+        # percent-encoded bytes that are no UTF-8 in the name or the password
+        results["name"] = await _submit(port, b"Gast\xff", b"geheim123", True)
+        results["password"] = await _submit(port, ssid, b"geheim\xff", False)
+        writable = access_point.CredentialStore
+        access_point.CredentialStore = lambda: credentials.CredentialStore(os.path.join(directory, "no", "wifi.json"))
+        results["store"] = await _submit(port, ssid, b"geheim123", True)
+        access_point.CredentialStore = writable
+        server.close()
+        return results, during
+
+    with _credential_store() as directory, contextlib.redirect_stdout(io.StringIO()):
+        results, during = asyncio.run(run(directory))
+        saved = credentials.CredentialStore(os.path.join(directory, "wifi.json"))
+    wlan.connect_time = wlan.scan_time = 0
+    wlan.reachable = {}
+    assert saved.get("Gewächshaus") and saved.get("Gewächshaus")["password"] == "geheim123", "not saved"
+    for name in ("wrong", "name", "password", "store"):
+        assert b"close" in results[name][1]["body"], f"{name}: no error page"
+    assert "Gast\\xff" in results["name"][1]["body"].decode(), "name that is no UTF-8 not shown"
+    assert not wlan.isconnected(), "station kept a connection whose credentials were not saved"
+    fetch, plain = results["fetch"], results["plain"]
+    assert fetch[0]["ms"] < 100 and max(during) < 100, "submit or pages waited for the check"
+    assert plain[2] >= connect_time * 1000, plain[2]
+    print(f"Credentials: with a connect of {connect_time * 1000:.0f} ms the background check answers the "
+          f"submit in {fetch[0]['ms']:.1f} ms and shows the result after {fetch[2]:.0f} ms polling every "
+          f"{POLL_INTERVAL * 1000:.0f} ms, the blocking submit after {plain[2]:.0f} ms; pages during the check "
+          f"{max(during):.1f} ms, no scan; wrong password, names that are no UTF-8 and an unwritable store "
+          f"end in an error page")
+
+
+class _Browser:
+    """
+    Scripted browser going through the provisioning flow with the page's JavaScript: form page,
+    submit with fetch, polls of /status and the result page, each page with the assets it
+    references.
+
+    Parameters
+    ----------
+    cache : str
+        'none' fetches every asset on every page, 'names' fetches an asset once and then keeps
+        it for good like its Cache-Control allows, 'etag' revalidates every asset with
+        If-None-Match as on a reload.
+    """
+    def __init__(self, cache: str):
+        self.cache = cache
+        self.etags = {}
+        self.requests = 0
+        self.bytes = 0
+        self.not_modified = 0
+
+    async def get(self, port: int, path: str, headers: dict = None, body: bytes = b"") -> dict:
+        result = await _fetch(port, path, dict({"Accept-Encoding": "gzip, deflate"}, **(headers or {})), body)
+        self.requests += 1
+        self.bytes += result["wire"]
+        return result
+
+    async def page(self, port: int, path: str) -> dict:
+        result = await self.get(port, path)
+        assets = re.findall(rb"/static/[\w.-]+", result["body"])
+        while assets:
+            asset = assets.pop(0).decode()
+            if asset in self.etags and self.cache == "names":
+                continue
+            headers = {"If-None-Match": self.etags[asset]} if asset in self.etags and self.cache == "etag" else {}
+            fetched = await self.get(port, asset, headers)
+            if fetched["status"] == 304:
+                self.not_modified += 1
+                continue
+            assert fetched["status"] == 200, fetched
+            self.etags[asset] = fetched["headers"]["etag"]
+            # the background is referenced by the stylesheet
+            assets.extend(re.findall(rb"/static/[\w.-]+", fetched["body"]))
+        return result
+
+    async def provision(self, port: int, ssid: bytes, password: bytes) -> dict:
+        await self.page(port, "/")
+        body = urllib.parse.urlencode({"network": ssid, "password": password}).encode()
+        submit = await self.get(port, "/connect", {"Accept": "application/json"}, body)
+        job = int(submit["body"].split(b'"job": ')[1].split(b",")[0])
+        while b'"running"' in (await self.get(port, f"/status?job={job}"))["body"]:
+            await asyncio.sleep(POLL_INTERVAL)
+        return await self.page(port, f"/result?job={job}")
+
+
+def check_flow(visits: int = 2) -> None:
+    """Bytes and requests of the provisioning flow for a browser without cache, one keeping
+    the assets by their content-named path and one revalidating them with their ETag."""
+    wlan = standins.WLAN(0)
+    wlan.reachable = {"Gewächshaus".encode(): "geheim123"}
+
+    async def run():
+        browsers = {cache: _Browser(cache) for cache in ("none", "names", "etag")}
+        for browser in browsers.values():
+            portal = _portal()
+            server, port = await _serve(portal)
+            for _ in range(visits):
+                result = await browser.provision(port, "Gewächshaus".encode(), b"geheim123")
+                assert b"check" in result["body"], "flow did not end on the success page"
+            server.close()
+        return browsers
+
+    with _credential_store(), contextlib.redirect_stdout(io.StringIO()):
+        browsers = asyncio.run(run())
+    wlan.reachable = {}
+    none, names, etag = browsers["none"], browsers["names"], browsers["etag"]
+    assert names.bytes < etag.bytes < none.bytes, (none.bytes, names.bytes, etag.bytes)
+    assert etag.not_modified >= len(portal_assets.ASSETS), "assets not revalidated with 304"
+    print(f"Flow: {visits} provisioning flows, {none.bytes} B in {none.requests} requests without cache, "
+          f"{names.bytes} B in {names.requests} requests keeping the assets by name, {etag.bytes} B in "
+          f"{etag.requests} requests revalidating them ({etag.not_modified} answered with 304)")
+
+
+CHECKS = {
+    "dns": check_dns,
+    "request_parser": check_request_parser,
+    "parse_form": check_parse_form,
+    "response": check_response,
+    "render": check_render,
+    "pages": check_pages,
+    "scan": check_scan,
+    "load": check_load,
+    "credentials": check_credentials,
+    "flow": check_flow,
+}
+# checks taking the number of random inputs
+FUZZ_CHECKS = ("dns", "parse_form")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[0])
+    parser.add_argument("checks", nargs="*", metavar="check", help=f"one of {', '.join(CHECKS)}, all by default")
+    parser.add_argument("--rounds", type=int, default=20000, help="random inputs per fuzz check")
+    args = parser.parse_args()
+    for name in args.checks:
+        if name not in CHECKS:
+            parser.error(f"unknown check '{name}'")
+    for name in args.checks or CHECKS:
+        if name in FUZZ_CHECKS:
+            CHECKS[name](args.rounds)
+        else:
+            CHECKS[name]()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,1111 @@
+"""Host checks of the uplink and the local interfaces of the sensor in station mode.
+
+Runs with CPython, no board needed. The MicroPython modules are replaced by the stand-ins of
+tools/standins.py, servers and clients on the other end run on 127.0.0.1:
+
+    python tools/check_station.py
+    python tools/check_station.py http_client
+
+Every check raises AssertionError on the first failure and prints its measurements
+otherwise. Times are those of the host; they show orders of magnitude and regressions, the
+board is slower by a constant factor.
+"""
+
+import argparse
+import ast
+import asyncio
+import contextlib
+import io
+import json
+import os
+import random
+import socket
+import socketserver
+import ssl
+import subprocess
+import sys
+import tempfile
+import threading
+import zlib
+import time
+
+import standins
+
+standins.install()
+
+import sensor.batch as batch  # noqa: E402
+import sensor.commands as commands  # noqa: E402
+import sensor.config as config  # noqa: E402
+import sensor.credentials as credentials  # noqa: E402
+import sensor.events as events  # noqa: E402
+import sensor.http_client as http  # noqa: E402
+import sensor.local_api as local_api  # noqa: E402
+import sensor.mqtt as mqtt  # noqa: E402
+import sensor.reader as reader  # noqa: E402
+import sensor.resolver as resolver  # noqa: E402
+import sensor.timesync as timesync  # noqa: E402
+import sensor.wifi as wifi  # noqa: E402
+
+HOST = "127.0.0.1"
+
+
+def _percentile(values: list, share: float) -> float:
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * share))]
+
+
+class _SlowHandler(socketserver.StreamRequestHandler):
+    def handle(self):
+        length = 0
+        while True:
+            line = self.rfile.readline()
+            if not line or line == b"\r\n":
+                break
+            name, _, value = line.partition(b":")
+            if name.strip().lower() == b"content-length":
+                length = int(value)
+        self.rfile.read(length)
+        time.sleep(self.server.delay)
+        self.wfile.write(b"HTTP/1.1 200 OK\r\nContent-Length: 2\r\nConnection: close\r\n\r\nok")
+
+
+def _slow_server(delay: float) -> socketserver.ThreadingTCPServer:
+    """HTTP server in its own thread, answering every request with 200 after delay seconds."""
+    server = socketserver.ThreadingTCPServer((HOST, 0), _SlowHandler)
+    server.daemon_threads = True
+    server.delay = delay
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def _blocking_post(port: int, body: bytes) -> None:
+    """Upload the way urequests did it, blocking the caller until the answer is read."""
+    with socket.create_connection((HOST, port)) as sock:
+        sock.sendall(b"POST /api/data HTTP/1.1\r\nHost: x\r\nContent-Length: %d\r\n\r\n" % len(body) + body)
+        while sock.recv(1024):
+            pass
+
+
+async def _cadence(interval: float, duration: float, upload=None) -> list:
+    """Lateness in ms of a loop sleeping interval seconds, like the measuring loop, while
+    upload() runs repeatedly in another task."""
+    async def uploads():
+        while True:
+            await upload()
+
+    task = asyncio.create_task(uploads()) if upload else None
+    lateness = []
+    end = time.monotonic() + duration
+    while time.monotonic() < end:
+        due = time.monotonic() + interval
+        await asyncio.sleep(interval)
+        lateness.append((time.monotonic() - due) * 1000)
+    if task:
+        task.cancel()
+    return lateness
+
+
+def check_http_client() -> None:
+    """Sampling cadence while uploads run against a slow server, and the phase timeouts."""
+    async def run():
+        server = _slow_server(0.5)
+        port = server.server_address[1]
+        url = f"http://{HOST}:{port}/api/data"
+        body = b'{"temperature": 21.5}' * 20
+        loop = asyncio.get_running_loop()
+
+        idle = await _cadence(0.1, 2)
+        uploads = []
+
+        async def post():
+            res = await http.post(url, body)
+            assert res.status == 200
+            uploads.append(res.timings)
+        busy = await _cadence(0.1, 3, post)
+
+        async def blocking_post():
+            # blocks the loop like urequests inside the measuring loop
+            _blocking_post(port, body)
+            await asyncio.sleep(0)
+        blocking = await _cadence(0.1, 3, blocking_post)
+
+        # a server that never answers costs the response timeout, nothing more
+        silent = await asyncio.start_server(lambda reader, writer: None, HOST, 0)
+        start = loop.time()
+        try:
+            await http.post(f"http://{HOST}:{silent.sockets[0].getsockname()[1]}/",
+                            body, timeouts={"response": 0.3})
+            raise AssertionError("no timeout")
+        except http.PhaseTimeout as e:
+            assert e.phase == "response", e.phase
+        assert loop.time() - start < 0.5
+        server.shutdown()
+        silent.close()
+        return idle, busy, blocking, uploads
+
+    idle, busy, blocking, uploads = asyncio.run(run())
+    assert uploads, "no upload finished"
+    # the host schedules this process with some jitter, so the 95th percentile is checked
+    assert _percentile(busy, 0.95) < 20, f"sampling delayed by {_percentile(busy, 0.95):.0f} ms while uploading"
+    assert max(blocking) > 400, "the blocking baseline should stall the loop"
+    print(f"HTTP client: {len(uploads)} uploads of 0.5 s each; lateness of the 100 ms cadence "
+          f"(95th percentile / max) idle {_percentile(idle, 0.95):.1f}/{max(idle):.1f} ms, "
+          f"uploading {_percentile(busy, 0.95):.1f}/{max(busy):.1f} ms, "
+          f"blocking uploads {_percentile(blocking, 0.95):.0f}/{max(blocking):.0f} ms; response timeout ok")
+
+
+class _Broker:
+    """
+    MQTT broker stand-in, acknowledging CONNECT, PUBLISH with QoS 1 and PINGREQ.
+
+    Attributes
+    ----------
+    received : list
+        (topic, payload, monotonic time of arrival) of every PUBLISH.
+    return_code : int
+        Return code sent in CONNACK, 0 accepts the connection.
+    answer_pings : bool
+        False lets PINGREQ go unanswered, like a broker behind a dead path.
+    """
+    def __init__(self):
+        self.received = []
+        self.return_code = 0
+        self.answer_pings = True
+        self.disconnects = 0
+        self.server = None
+
+    async def start(self) -> int:
+        self.server = await asyncio.start_server(self._client, HOST, 0)
+        return self.server.sockets[0].getsockname()[1]
+
+    async def _client(self, reader, writer):
+        try:
+            while True:
+                header = (await reader.readexactly(1))[0]
+                length, shift = 0, 0
+                while True:
+                    byte = (await reader.readexactly(1))[0]
+                    length |= (byte & 0x7F) << shift
+                    shift += 7
+                    if not byte & 0x80:
+                        break
+                body = await reader.readexactly(length)
+                kind = header & 0xF0
+                if kind == mqtt.CONNECT:
+                    writer.write(bytes((mqtt.CONNACK, 2, 0, self.return_code)))
+                elif kind == mqtt.PUBLISH:
+                    size = int.from_bytes(body[:2], "big")
+                    topic, rest = body[2:2 + size], body[2 + size:]
+                    if header & 0x06:
+                        writer.write(bytes((mqtt.PUBACK, 2)) + rest[:2])
+                        rest = rest[2:]
+                    self.received.append((topic, rest, time.monotonic()))
+                elif kind == mqtt.PINGREQ and self.answer_pings:
+                    writer.write(bytes((mqtt.PINGRESP, 0)))
+                elif kind == mqtt.DISCONNECT:
+                    self.disconnects += 1
+                    break
+                await writer.drain()
+        except (OSError, asyncio.IncompleteReadError):
+            pass
+        writer.close()
+
+
+def check_mqtt(messages: int = 300) -> None:
+    """Throughput and latency of MQTT publishing against one HTTP POST per reading, CONNACK
+    validation, the PINGRESP check and a quiet graceful disconnect."""
+    async def run():
+        broker = _Broker()
+        port = await broker.start()
+        client = mqtt.MQTTClient("check", HOST, port)
+
+        start = time.monotonic()
+        sent = []
+        for i in range(messages):
+            sent.append(time.monotonic())
+            await client.publish("greenhouse/data", b'{"temperature": 21.5, "n": %d}' % i)
+        while client._inflight:
+            await asyncio.sleep(0.001)
+        mqtt_time = time.monotonic() - start
+        assert len(broker.received) == messages, len(broker.received)
+        mqtt_latency = [(arrival - sent[i]) * 1000 for i, (_, _, arrival) in enumerate(broker.received)]
+
+        output = io.StringIO()
+        with contextlib.redirect_stdout(output):
+            await client.disconnect()
+        await asyncio.sleep(0.05)
+        assert not output.getvalue() and broker.disconnects == 1, output.getvalue()
+
+        server = _slow_server(0)
+        url = f"http://{HOST}:{server.server_address[1]}/api/data"
+        http_latency = []
+        start = time.monotonic()
+        for i in range(messages):
+            begin = time.monotonic()
+            res = await http.post(url, b'{"temperature": 21.5, "n": %d}' % i)
+            assert res.status == 200
+            http_latency.append((time.monotonic() - begin) * 1000)
+        http_time = time.monotonic() - start
+        server.shutdown()
+
+        broker.return_code = 5
+        try:
+            await mqtt.MQTTClient("check", HOST, port).connect()
+            raise AssertionError("refused CONNACK accepted")
+        except OSError as e:
+            assert "not authorized" in str(e), e
+
+        broker.return_code = 0
+        broker.answer_pings = False
+        silent = mqtt.MQTTClient("check", HOST, port, keepalive=2)
+        with contextlib.redirect_stdout(output):
+            await silent.connect()
+            await asyncio.sleep(2.5)
+        assert not silent.connected, "connection kept without PINGRESP"
+        broker.server.close()
+        return mqtt_time, mqtt_latency, http_time, http_latency
+
+    mqtt_time, mqtt_latency, http_time, http_latency = asyncio.run(run())
+    assert mqtt_time < http_time, "MQTT slower than one POST per reading"
+    print(f"MQTT: {messages} readings in {mqtt_time * 1000:.0f} ms ({messages / mqtt_time:.0f}/s), "
+          f"latency median {_percentile(mqtt_latency, 0.5):.2f} ms, 95th percentile "
+          f"{_percentile(mqtt_latency, 0.95):.2f} ms; HTTP POST {http_time * 1000:.0f} ms "
+          f"({messages / http_time:.0f}/s), median {_percentile(http_latency, 0.5):.2f} ms, "
+          f"95th percentile {_percentile(http_latency, 0.95):.2f} ms; CONNACK, PINGRESP and disconnect ok")
+
+
+async def _get(port: int, path: str, headers: dict = None) -> tuple:
+    """GET request from a host client, returns status, lowercase headers and body."""
+    reader, writer = await asyncio.open_connection(HOST, port)
+    head = f"GET {path} HTTP/1.1\r\nHost: pico\r\n"
+    for name, value in (headers or {}).items():
+        head += f"{name}: {value}\r\n"
+    writer.write(head.encode() + b"\r\n")
+    await writer.drain()
+    response = await reader.read()
+    writer.close()
+    head, _, body = response.partition(b"\r\n\r\n")
+    lines = head.decode().split("\r\n")
+    fields = {}
+    for line in lines[1:]:
+        name, _, value = line.partition(":")
+        fields[name.strip().lower()] = value.strip()
+    return int(lines[0].split()[1]), fields, body
+
+
+def _reading(n: int) -> dict:
+    reading = {"temperature": 21.5, "humidity": 55.0, "sample": n}
+    for zone in local_api.ZONES:
+        reading[f"soil_humidity_{zone}"] = 40 + zone
+        reading[f"emg_stop_pump{zone}"] = False
+    return reading
+
+
+def check_local_api(clients: int = 8, requests: int = 100) -> None:
+    """Requests per second of the snapshot API under concurrent clients, half of them
+    revalidating with If-None-Match, and the ETag of every new sample."""
+    async def run():
+        snapshot = local_api.Snapshot()
+        snapshot.update(_reading(0), {"uptime": 1})
+        api = local_api.LocalApi(snapshot)
+        server = await asyncio.start_server(api._handle, HOST, 0)
+        port = server.sockets[0].getsockname()[1]
+
+        status, headers, body = await _get(port, "/api/current")
+        assert status == 200 and headers["etag"] == snapshot.etag.decode(), (status, headers)
+        assert json.loads(body)["sample"] == 0
+        etag = headers["etag"]
+        status, headers, body = await _get(port, "/api/current", {"If-None-Match": etag})
+        assert status == 304 and not body, (status, body)
+        status, _, body = await _get(port, "/api/zones/2")
+        assert status == 200 and json.loads(body)["soil_humidity"] == 42
+        assert (await _get(port, "/api/zones/4"))[0] == 404
+
+        etags = {etag}
+        for n in range(1, 20):
+            snapshot.update(_reading(n), {"uptime": n})
+            status, headers, _ = await _get(port, "/api/current", {"If-None-Match": etag})
+            assert status == 200 and headers["etag"] not in etags, headers
+            etag = headers["etag"]
+            etags.add(etag)
+
+        answers = {200: 0, 304: 0}
+
+        async def client(number):
+            for i in range(requests):
+                fields = {"If-None-Match": etag} if (number + i) % 2 else {}
+                status, _, _ = await _get(port, ("/api/current", "/api/health", "/api/zones/1")[i % 3], fields)
+                answers[status] += 1
+
+        start = time.monotonic()
+        await asyncio.gather(*(client(number) for number in range(clients)))
+        elapsed = time.monotonic() - start
+        server.close()
+        return answers, elapsed, api.requests
+
+    answers, elapsed, served = asyncio.run(run())
+    total = clients * requests
+    assert answers[200] + answers[304] == total and answers[304] > 0, answers
+    print(f"Local API: {total} requests of {clients} clients in {elapsed * 1000:.0f} ms "
+          f"({total / elapsed:.0f}/s), {answers[304]} answered with 304; {served} served in total, "
+          f"new ETag on every sample ok")
+
+
+async def _subscribe(port: int) -> tuple:
+    """Opens /api/stream, returns the status and the stream pair."""
+    reader, writer = await asyncio.open_connection(HOST, port)
+    writer.write(b"GET /api/stream HTTP/1.1\r\nHost: pico\r\n\r\n")
+    await writer.drain()
+    head = await reader.readuntil(b"\r\n\r\n")
+    return int(head.split()[1]), reader, writer
+
+
+async def _next_event(reader) -> dict:
+    while True:
+        message = await reader.readuntil(b"\n\n")
+        if not message.startswith(b":"):
+            return json.loads(message.split(b"data: ", 1)[1])
+
+
+def check_stream(events_per_client: int = 50) -> None:
+    """Latency from EventBus.emit to the stream clients for 1 to MAX_SUBSCRIBERS clients, the
+    subscriber limit and the disconnect of a client falling behind."""
+    async def run():
+        bus = events.EventBus()
+        api = local_api.LocalApi(local_api.Snapshot(), events=bus)
+        server = await asyncio.start_server(api._handle, HOST, 0)
+        port = server.sockets[0].getsockname()[1]
+
+        latencies = {}
+        clients = []
+        for count in range(1, local_api.MAX_SUBSCRIBERS + 1):
+            status, reader, writer = await _subscribe(port)
+            assert status == 200, status
+            clients.append((reader, writer))
+            while api.subscribers < count:
+                await asyncio.sleep(0.001)
+            latency = []
+            for n in range(events_per_client):
+                bus.emit("sample", {"n": n, "sent": time.monotonic()})
+                for reader, _ in clients:
+                    event = await _next_event(reader)
+                    assert event["n"] == n, event
+                    latency.append((time.monotonic() - event["sent"]) * 1000)
+            latencies[count] = latency
+
+        status, _, extra = await _subscribe(port)
+        assert status == 503, f"subscriber {local_api.MAX_SUBSCRIBERS + 1} accepted"
+        extra.close()
+
+        # more events than a client buffers arrive before its writer task runs
+        for n in range(local_api.MAX_BUFFERED_EVENTS + 1):
+            bus.emit("pump", {"zone": 1, "on": n % 2 == 0})
+        while api.subscribers:
+            await asyncio.sleep(0.001)
+        assert api.stream_stats["dropped"] == local_api.MAX_SUBSCRIBERS, api.stream_stats
+        for _, writer in clients:
+            writer.close()
+        server.close()
+        return latencies, api.stream_stats
+
+    latencies, stats = asyncio.run(run())
+    assert _percentile(latencies[local_api.MAX_SUBSCRIBERS], 0.95) < 50, latencies
+    summary = ", ".join(f"{count}: {_percentile(latency, 0.5):.2f}/{_percentile(latency, 0.95):.2f}"
+                        for count, latency in latencies.items())
+    print(f"Event stream: latency from emit to client in ms (median/95th percentile) by number of "
+          f"clients {summary}; {stats['max_latency_ms']} ms highest latency in stream_stats; "
+          f"client {local_api.MAX_SUBSCRIBERS + 1} refused with 503, overflowing clients dropped ok")
+
+
+class _NtpServer(asyncio.DatagramProtocol):
+    """
+    NTP server stand-in on the clock of the host plus the ticks moved by standins.advance.
+
+    Attributes
+    ----------
+    delay : float
+        Seconds between receipt of a request and the answer.
+    reply : str
+        'good', or a broken answer: 'short', 'client' (wrong mode), 'kod' (stratum 0),
+        'foreign' (wrong origin timestamp) or 'late' (a foreign answer before the good one).
+    """
+    def __init__(self):
+        self.delay = 0
+        self.reply = "good"
+        self.transport = None
+
+    def connection_made(self, transport):
+        self.transport = transport
+
+    @staticmethod
+    def _timestamp() -> bytes:
+        now = time.time() + standins._ticks_offset / 1000 + timesync.NTP_UNIX_DELTA
+        return int(now).to_bytes(4, "big") + int(now % 1 * (1 << 32)).to_bytes(4, "big")
+
+    def datagram_received(self, data, address):
+        asyncio.get_running_loop().create_task(self._answer(data, address, self._timestamp()))
+
+    async def _answer(self, request, address, received):
+        await asyncio.sleep(self.delay)
+        origin = b"\0" * 8 if self.reply in ("foreign", "late") else request[40:48]
+        packet = bytearray(bytes((0x1C, 2, 6, 0xEC)) + bytes(20) + origin + received + self._timestamp())
+        if self.reply == "short":
+            packet = packet[:40]
+        elif self.reply == "client":
+            packet[0] = 0x1B
+        elif self.reply == "kod":
+            packet[1] = 0
+            packet[12:16] = b"RATE"
+        self.transport.sendto(packet, address)
+        if self.reply == "late":
+            packet[24:32] = request[40:48]
+            self.transport.sendto(packet, address)
+
+
+def check_timesync() -> None:
+    """Accuracy of a synchronisation against an NTP stand-in with delayed answers, rejection of
+    broken answers and the time base across a wrap of ticks_ms."""
+    async def run():
+        loop = asyncio.get_running_loop()
+        transport, server = await loop.create_datagram_endpoint(_NtpServer, local_addr=(HOST, 0))
+        sync = timesync.TimeSync(HOST, port=transport.get_extra_info("sockname")[1])
+
+        def error() -> float:
+            return sync.now_ms() - (time.time() * 1000 + standins._ticks_offset)
+
+        errors = {}
+        for delay in (0, 0.05, 0.2):
+            server.delay = delay
+            await sync.sync()
+            errors[delay] = error()
+
+        server.delay = 0
+        rejected = []
+        for reply in ("short", "client", "kod", "foreign"):
+            server.reply = reply
+            try:
+                await sync.sync()
+                raise AssertionError(f"{reply} answer accepted")
+            except OSError as e:
+                rejected.append(f"{reply} ({e})")
+        server.reply = "late"
+        await sync.sync()
+        server.reply = "good"
+
+        # syncs a few ms apart measure the drift of the host clock badly, start afresh
+        sync = timesync.TimeSync(HOST, port=sync.port)
+        await sync.sync()
+        # 10 days without the server, longer than ticks_diff reaches
+        wrong = sync.now_ms(standins._ticks_ms() + 7 * 86400 * 1000 % standins.TICKS_PERIOD)
+        for _ in range(10):
+            standins.advance(timesync.REANCHOR_INTERVAL * 1000)
+            sync._reanchor()
+        drifted = error()
+        await sync.sync()
+        transport.close()
+        return errors, rejected, wrong, drifted, error(), sync.drift_ppm
+
+    timesync.NTP_TIMEOUT = 0.3
+    output = io.StringIO()
+    with contextlib.redirect_stdout(output):
+        errors, rejected, wrong, drifted, synced, drift = asyncio.run(run())
+    assert all(abs(value) < 20 for value in errors.values()), errors
+    assert wrong < time.time() * 1000, "ticks_diff should wrap without moving the base"
+    assert abs(drifted) < 20 and abs(synced) < 20 and abs(drift) < 50, (drifted, synced, drift)
+    print(f"Time sync: error after sync with a server delay of "
+          f"{', '.join(f'{delay * 1000:.0f} ms: {value:.1f} ms' for delay, value in errors.items())}; "
+          f"rejected {', '.join(rejected)}; late foreign answer skipped; "
+          f"10 days without server {drifted:.1f} ms off, {synced:.1f} ms and drift {drift} ppm after the next sync")
+
+
+class _DnsServer(asyncio.DatagramProtocol):
+    """
+    DNS server stand-in answering A queries.
+
+    Attributes
+    ----------
+    records : dict
+        Hostname to (address, ttl), other names are answered with NXDOMAIN.
+    delay : float
+        Seconds between receipt of a query and the answer.
+    silent : bool
+        True drops every query, like an unreachable server.
+    queries : int
+        Number of queries received.
+    """
+    def __init__(self):
+        self.records = {}
+        self.delay = 0
+        self.silent = False
+        self.queries = 0
+        self.transport = None
+
+    def connection_made(self, transport):
+        self.transport = transport
+
+    def datagram_received(self, data, address):
+        self.queries += 1
+        if not self.silent:
+            asyncio.get_running_loop().create_task(self._answer(data, address))
+
+    async def _answer(self, query, address):
+        await asyncio.sleep(self.delay)
+        labels, offset = [], 12
+        while query[offset]:
+            labels.append(query[offset + 1:offset + 1 + query[offset]].decode())
+            offset += query[offset] + 1
+        question = query[12:offset + 5]
+        record = self.records.get(".".join(labels))
+        if record is None:
+            self.transport.sendto(query[:2] + b"\x81\x83\x00\x01\x00\x00\x00\x00\x00\x00" + question, address)
+            return
+        ip, ttl = record
+        answer = (b"\xc0\x0c\x00\x01\x00\x01" + ttl.to_bytes(4, "big") + b"\x00\x04"
+                  + bytes(int(part) for part in ip.split(".")))
+        self.transport.sendto(query[:2] + b"\x81\x80\x00\x01\x00\x01\x00\x00\x00\x00" + question + answer,
+                              address)
+
+
+def check_resolver(lookups: int = 200) -> None:
+    """Latency of cached and uncached lookups against a DNS stand-in with a 20 ms delay, the
+    sampling cadence meanwhile, negative caching and stale addresses while the server is down."""
+    async def run():
+        loop = asyncio.get_running_loop()
+        transport, server = await loop.create_datagram_endpoint(_DnsServer, local_addr=(HOST, 0))
+        resolver.DNS_PORT = transport.get_extra_info("sockname")[1]
+        resolver._dns_server = lambda: HOST
+        server.delay = 0.02
+        hosts = [f"host{n}.example" for n in range(lookups)]
+        for n, host in enumerate(hosts):
+            server.records[host] = (f"10.0.{n // 256}.{n % 256}", 300)
+
+        uncached = []
+
+        async def lookup():
+            for host in hosts:
+                start = time.monotonic()
+                assert await resolver.resolve(host) == server.records[host][0]
+                uncached.append((time.monotonic() - start) * 1000)
+        task = asyncio.create_task(lookup())
+        lateness = []
+        while not task.done():
+            due = time.monotonic() + 0.01
+            await asyncio.sleep(0.01)
+            lateness.append((time.monotonic() - due) * 1000)
+        await task
+        queries = server.queries
+        cached = []
+        for host in hosts:
+            start = time.monotonic()
+            await resolver.resolve(host)
+            cached.append((time.monotonic() - start) * 1000)
+        assert server.queries == queries, "cached lookups queried the server"
+
+        for _ in range(2):
+            try:
+                await resolver.resolve("missing.example")
+                raise AssertionError("unknown host resolved")
+            except OSError:
+                pass
+        assert server.queries == queries + 1, "NXDOMAIN not cached"
+
+        server.silent = True
+        resolver.QUERY_TIMEOUT = 0.1
+        standins.advance(resolver.MAX_TTL * 1000)
+        output = io.StringIO()
+        with contextlib.redirect_stdout(output):
+            assert await resolver.resolve(hosts[0]) == server.records[hosts[0]][0]
+        assert await resolver.resolve(hosts[0]) == server.records[hosts[0]][0]
+        assert server.queries == queries + 2, "failed lookup not cached"
+        standins.advance(resolver.STALE_TTL * 1000)
+        try:
+            await resolver.resolve(hosts[1])
+            raise AssertionError("address served after STALE_TTL")
+        except OSError:
+            pass
+        transport.close()
+        return uncached, cached, lateness
+
+    uncached, cached, lateness = asyncio.run(run())
+    assert _percentile(cached, 0.95) < 1 and _percentile(lateness, 0.95) < 10, (cached, lateness)
+    print(f"Resolver: {lookups} lookups median/95th percentile uncached {_percentile(uncached, 0.5):.1f}/"
+          f"{_percentile(uncached, 0.95):.1f} ms, cached {_percentile(cached, 0.5) * 1000:.0f}/"
+          f"{_percentile(cached, 0.95) * 1000:.0f} us; 10 ms cadence late by {_percentile(lateness, 0.95):.1f} ms "
+          f"(95th percentile) during lookups; negative cache, stale address and its expiry ok; {resolver.stats}")
+
+
+def _tls_context(directory: str) -> ssl.SSLContext:
+    """Server context with a self-signed P-256 certificate made by the openssl command."""
+    key, cert = os.path.join(directory, "key.pem"), os.path.join(directory, "cert.pem")
+    subprocess.run(["openssl", "req", "-x509", "-newkey", "ec", "-pkeyopt", "ec_paramgen_curve:prime256v1",
+                    "-nodes", "-subj", "/CN=localhost", "-days", "1", "-keyout", key, "-out", cert],
+                   check=True, capture_output=True)
+    context = ssl.SSLContext(ssl.PROTOCOL_TLS_SERVER)
+    context.load_cert_chain(cert, key)
+    return context
+
+
+async def _upload_server(context=None) -> tuple:
+    """HTTP server answering every request with 200, returns the server and the number of
+    TLS sessions that were resumed."""
+    resumed = [0]
+
+    async def handle(reader, writer):
+        head = await reader.readuntil(b"\r\n\r\n")
+        length = 0
+        for line in head.split(b"\r\n"):
+            name, _, value = line.partition(b":")
+            if name.strip().lower() == b"content-length":
+                length = int(value)
+        await reader.readexactly(length)
+        if context and writer.get_extra_info("ssl_object").session_reused:
+            resumed[0] += 1
+        writer.write(b"HTTP/1.1 200 OK\r\nContent-Length: 0\r\nConnection: close\r\n\r\n")
+        await writer.drain()
+        writer.close()
+    return await asyncio.start_server(handle, HOST, 0, ssl=context), resumed
+
+
+def check_tls(uploads: int = 30) -> None:
+    """Cost of a full TLS handshake per upload against a local TLS server, and its count in
+    tls_stats."""
+    async def run(context):
+        plain, _ = await _upload_server()
+        secure, resumed = await _upload_server(context)
+        body = b'{"temperature": 21.5}' * 20
+        durations = {}
+        for scheme, server in (("http", plain), ("https", secure)):
+            url = f"{scheme}://{HOST}:{server.sockets[0].getsockname()[1]}/api/data"
+            durations[scheme] = []
+            for _ in range(uploads):
+                start = time.monotonic()
+                assert (await http.post(url, body)).status == 200
+                durations[scheme].append((time.monotonic() - start) * 1000)
+            server.close()
+        return durations, resumed[0]
+
+    http.tls_stats.update(handshakes=0, handshake_ms=0)
+    with tempfile.TemporaryDirectory() as directory:
+        durations, resumed = asyncio.run(run(_tls_context(directory)))
+    assert http.tls_stats["handshakes"] == uploads, http.tls_stats
+    assert not resumed, "MicroPython cannot resume sessions, the stand-in should not either"
+    plain, secure = _percentile(durations["http"], 0.5), _percentile(durations["https"], 0.5)
+    print(f"TLS: {uploads} uploads each, median {plain:.2f} ms over HTTP and {secure:.2f} ms over HTTPS, "
+          f"{secure - plain:.2f} ms per full handshake; {http.handshake_summary()}, none resumed")
+
+
+def check_batch(sizes: tuple = (1, 5, 10, 30, 60), rounds: int = 20) -> None:
+    """Bytes on the air and CPU time per reading for batches with and without deflate, checked
+    by a server stand-in that inflates and parses every body."""
+    received = []
+
+    async def handle(reader, writer):
+        head = await reader.readuntil(b"\r\n\r\n")
+        fields = dict(line.split(b": ", 1) for line in head.split(b"\r\n")[1:] if b": " in line)
+        body = await reader.readexactly(int(fields[b"Content-Length"]))
+        if fields.get(b"Content-Encoding") == b"deflate":
+            body = zlib.decompress(body)
+        received.append(json.loads(body))
+        writer.write(b"HTTP/1.1 204 No Content\r\nConnection: close\r\n\r\n")
+        await writer.drain()
+        writer.close()
+
+    async def upload(payload, compress):
+        server = await asyncio.start_server(handle, HOST, 0)
+        body, headers = batch.encode_body(payload, compress)
+        await http.post(f"http://{HOST}:{server.sockets[0].getsockname()[1]}/api/data", body, headers)
+        server.close()
+        assert received.pop() == payload, "body changed on its way"
+
+    batch.io = standins.micropython_io
+    results = []
+    for size in sizes:
+        # readings of a day in the greenhouse, values moving a little from sample to sample
+        values = random.Random(size)
+        payload = [dict(_reading(n), timestamp=1760000000000 + n * 60000,
+                        temperature=round(21 + values.uniform(-3, 3), 1),
+                        humidity=round(55 + values.uniform(-10, 10), 1),
+                        soil_humidity_1=values.randint(30, 60)) for n in range(size)]
+        row = [size]
+        for compress in (False, True):
+            batch.stats.update(raw_bytes=0, sent_bytes=0)
+            start = time.process_time()
+            for _ in range(rounds):
+                body, _ = batch.encode_body(payload, compress)
+            cpu = (time.process_time() - start) * 1000000 / rounds / size
+            asyncio.run(upload(payload, compress))
+            row += [len(body) / size, cpu]
+        raw = batch.stats["raw_bytes"] / (rounds + 1) / size
+        results.append(row + [raw])
+
+    assert results[-1][3] < results[-1][1] / 2, "deflate should at least halve big batches"
+    print("Batches: readings per body, bytes and CPU us per reading plain / deflate:")
+    for size, plain, plain_cpu, packed, packed_cpu, raw in results:
+        print(f"  {size:3d}: {plain:5.0f} B {plain_cpu:5.0f} us / {packed:5.0f} B {packed_cpu:5.0f} us "
+              f"({packed / raw:.0%} of the JSON)")
+
+
+class _ConfigServer:
+    """
+    Config server stand-in serving document with an ETag derived from its content.
+
+    Attributes
+    ----------
+    document : bytes
+        Body of a 200 answer.
+    chunked : bool
+        Whether the body is sent with 'Transfer-Encoding: chunked' in chunks of 16 bytes.
+    answers : dict
+        Status code to number of answers sent.
+    """
+    def __init__(self, document: bytes):
+        self.document = document
+        self.chunked = False
+        self.answers = {200: 0, 304: 0}
+        self.server = None
+
+    async def start(self) -> str:
+        self.server = await asyncio.start_server(self._handle, HOST, 0)
+        return f"http://{HOST}:{self.server.sockets[0].getsockname()[1]}/api/config"
+
+    async def _handle(self, reader, writer):
+        head = (await reader.readuntil(b"\r\n\r\n")).decode()
+        fields = dict(line.lower().split(": ", 1) for line in head.split("\r\n")[1:] if ": " in line)
+        etag = f'"{zlib.crc32(self.document):08x}"'
+        if fields.get("if-none-match") == etag:
+            self.answers[304] += 1
+            writer.write(f"HTTP/1.1 304 Not Modified\r\nETag: {etag}\r\nConnection: close\r\n\r\n".encode())
+        elif self.chunked:
+            self.answers[200] += 1
+            writer.write(f"HTTP/1.1 200 OK\r\nETag: {etag}\r\nTransfer-Encoding: chunked\r\n\r\n".encode())
+            for offset in range(0, len(self.document), 16):
+                chunk = self.document[offset:offset + 16]
+                writer.write(b"%x;ext=1\r\n%s\r\n" % (len(chunk), chunk))
+            writer.write(b"0\r\nExpires: never\r\n\r\n")
+        else:
+            self.answers[200] += 1
+            writer.write(f"HTTP/1.1 200 OK\r\nETag: {etag}\r\nContent-Length: {len(self.document)}\r\n"
+                         f"Connection: close\r\n\r\n".encode() + self.document)
+        await writer.drain()
+        writer.close()
+
+
+def _open_sockets() -> int:
+    return len(os.listdir("/proc/self/fd"))
+
+
+def check_config(polls: int = 100) -> None:
+    """Polls against a config server stand-in: 304 for an unchanged configuration, live updates
+    sent plain or chunked, invalid documents, and no socket left open by failed connects."""
+    async def run(directory):
+        server = _ConfigServer(json.dumps({"moisture_threshold": 45, "pump_pulse": 20}).encode())
+        active = dict(config.DEFAULT_CONFIG, config_url=await server.start())
+        poller = config.ConfigPoller(active, "e6614104")
+        applied = []
+        poller.on_change(lambda settings: applied.append(dict(settings)))
+
+        assert await poller.poll() and active["moisture_threshold"] == 45 and len(applied) == 1
+        assert config.load_config(os.path.join(directory, "config.json"))["pump_pulse"] == 20
+        durations = []
+        for _ in range(polls):
+            start = time.monotonic()
+            assert not await poller.poll()
+            durations.append((time.monotonic() - start) * 1000)
+        assert server.answers[304] == polls
+
+        server.chunked = True
+        server.document = json.dumps({"sample_interval": 60, "compress": True, "unknown": 1}).encode()
+        assert await poller.poll() and active["sample_interval"] == 60 and active["compress"] is True
+        server.document = b'{"pump_pulse": 900}'
+        try:
+            await poller.poll()
+            raise AssertionError("pump pulse of 900 s accepted")
+        except ValueError:
+            pass
+        assert active["pump_pulse"] == 20 and len(applied) == 2
+        server.server.close()
+
+        # a full backlog drops the SYN, the connect hangs until the phase timeout
+        listener = socket.socket()
+        listener.bind((HOST, 0))
+        listener.listen(0)
+        queued = [socket.socket() for _ in range(4)]
+        for sock in queued:
+            sock.setblocking(False)
+            sock.connect_ex(listener.getsockname())
+        before = _open_sockets()
+        failures = {}
+        for url in (f"http://{HOST}:{listener.getsockname()[1]}/", active["config_url"]):
+            for _ in range(20):
+                try:
+                    await http.request("GET", url, timeouts={"connect": 0.05})
+                    raise AssertionError("connect succeeded")
+                except (http.PhaseTimeout, OSError) as e:
+                    failures[type(e).__name__] = failures.get(type(e).__name__, 0) + 1
+        leaked = _open_sockets() - before
+        for sock in queued + [listener]:
+            sock.close()
+        return durations, failures, leaked
+
+    output = io.StringIO()
+    with tempfile.TemporaryDirectory() as directory, contextlib.redirect_stdout(output):
+        save_config = config.save_config
+        config.save_config = lambda settings: save_config(settings, os.path.join(directory, "config.json"))
+        try:
+            durations, failures, leaked = asyncio.run(run(directory))
+        finally:
+            config.save_config = save_config
+    assert "'unknown'" in output.getvalue(), "unknown setting not reported"
+    assert not leaked, f"{leaked} sockets left open by failed connects"
+    print(f"Config: {polls} polls answered with 304, median {_percentile(durations, 0.5):.2f} ms; "
+          f"plain and chunked updates applied, invalid document refused; failed connects "
+          f"{failures} left no socket open")
+
+
+class _CommandBackend:
+    """Backend stand-in holding GET long polls open until a command is queued, results are
+    POSTed back to the same path."""
+    def __init__(self):
+        self.queue = []
+        self.pending = asyncio.Event()
+        self.results = []
+        self.server = None
+
+    async def start(self) -> str:
+        self.server = await asyncio.start_server(self._handle, HOST, 0)
+        return f"http://{HOST}:{self.server.sockets[0].getsockname()[1]}/api/commands"
+
+    async def _handle(self, reader, writer):
+        head = await reader.readuntil(b"\r\n\r\n")
+        try:
+            if head.startswith(b"POST"):
+                length = int(head.lower().split(b"content-length:")[1].split(b"\r\n")[0])
+                self.results += json.loads(await reader.readexactly(length))
+                writer.write(b"HTTP/1.1 204 No Content\r\nConnection: close\r\n\r\n")
+            else:
+                await self.pending.wait()
+                self.pending.clear()
+                body, self.queue = json.dumps(self.queue).encode(), []
+                writer.write(b"HTTP/1.1 200 OK\r\nContent-Length: %d\r\nConnection: close\r\n\r\n%s"
+                             % (len(body), body))
+            await writer.drain()
+        except asyncio.CancelledError:
+            # the long poll open at the end of the check
+            pass
+        writer.close()
+
+    def send(self, command: dict) -> None:
+        self.queue.append(command)
+        self.pending.set()
+
+
+async def _post_command(port: int, body: bytes, key: str = "e6614104", length: str = None) -> int:
+    reader_, writer = await asyncio.open_connection(HOST, port)
+    writer.write(f"POST /api/commands HTTP/1.1\r\nHost: pico\r\napiKey: {key}\r\n"
+                 f"Content-Length: {length or len(body)}\r\n\r\n".encode() + body)
+    await writer.drain()
+    status = int((await reader_.readline()).split()[1])
+    writer.close()
+    return status
+
+
+def check_commands(rounds: int = 20) -> None:
+    """Latency from sending a command to the switched relay, over the local API and over the
+    long polled backend, and the safety limits of manual waterings."""
+    async def run():
+        bus = events.EventBus()
+        sensors = reader.SensorReader()
+        sensors.measure()
+        controller = reader.SensorController(sensors, bus)
+        handler = commands.CommandHandler(controller)
+        switched = {}
+        bus.subscribe(lambda kind, data, ticks: switched.setdefault(kind, []).append(time.monotonic()))
+
+        api = local_api.LocalApi(local_api.Snapshot(), commands=handler, api_key="e6614104")
+        server = await asyncio.start_server(api._handle, HOST, 0)
+        port = server.sockets[0].getsockname()[1]
+        backend = _CommandBackend()
+        poller = asyncio.create_task(commands.CommandPoller(handler, await backend.start(), "e6614104").run())
+
+        latencies = {"local API": [], "long poll": []}
+        for n in range(rounds):
+            state = "on" if n % 2 else "off"
+            start = time.monotonic()
+            assert await _post_command(port, json.dumps({"id": f"l{n}", "action": "lamp", "state": state}).encode()) == 200
+            latencies["local API"].append((switched["lamp"][-1] - start) * 1000)
+            start = time.monotonic()
+            backend.send({"id": f"f{n}", "action": "fan", "state": state})
+            while len(switched.get("fan", ())) <= n:
+                await asyncio.sleep(0.0005)
+            latencies["long poll"].append((switched["fan"][-1] - start) * 1000)
+        while len(backend.results) < rounds:
+            await asyncio.sleep(0.001)
+        assert all(result["status"] == "accepted" for result in backend.results), backend.results
+
+        command = json.dumps({"id": "w1", "action": "water", "zone": 1, "seconds": 1}).encode()
+        assert await _post_command(port, command, key="wrong") == 401
+        assert await _post_command(port, command, length="ten") == 400
+        # the pins of the low active relays start at 0, the pump is nevertheless idle
+        assert await _post_command(port, command) == 200, "first watering after boot refused"
+        assert await _post_command(port, command.replace(b"w1", b"w2")) == 400, "second watering accepted"
+        # a dry sensor after a manual pulse is no reason for the emergency stop
+        sensors._CMS1.value = 50000
+        await asyncio.sleep(1.1)
+        assert not sensors.data.emg_stop_pump1 and sensors.data.soil_humidity_1 == 0
+        assert await _post_command(port, command.replace(b"w1", b"w3")) == 200, "watering after the pulse refused"
+
+        poller.cancel()
+        server.close()
+        backend.server.close()
+        return latencies
+
+    # time of MicroPython has the ticks functions of utime
+    reader.time = standins.utime
+    output = io.StringIO()
+    with contextlib.redirect_stdout(output):
+        latencies = asyncio.run(run())
+    summary = ", ".join(f"{path} {_percentile(values, 0.5):.2f}/{_percentile(values, 0.95):.2f} ms"
+                        for path, values in latencies.items())
+    print(f"Commands: latency to the switched relay (median/95th percentile) over {summary}; "
+          f"authentication, Content-Length and watering limits ok")
+
+
+def check_wifi() -> None:
+    """Failover of WifiSupervisor to another known network when the connected one vanishes,
+    and the sampling cadence while it reconnects; the priority of older stores is ignored and
+    an unchanged cache is not written again."""
+    async def run(directory):
+        # store of older firmware, which ranked by priority first
+        path = os.path.join(directory, "wifi_config.json")
+        networks = [{"ssid": ssid, "password": password, "priority": priority, "successes": 0, "failures": 0,
+                     "last_success": 0, "duration": None}
+                    for ssid, password, priority in (("home", "secret-1", 5), ("garden", "secret-2", 0))]
+        with open(path, "w") as file:
+            json.dump({"ssid": "", "password": "", "sequence": 0, "networks": networks}, file)
+        store = credentials.CredentialStore(path)
+        wlan = standins.WLAN()
+        wlan.connect_time = 0.3
+        wlan.networks = [(b"home", b"\x01" * 6, 6, -70, 3, False), (b"garden", b"\x02" * 6, 11, -50, 3, False)]
+        wlan.reachable = {b"home": "secret-1", b"garden": "secret-2"}
+        # garden is stronger, boot joins it and caches its access point
+        result = await wifi.connect_known(wlan, store)
+        assert result["ssid"] == "garden", result
+        cache_path = os.path.join(directory, "wifi_cache.json")
+        written = os.stat(cache_path).st_mtime_ns
+        await asyncio.sleep(0.01)
+        wifi.save_cache(wifi.load_cache())
+        assert os.stat(cache_path).st_mtime_ns == written, "unchanged cache written again"
+        assert not os.path.exists(cache_path + ".tmp"), "temporary cache file left"
+
+        outages = []
+        supervisor = wifi.WifiSupervisor(wlan, store, False, 600, lambda: outages.append("portal"))
+        task = asyncio.create_task(supervisor.run())
+        del wlan.reachable[b"garden"]
+        wlan.networks = wlan.networks[:1]
+        wlan.disconnect()
+        lateness = await _cadence(0.05, 1.5)
+        task.cancel()
+        return supervisor, wlan, lateness, outages
+
+    wifi.CHECK_INTERVAL = 0.1
+    output = io.StringIO()
+    with tempfile.TemporaryDirectory() as directory, contextlib.redirect_stdout(output):
+        cache_path = os.path.join(directory, "wifi_cache.json")
+        load_cache, save_cache = wifi.load_cache, wifi.save_cache
+        wifi.load_cache = lambda: load_cache(cache_path)
+        wifi.save_cache = lambda cache: save_cache(cache, cache_path)
+        try:
+            supervisor, wlan, lateness, outages = asyncio.run(run(directory))
+        finally:
+            wifi.load_cache, wifi.save_cache = load_cache, save_cache
+    metrics = supervisor.metrics
+    assert supervisor.online.is_set() and metrics["ssid"] == "home" and not outages, (metrics, output.getvalue())
+    assert wlan.isconnected() and _percentile(lateness, 0.95) < 20, lateness
+    print(f"Wi-Fi: stronger network joined despite old priority, unchanged cache not rewritten; "
+          f"failover from garden to home after {metrics['last_outage_ms']} ms outage, "
+          f"{metrics['reconnect_attempts']} reconnect attempt(s) with {len(wlan.connects)} joins in total; "
+          f"50 ms cadence late by {_percentile(lateness, 0.95):.1f} ms (95th percentile) meanwhile")
+
+
+# Imports one group of modules in a fresh interpreter, prints the seconds taken and the
+# sensor and MicroPython modules that ended up loaded
+_IMPORT_SCRIPT = """
+import sys, time
+sys.path.insert(0, {tools!r})
+import standins
+standins.install()
+loaded = set(sys.modules)
+start = time.perf_counter()
+for name in {modules!r}:
+    __import__(name)
+print(time.perf_counter() - start)
+print(" ".join(sorted(name for name in set(sys.modules) - loaded if name.startswith("sensor."))))
+"""
+
+
+def _main_imports() -> list:
+    """Modules main.py imports at its top level."""
+    with open(os.path.join(standins.SOURCE_DIR, "main.py")) as file:
+        tree = ast.parse(file.read())
+    modules = []
+    for node in tree.body:
+        if isinstance(node, ast.Import):
+            modules += [alias.name for alias in node.names]
+        elif isinstance(node, ast.ImportFrom):
+            modules.append(node.module)
+    return modules
+
+
+def _import_time(modules: list) -> tuple:
+    script = _IMPORT_SCRIPT.format(tools=os.path.dirname(os.path.abspath(__file__)), modules=modules)
+    lines = subprocess.run([sys.executable, "-c", script], check=True, capture_output=True,
+                           text=True).stdout.splitlines()
+    return float(lines[0]) * 1000, set(lines[1].split())
+
+
+def check_imports(rounds: int = 5) -> None:
+    """Import cost of the boot path of main.py against importing the provisioning portal and
+    MQTT eagerly, each import in a fresh interpreter with the stand-ins."""
+    boot = _main_imports()
+    lazy = ("sensor.access_point", "sensor.mqtt")
+    assert not set(lazy) & set(boot), "provisioning or MQTT imported at the top of main.py"
+    times = {"boot path": [], "with portal and MQTT": []}
+    for _ in range(rounds):
+        milliseconds, loaded = _import_time(boot)
+        times["boot path"].append(milliseconds)
+        assert not set(lazy + ("sensor.pages", "sensor.captive_dns")) & loaded, loaded
+        times["with portal and MQTT"].append(_import_time(boot + list(lazy))[0])
+    print(f"Imports: {len(boot)} modules of main.py, median of {rounds} fresh interpreters "
+          + ", ".join(f"{name} {_percentile(values, 0.5):.1f} ms" for name, values in times.items())
+          + f"; {len(loaded)} sensor modules loaded on the boot path, portal and MQTT not")
+
+
+CHECKS = {
+    "http_client": check_http_client,
+    "mqtt": check_mqtt,
+    "local_api": check_local_api,
+    "stream": check_stream,
+    "timesync": check_timesync,
+    "resolver": check_resolver,
+    "tls": check_tls,
+    "batch": check_batch,
+    "config": check_config,
+    "commands": check_commands,
+    "wifi": check_wifi,
+    "imports": check_imports,
+}
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[0])
+    parser.add_argument("checks", nargs="*", metavar="check", help=f"one of {', '.join(CHECKS)}, all by default")
+    args = parser.parse_args()
+    for name in args.checks:
+        if name not in CHECKS:
+            parser.error(f"unknown check '{name}'")
+    for name in args.checks or CHECKS:
+        CHECKS[name]()
+
+
+if __name__ == "__main__":
+    main()
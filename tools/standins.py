@@ -0,0 +1,411 @@
+"""Stand-ins for the MicroPython modules the sensor package imports, for host checks.
+
+The host checks in tools/ run the package under CPython:
+
+    import standins
+    standins.install()
+    import sensor.http_client
+
+uasyncio, usocket, ussl, urandom, uerrno and uselect map to their CPython counterparts, with
+the few MicroPython extras the package uses (asyncio.sleep_ms, Stream.readinto). utime counts
+ticks_ms modulo 2**30 like the rp2 port, and advance() moves that clock forward. machine,
+network, dht and deflate are small scriptable fakes of the hardware and firmware modules.
+"""
+
+import asyncio
+import errno
+import io
+import os
+import random
+import select
+import socket
+import ssl
+import sys
+import time
+import types
+import zlib
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+SOURCE_DIR = os.path.join(ROOT, "in Progress")
+
+# Period of ticks_ms on the rp2 port
+TICKS_PERIOD = 1 << 30
+_ticks_offset = 0
+
+
+def advance(ms: int) -> None:
+    """Moves ticks_ms forward, e.g. past a wrap of the counter."""
+    global _ticks_offset
+    _ticks_offset += ms
+
+
+def _ticks_ms() -> int:
+    return (int(time.monotonic() * 1000) + _ticks_offset) % TICKS_PERIOD
+
+
+def _ticks_us() -> int:
+    return int(time.monotonic() * 1000000) % (TICKS_PERIOD * 1000)
+
+
+def _ticks_diff(end: int, start: int) -> int:
+    return (end - start + TICKS_PERIOD // 2) % TICKS_PERIOD - TICKS_PERIOD // 2
+
+
+def _ticks_add(ticks: int, delta: int) -> int:
+    return (ticks + delta) % TICKS_PERIOD
+
+
+def _module(name: str, **attributes) -> types.ModuleType:
+    module = types.ModuleType(name)
+    module.__dict__.update(attributes)
+    return module
+
+
+utime = _module("utime", ticks_ms=_ticks_ms, ticks_us=_ticks_us, ticks_diff=_ticks_diff,
+                ticks_add=_ticks_add, sleep=time.sleep, sleep_ms=lambda ms: time.sleep(ms / 1000),
+                sleep_us=lambda us: time.sleep(us / 1000000), gmtime=time.gmtime, time=time.time)
+
+
+class Stream:
+    """asyncio stream pair with the readinto of MicroPython's Stream."""
+    def __init__(self, reader, writer):
+        self._reader = reader
+        self._writer = writer
+
+    def __getattr__(self, name):
+        if hasattr(self._reader, name):
+            return getattr(self._reader, name)
+        return getattr(self._writer, name)
+
+    async def readinto(self, buffer) -> int:
+        data = await self._reader.read(len(buffer))
+        buffer[:len(data)] = data
+        return len(data)
+
+
+class SocketStream:
+    """MicroPython's Stream(sock) over a non-blocking socket, which may be wrapped in TLS. The
+    socket is polled every millisecond, where the board waits in the io queue of uasyncio."""
+    _BLOCKED = (BlockingIOError, ssl.SSLWantReadError, ssl.SSLWantWriteError)
+
+    def __init__(self, sock, extra=None):
+        self.s = sock
+        self._out = b""
+        self._in = b""
+
+    async def _recv(self) -> bytes:
+        while True:
+            try:
+                return self.s.recv(4096)
+            except self._BLOCKED:
+                await asyncio.sleep(0.001)
+
+    async def read(self, size: int = -1) -> bytes:
+        if self._in:
+            data = self._in if size < 0 else self._in[:size]
+            self._in = self._in[len(data):]
+            return data
+        if size >= 0:
+            return await self._recv()
+        chunks = []
+        while True:
+            data = await self._recv()
+            if not data:
+                return b"".join(chunks)
+            chunks.append(data)
+
+    async def readexactly(self, size: int) -> bytes:
+        while len(self._in) < size:
+            data = await self._recv()
+            if not data:
+                raise EOFError
+            self._in += data
+        data, self._in = self._in[:size], self._in[size:]
+        return data
+
+    async def readline(self) -> bytes:
+        while b"\n" not in self._in:
+            data = await self._recv()
+            if not data:
+                data, self._in = self._in, b""
+                return data
+            self._in += data
+        end = self._in.index(b"\n") + 1
+        data, self._in = self._in[:end], self._in[end:]
+        return data
+
+    async def readinto(self, buffer) -> int:
+        data = await self.read(len(buffer))
+        buffer[:len(data)] = data
+        return len(data)
+
+    def write(self, data) -> None:
+        self._out += bytes(data)
+
+    async def drain(self) -> None:
+        while self._out:
+            try:
+                sent = self.s.send(self._out)
+                self._out = self._out[sent:]
+            except self._BLOCKED:
+                await asyncio.sleep(0.001)
+        await asyncio.sleep(0)
+
+    def close(self) -> None:
+        self.s.close()
+
+    async def wait_closed(self) -> None:
+        pass
+
+
+async def _open_connection(host, port, ssl=None, server_hostname=None):
+    # CPython refuses a server_hostname without TLS, MicroPython ignores it
+    if ssl is None:
+        server_hostname = None
+    reader, writer = await asyncio.open_connection(host, port, ssl=ssl, server_hostname=server_hostname)
+    stream = Stream(reader, writer)
+    return stream, stream
+
+
+async def _start_server(callback, host, port, backlog=5):
+    async def handle(reader, writer):
+        stream = Stream(reader, writer)
+        await callback(stream, stream)
+    return await asyncio.start_server(handle, host, port, backlog=backlog)
+
+
+uasyncio = _module("uasyncio", sleep_ms=lambda ms: asyncio.sleep(ms / 1000), start_server=_start_server,
+                   open_connection=_open_connection, StreamReader=SocketStream, StreamWriter=SocketStream)
+uasyncio.__getattr__ = lambda name: getattr(asyncio, name)
+
+
+class SSLContext(ssl.SSLContext):
+    """Client context that allows verify_mode CERT_NONE like the one of MicroPython."""
+    def __new__(cls, protocol=ssl.PROTOCOL_TLS_CLIENT):
+        return super().__new__(cls, protocol)
+
+    def __init__(self, protocol=ssl.PROTOCOL_TLS_CLIENT):
+        super().__init__()
+        self.check_hostname = False
+
+
+ussl = _module("ussl", SSLContext=SSLContext, PROTOCOL_TLS_CLIENT=ssl.PROTOCOL_TLS_CLIENT,
+               CERT_NONE=ssl.CERT_NONE)
+
+
+class Pin:
+    """Output pin remembering its level, input pins read value."""
+    IN = 0
+    OUT = 1
+    PULL_UP = 1
+
+    def __init__(self, pin, mode=IN, pull=None, value=None):
+        self.pin = pin
+        self._value = 0 if value is None else value
+
+    def value(self, value=None):
+        if value is None:
+            return self._value
+        self._value = value
+
+    def on(self):
+        self._value = 1
+
+    def off(self):
+        self._value = 0
+
+
+class ADC:
+    """Analog input reading value, 30000 is moist soil for the sensor calibration."""
+    def __init__(self, pin):
+        self.value = 30000
+
+    def read_u16(self) -> int:
+        return self.value
+
+
+class RTC:
+    def datetime(self, value=None):
+        self.value = value
+
+
+class Timer:
+    def __init__(self, *args, **kwargs):
+        pass
+
+    def deinit(self):
+        pass
+
+
+machine = _module("machine", Pin=Pin, ADC=ADC, RTC=RTC, Timer=Timer, unique_id=lambda: b"\xe6\x61\x41\x04",
+                  reset=lambda: None)
+
+
+class DHT22:
+    def __init__(self, pin):
+        pass
+
+    def measure(self):
+        pass
+
+    def temperature(self) -> float:
+        return 21.5
+
+    def humidity(self) -> float:
+        return 55.0
+
+
+dht = _module("dht", DHT22=DHT22)
+
+
+class WLAN:
+    """
+    Station or access point interface.
+
+    Attributes
+    ----------
+    networks : list of tuple
+        Result of scan() as (ssid, bssid, channel, RSSI, security, hidden).
+    scan_time : float
+        Seconds scan() blocks, like the driver does.
+    reachable : dict
+        SSID as bytes to the password that connects, other networks fail.
+    connect_time : float
+        Seconds after connect() until the status is STAT_GOT_IP.
+
+    Like the cyw43 driver, WLAN(interface) returns the same object for every call, so a
+    check can script the interface that the code under test creates itself.
+    """
+    _interfaces = {}
+
+    def __new__(cls, interface=0):
+        if interface not in cls._interfaces:
+            cls._interfaces[interface] = super().__new__(cls)
+            cls._interfaces[interface]._setup(interface)
+        return cls._interfaces[interface]
+
+    def _setup(self, interface):
+        self.interface = interface
+        self.networks = []
+        self.scan_time = 0
+        self.reachable = {}
+        self.connect_time = 0
+        self.scans = 0
+        self.connects = []
+        self._active = False
+        self._status = 0
+        self._connected_at = None
+        self._config = ("192.168.178.50", "255.255.255.0", "192.168.178.1", "192.168.178.1")
+
+    def active(self, value=None):
+        if value is None:
+            return self._active
+        self._active = value
+
+    def scan(self) -> list:
+        time.sleep(self.scan_time)
+        self.scans += 1
+        return list(self.networks)
+
+    def connect(self, ssid, password, bssid=None):
+        ssid = ssid.encode() if isinstance(ssid, str) else bytes(ssid)
+        password = password.decode() if isinstance(password, bytes) else password
+        self.connects.append((ssid, bssid))
+        if self.reachable.get(ssid) == password:
+            self._status = 1
+            self._connected_at = time.monotonic() + self.connect_time
+        else:
+            self._status = network.STAT_NO_AP_FOUND if ssid not in self.reachable else network.STAT_WRONG_PASSWORD
+            self._connected_at = None
+
+    def disconnect(self):
+        self._status = 0
+        self._connected_at = None
+
+    def status(self, param=None):
+        if param == "rssi":
+            return -60
+        if self._connected_at is not None and time.monotonic() >= self._connected_at:
+            self._status = 3
+        return self._status
+
+    def isconnected(self) -> bool:
+        return self.status() == 3
+
+    def ifconfig(self, config=None):
+        if config is None:
+            return self._config
+        self._config = tuple(config)
+
+    def ipconfig(self, **kwargs):
+        pass
+
+    def config(self, **kwargs):
+        pass
+
+
+network = _module("network", WLAN=WLAN, STA_IF=0, AP_IF=1, STAT_IDLE=0, STAT_CONNECTING=1,
+                  STAT_WRONG_PASSWORD=-3, STAT_NO_AP_FOUND=-2, STAT_CONNECT_FAIL=-1, STAT_GOT_IP=3,
+                  country=lambda code=None: None)
+
+
+class DeflateIO:
+    """deflate.DeflateIO on top of zlib, compressing on write and decompressing on read."""
+    def __init__(self, stream, format=0, wbits=0, close=False):
+        wbits = wbits or 15
+        self._stream = stream
+        self._wbits = {1: -wbits, 2: wbits, 3: 16 + wbits}[format or 2]
+        self._compressor = None
+        self._decompressor = None
+        self._pending = b""
+
+    def write(self, data) -> int:
+        if self._compressor is None:
+            self._compressor = zlib.compressobj(wbits=self._wbits)
+        data = data.encode() if isinstance(data, str) else bytes(data)
+        self._stream.write(self._compressor.compress(data))
+        return len(data)
+
+    def close(self) -> None:
+        if self._compressor is not None:
+            self._stream.write(self._compressor.flush())
+
+    def readinto(self, buffer) -> int:
+        if self._decompressor is None:
+            self._decompressor = zlib.decompressobj(wbits=self._wbits)
+        while not self._pending and not self._decompressor.eof:
+            chunk = bytearray(256)
+            count = self._stream.readinto(chunk)
+            if not count:
+                break
+            self._pending = self._decompressor.decompress(bytes(chunk[:count]))
+        count = min(len(buffer), len(self._pending))
+        buffer[:count] = self._pending[:count]
+        self._pending = self._pending[count:]
+        return count
+
+
+class BytesIO(io.BytesIO):
+    """io.BytesIO taking str like the streams of MicroPython, which write it as UTF-8."""
+    def write(self, data) -> int:
+        return super().write(data.encode() if isinstance(data, str) else data)
+
+
+# io of MicroPython, it cannot replace io in sys.modules, checks assign it to a module's io
+micropython_io = _module("io", BytesIO=BytesIO, IOBase=io.IOBase, StringIO=io.StringIO)
+
+deflate = _module("deflate", DeflateIO=DeflateIO, AUTO=0, RAW=1, ZLIB=2, GZIP=3)
+
+MODULES = {"utime": utime, "uasyncio": uasyncio, "usocket": socket, "ussl": ussl, "urandom": random,
+           "uerrno": errno, "uselect": select, "machine": machine, "network": network, "dht": dht,
+           "deflate": deflate}
+
+
+def install(without: tuple = ()) -> None:
+    """Puts the package on sys.path and registers the stand-ins, except the names in without."""
+    if SOURCE_DIR not in sys.path:
+        sys.path.insert(0, SOURCE_DIR)
+    for name, module in MODULES.items():
+        if name not in without:
+            sys.modules.setdefault(name, module)
+